@@ -0,0 +1,171 @@
+"""
+Benchmark event loop: nest_asyncio vs asyncio standar vs uvloop
+===============================================================
+• Throughput ``process_query`` konkuren (router → KAK / docgen / other)
+  terhadap stub OpenAI + stub MCP Server stdio + mem0 in-memory.
+• Tiap mode dijalankan di proses terpisah karena ``nest_asyncio.apply()``
+  mem-patch asyncio secara global dan tidak bisa dibatalkan.
+• Lag event loop diukur oleh ``LoopLagMonitor`` selama beban berjalan.
+• Mode ``nest_asyncio`` butuh paket nest_asyncio, mode ``uvloop`` butuh
+  uvloop (keduanya opsional; mode di-skip bila tidak terpasang).
+
+Contoh:
+    python -m benchmarks.bench_event_loop --requests 60 --concurrency 16 \\
+        --modes nest_asyncio,asyncio,uvloop
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# Settings mewajibkan OPENAI_API_KEY; stub tidak memeriksa nilainya
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+MODES = ("nest_asyncio", "asyncio", "uvloop")
+
+
+# ---------------------------------------------------------------------------
+#  Proses anak: satu mode event loop
+# ---------------------------------------------------------------------------
+async def _child(args: argparse.Namespace) -> Dict[str, Any]:
+    from benchmarks.bench_process_query import FAKE_MCP_SERVER, QUERIES, percentile
+    from benchmarks.fake_openai import FakeOpenAIServer
+    from benchmarks.inmemory_mem0 import InMemoryMem0
+
+    if args.child == "nest_asyncio":
+        import nest_asyncio
+
+        # sama seperti perilaku lama: patch loop yang sedang berjalan
+        nest_asyncio.apply(asyncio.get_running_loop())
+
+    server = FakeOpenAIServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["BENCH_MCP_CPU_MS"] = str(args.mcp_cpu_ms)
+
+    from mcp_client.client import MCPClient
+    from mcp_client.utils.runtime import loop_flavor, loop_monitor
+
+    client = MCPClient()
+    client.memory_mgr = InMemoryMem0(latency_ms=args.memory_latency_ms)  # type: ignore[assignment]
+    if not await client.connect(FAKE_MCP_SERVER):
+        server.stop()
+        raise SystemExit("Gagal konek ke stub MCP server")
+
+    queries = list(QUERIES.values())
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+
+    async def _one(i: int) -> None:
+        async with sem:
+            tic = time.perf_counter()
+            await client.process_query(queries[i % len(queries)], f"user{i % 8}")
+            latencies.append(time.perf_counter() - tic)
+
+    try:
+        # pemanasan: koneksi keep-alive, cache prompt
+        for i in range(len(queries)):
+            await _one(i)
+        latencies.clear()
+        tic = time.perf_counter()
+        await asyncio.gather(*(_one(i) for i in range(args.requests)))
+        wall = time.perf_counter() - tic
+        lag = loop_monitor.stats()
+    finally:
+        await client.cleanup()
+        server.stop()
+    return {
+        "mode": args.child,
+        "loop": loop_flavor(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "throughput_rps": args.requests / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "lag_p99_ms": lag["p99_ms"],
+        "lag_max_ms": lag["max_ms"],
+    }
+
+
+# ---------------------------------------------------------------------------
+#  Proses induk: jalankan tiap mode & bandingkan
+# ---------------------------------------------------------------------------
+def _spawn(mode: str, args: argparse.Namespace) -> Dict[str, Any]:
+    cmd = [sys.executable, "-m", "benchmarks.bench_event_loop", "--child", mode]
+    for flag in ("requests", "concurrency", "latency_ms", "jitter_ms", "memory_latency_ms", "mcp_cpu_ms"):
+        cmd += [f"--{flag.replace('_', '-')}", str(getattr(args, flag))]
+    env = dict(os.environ)
+    env.update(
+        # cache jawaban dimatikan agar semua request benar-benar diproses
+        ANSWER_CACHE_ENABLED="false",
+        LOOP_LAG_INTERVAL_SEC=str(args.lag_interval),
+        LOOP_LAG_WARN_MS="1000000",
+        USE_UVLOOP="false",
+    )
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        tail = (proc.stderr or proc.stdout).strip().splitlines()[-1:] or ["?"]
+        return {"mode": mode, "skipped": tail[0]}
+    row = json.loads(lines[-1])
+    if mode == "uvloop" and row["loop"] != "uvloop":
+        return {"mode": mode, "skipped": "uvloop belum terpasang"}
+    return row
+
+
+def _print(rows: List[Dict[str, Any]]) -> None:
+    baseline = next(
+        (r["throughput_rps"] for r in rows if r["mode"] == "nest_asyncio" and "skipped" not in r),
+        None,
+    )
+    header = f"{'mode':<14}{'rps':>9}{'p50ms':>10}{'p95ms':>10}{'lag p99':>10}{'lag max':>10}{'vs nest':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        if "skipped" in r:
+            print(f"{r['mode']:<14}  (skip: {r['skipped']})")
+            continue
+        ratio = f"{r['throughput_rps'] / baseline:.2f}×" if baseline else "-"
+        print(
+            f"{r['mode']:<14}{r['throughput_rps']:>9.2f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+            f"{r['lag_p99_ms']:>10.2f}{r['lag_max_ms']:>10.2f}{ratio:>9}"
+        )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--modes", default=",".join(MODES),
+                    type=lambda s: [x.strip() for x in s.split(",") if x.strip()])
+    ap.add_argument("--requests", type=int, default=60)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--latency-ms", type=float, default=50.0)
+    ap.add_argument("--jitter-ms", type=float, default=10.0)
+    ap.add_argument("--memory-latency-ms", type=float, default=2.0)
+    ap.add_argument("--mcp-cpu-ms", type=float, default=5.0)
+    ap.add_argument("--lag-interval", type=float, default=0.01, help="interval sampling lag (detik)")
+    ap.add_argument("--json", help="tulis hasil ke file JSON")
+    ap.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        from mcp_client.utils import runtime
+
+        row = runtime.run(_child(args), use_uvloop=args.child == "uvloop")
+        print(json.dumps(row))
+        return
+
+    rows = [_spawn(mode, args) for mode in args.modes]
+    _print(rows)
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark cold-start import ``mcp_client.client``
+=================================================
+• Mengukur waktu import di proses Python baru (median dari beberapa run).
+• Menampilkan modul dengan waktu import kumulatif terbesar (``-X importtime``).
+• Guard regresi: exit code 1 jika melebihi budget atau jika dependensi berat
+  (mem0, openai, tiktoken, uvloop, nest_asyncio) ikut ter-import saat import modul.
+
+Contoh:
+    python -m benchmarks.bench_import --runs 5 --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modul yang wajib di-load lazy (saat pertama dipakai), bukan saat import
+LAZY_MODULES = ("mem0", "openai", "tiktoken", "uvloop", "nest_asyncio")
+
+_PROBE = (
+    "import json, sys\n"
+    "import {target}\n"
+    "print(json.dumps(sorted(m for m in {lazy!r} if m in sys.modules)))\n"
+)
+
+
+def _run_once(target: str, importtime: bool = False) -> tuple[float, str, str]:
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", _PROBE.format(target=target, lazy=LAZY_MODULES)]
+    env = dict(os.environ)
+    # Settings mewajibkan OPENAI_API_KEY; nilai dummy cukup untuk import
+    env.setdefault("OPENAI_API_KEY", "sk-bench")
+    tic = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - tic
+    if proc.returncode != 0:
+        raise SystemExit(f"Import gagal:\n{proc.stderr}")
+    return elapsed, proc.stdout, proc.stderr
+
+
+def _top_imports(stderr: str, top: int) -> list[tuple[int, str]]:
+    """Parse output ``-X importtime`` → [(cumulative_us, module)] terbesar."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # format: "import time: <self_us> | <cumulative_us> | <modul>"
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--target", default="mcp_client.client")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=1500.0)
+    ap.add_argument("--top", type=int, default=15)
+    args = ap.parse_args()
+
+    # Run pertama sebagai pemanasan cache .pyc / page cache
+    _run_once(args.target)
+    samples = []
+    leaked: list[str] = []
+    for _ in range(args.runs):
+        elapsed, stdout, _ = _run_once(args.target)
+        samples.append(elapsed * 1000)
+        leaked = json.loads(stdout.strip().splitlines()[-1])
+
+    _, _, stderr = _run_once(args.target, importtime=True)
+
+    median = statistics.median(samples)
+    print(f"Import {args.target}: median={median:.0f}ms "
+          f"min={min(samples):.0f}ms max={max(samples):.0f}ms (n={args.runs})")
+    print("Modul terberat (kumulatif):")
+    for cumulative_us, name in _top_imports(stderr, args.top):
+        print(f"  {cumulative_us / 1000:8.1f}ms  {name}")
+
+    ok = True
+    if leaked:
+        print(f"REGRESI: modul berat ter-import saat import: {leaked}")
+        ok = False
+    if median > args.budget_ms:
+        print(f"REGRESI: median {median:.0f}ms > budget {args.budget_ms:.0f}ms")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Benchmark offline pipeline process_query
+========================================
+Menjalankan ``_run_kak``, ``_run_docgen`` dan ``_run_other`` MCPClient terhadap:
+• stub OpenAI lokal (``fake_openai``) dengan latensi yang dapat diatur,
+• stub MCP Server stdio (``fake_mcp_server``),
+• pengganti mem0 in-memory (``inmemory_mem0``),
+sehingga tidak ada biaya OpenAI, server MCP asli, maupun Qdrant.
+
+Laporan per intent: p50/p95/p99 latensi, throughput, jumlah balasan gagal,
+serta alokasi memori (tracemalloc, dijalankan di pass terpisah agar tidak
+mengganggu latensi). Exit code 1 jika ada request yang gagal.
+
+Contoh:
+    python -m benchmarks.bench_process_query --requests 50 --concurrency 8 \\
+        --latency-ms 200 --jitter-ms 50 --json bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# Settings mewajibkan OPENAI_API_KEY; stub tidak memeriksa nilainya
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from benchmarks.fake_openai import FakeOpenAIServer  # noqa: E402
+from benchmarks.inmemory_mem0 import InMemoryMem0  # noqa: E402
+
+FAKE_MCP_SERVER = str(ROOT / "benchmarks" / "fake_mcp_server.py")
+
+QUERIES = {
+    "kak": "Analisa proyek bank sumsel babel",
+    "docgen": "Buatkan proposal proyek bank sumsel babel",
+    "other": "Berapa SLA di dalam proyek bank sumsel babel?",
+}
+MAX_TURNS_OTHER = 20  # KAK/docgen: pipeline DAG tanpa batas turn
+
+
+def _kak_ok(reply: str) -> bool:
+    # ringkasan JSON murni; balasan error / "tidak tersimpan" bukan JSON
+    try:
+        return isinstance(json.loads(reply), dict)
+    except ValueError:
+        return False
+
+
+# Balasan yang dianggap sukses per intent
+SUCCESS: Dict[str, Callable[[str], bool]] = {
+    "kak": _kak_ok,
+    "docgen": lambda r: r.startswith("Proposal berhasil dibuat"),
+    "other": lambda r: not r.startswith(("Maaf", "Terjadi kesalahan")),
+}
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Persentil nearest-rank (q dalam 0‑100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, min(len(ordered), round(q / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+def _runner(client: Any, intent: str) -> Callable[[str, str, str], Any]:
+    return {
+        "kak": client._run_kak,
+        "docgen": client._run_docgen,
+        "other": lambda t, q, u: client._run_other(t, q, u, MAX_TURNS_OTHER),
+    }[intent]
+
+
+async def _drive(
+    client: Any, intent: str, n: int, concurrency: int
+) -> Tuple[List[float], List[str]]:
+    """Latensi per request + balasan yang gagal (menurut ``SUCCESS``)."""
+    from mcp_client.utils.logger import trace_id_var
+
+    runner = _runner(client, intent)
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures: List[str] = []
+
+    async def _one(i: int) -> None:
+        async with sem:
+            trace_id = f"bench{intent[0]}{i:05d}"
+            trace_id_var.set(trace_id)
+            tic = time.perf_counter()
+            reply = await runner(trace_id, QUERIES[intent], f"user{i % 8}")
+            latencies.append(time.perf_counter() - tic)
+            if not SUCCESS[intent](reply):
+                failures.append(reply[:200])
+
+    await asyncio.gather(*(_one(i) for i in range(n)))
+    return latencies, failures
+
+
+async def bench_latency(
+    client: Any, intent: str, n: int, concurrency: int
+) -> Dict[str, Any]:
+    tic = time.perf_counter()
+    latencies, failures = await _drive(client, intent, n, concurrency)
+    wall = time.perf_counter() - tic
+    return {
+        "intent": intent,
+        "requests": n,
+        "concurrency": concurrency,
+        "errors": len(failures),
+        "first_error": failures[0] if failures else None,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "throughput_rps": n / wall if wall else 0.0,
+    }
+
+
+async def bench_alloc(
+    client: Any, intent: str, n: int, concurrency: int, top: int = 5
+) -> Dict[str, Any]:
+    tracemalloc.start(25)
+    try:
+        base_current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        await _drive(client, intent, n, concurrency)
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    diff = after.compare_to(before, "lineno")
+    allocated = sum(d.size_diff for d in diff if d.size_diff > 0)
+    blocks = sum(d.count_diff for d in diff if d.count_diff > 0)
+    return {
+        "alloc_requests": n,
+        "alloc_kb_per_req": allocated / 1024 / max(n, 1),
+        "alloc_blocks_per_req": blocks / max(n, 1),
+        "peak_kb": (peak - base_current) / 1024,
+        "retained_kb": (current - base_current) / 1024,
+        "top_sites": [
+            f"{d.traceback[0].filename}:{d.traceback[0].lineno} +{d.size_diff / 1024:.1f}KB"
+            for d in diff[:top]
+        ],
+    }
+
+
+async def main_async(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    server = FakeOpenAIServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["BENCH_MCP_CPU_MS"] = str(args.mcp_cpu_ms)
+    os.environ["BENCH_MCP_DOC_KB"] = str(args.doc_kb)
+
+    from mcp_client.client import MCPClient
+
+    client = MCPClient()
+    client.memory_mgr = InMemoryMem0(latency_ms=args.memory_latency_ms)  # type: ignore[assignment]
+    if not await client.connect(FAKE_MCP_SERVER):
+        server.stop()
+        raise SystemExit("Gagal konek ke stub MCP server")
+
+    results = []
+    try:
+        for intent in args.intents:
+            # pemanasan: koneksi keep-alive, cache prompt, JIT path
+            await _drive(client, intent, min(2, args.requests), 1)
+            row = await bench_latency(client, intent, args.requests, args.concurrency)
+            if args.alloc_requests > 0:
+                row.update(
+                    await bench_alloc(
+                        client, intent, args.alloc_requests, args.concurrency
+                    )
+                )
+            results.append(row)
+    finally:
+        await client.cleanup()
+        server.stop()
+    print(f"Total request ke stub OpenAI: {server.requests}")
+    return results
+
+
+def _print(results: List[Dict[str, Any]]) -> None:
+    header = f"{'intent':<8}{'n':>6}{'err':>5}{'conc':>6}{'p50ms':>10}{'p95ms':>10}{'p99ms':>10}{'rps':>9}{'KB/req':>10}{'peakKB':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['intent']:<8}{r['requests']:>6}{r['errors']:>5}{r['concurrency']:>6}"
+            f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+            f"{r['throughput_rps']:>9.2f}{r.get('alloc_kb_per_req', 0):>10.1f}"
+            f"{r.get('peak_kb', 0):>10.1f}"
+        )
+    for r in results:
+        if r["errors"]:
+            print(f"\n{r['errors']} balasan gagal ({r['intent']}), contoh: {r['first_error']!r}")
+    for r in results:
+        if r.get("top_sites"):
+            print(f"\nAlokasi terbesar ({r['intent']}):")
+            for site in r["top_sites"]:
+                print(f"  {site}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark offline process_query")
+    ap.add_argument("--intents", default="kak,docgen,other",
+                    type=lambda s: [x.strip() for x in s.split(",") if x.strip()])
+    ap.add_argument("--requests", type=int, default=30)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--latency-ms", type=float, default=100.0)
+    ap.add_argument("--jitter-ms", type=float, default=20.0)
+    ap.add_argument("--memory-latency-ms", type=float, default=5.0)
+    ap.add_argument("--mcp-cpu-ms", type=float, default=20.0)
+    ap.add_argument("--doc-kb", type=int, default=40)
+    ap.add_argument("--alloc-requests", type=int, default=5,
+                    help="jumlah request pass tracemalloc (0 = nonaktif)")
+    ap.add_argument("--json", help="tulis hasil ke file JSON")
+    args = ap.parse_args()
+
+    results = asyncio.run(main_async(args))
+    _print(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if any(r["errors"] for r in results):
+        # angka latensi request yang gagal tidak bermakna
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Microbenchmark parsing hasil tool MCP
+=====================================
+• ``legacy``      : ``content[0].text`` lalu ``json.loads`` berulang seperti
+  alur lama (loop guard, pipeline, ``payload_success``/fingerprint).
+• ``single-json`` : ``ToolResult`` parse sekali, codec stdlib ``json``.
+• ``single-fast`` : ``ToolResult`` parse sekali, codec cepat (orjson jika
+  terpasang; sama dengan single-json bila tidak).
+• Payload besar meniru ``read_project_markdown`` / ``build_summary_tender_payload``.
+
+Contoh:
+    python -m benchmarks.bench_tool_result --kb 512,2048 --iterations 50
+"""
+
+import argparse
+import json
+import statistics
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+from mcp_client.utils import tool_result
+from mcp_client.utils.tool_result import ToolResult
+
+_PARAGRAPH = (
+    "## Ruang Lingkup Pekerjaan\n"
+    "Penyedia jasa wajib melaksanakan implementasi sistem informasi terpadu, "
+    "migrasi data, pelatihan pengguna dan pendampingan operasional selama "
+    "masa garansi. | Item | Volume | Satuan |\n|---|---|---|\n| Server | 4 | unit |\n"
+)
+
+
+def _payloads(kb: int) -> Dict[str, str]:
+    markdown = _PARAGRAPH * max(1, kb * 1024 // len(_PARAGRAPH))
+    return {
+        "read_project_markdown": json.dumps({"status": "success", "text": markdown}),
+        "build_summary_tender_payload": json.dumps(
+            {"instruction": "Ringkas KAK berikut dalam JSON.", "context": markdown}
+        ),
+    }
+
+
+def _mcp_result(text: str) -> Any:
+    # cukup duck-typing CallToolResult (content part dengan atribut .text)
+    return SimpleNamespace(
+        content=[SimpleNamespace(type="text", text=text)],
+        structuredContent=None,
+        isError=False,
+    )
+
+
+def _legacy(name: str, result: Any, parses: int) -> Any:
+    text = f"{result.content[0].text}"
+    data = None
+    for _ in range(parses):
+        data = json.loads(text)
+    return data
+
+
+def _single(name: str, result: Any) -> Any:
+    res = ToolResult.from_mcp(name, result)
+    res.ok  # loop guard
+    return res.data  # pipeline
+
+
+def _time(fn: Callable[[], Any], iterations: int) -> List[float]:
+    fn()  # warm-up
+    samples = []
+    for _ in range(iterations):
+        tic = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - tic) * 1000)
+    return samples
+
+
+def _with_codec(loads: Callable[[str], Any], fn: Callable[[], Any]) -> Callable[[], Any]:
+    def _run() -> Any:
+        original = tool_result.loads
+        tool_result.loads = loads
+        try:
+            return fn()
+        finally:
+            tool_result.loads = original
+
+    return _run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--kb", default="256,2048", help="ukuran markdown (KB), koma")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument(
+        "--legacy-parses", type=int, default=3, help="jumlah json.loads per hasil di alur lama"
+    )
+    args = parser.parse_args()
+
+    print(f"Codec cepat: {tool_result.JSON_CODEC}")
+    print("Median ms per hasil tool:")
+    print(f"{'payload':<32}{'KB':>6}{'legacy':>10}{'single-json':>13}{'single-fast':>13}{'speedup':>9}")
+    for kb in (int(k) for k in args.kb.split(",")):
+        for name, text in _payloads(kb).items():
+            result = _mcp_result(text)
+            legacy = statistics.median(
+                _time(lambda: _legacy(name, result, args.legacy_parses), args.iterations)
+            )
+            single_json = statistics.median(
+                _time(_with_codec(json.loads, lambda: _single(name, result)), args.iterations)
+            )
+            single_fast = statistics.median(
+                _time(lambda: _single(name, result), args.iterations)
+            )
+            print(
+                f"{name:<32}{len(text) // 1024:>6}{legacy:>10.2f}{single_json:>13.2f}"
+                f"{single_fast:>13.2f}{legacy / single_fast:>8.1f}×"
+            )
+
+
+if __name__ == "__main__":
+    main()
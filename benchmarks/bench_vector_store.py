@@ -0,0 +1,222 @@
+"""
+Benchmark vector store memori: EmbeddedVectorStore vs Qdrant
+============================================================
+• Mengisi N memori (default 10k & 100k, bisa sampai 1M) tersebar ke U user,
+  lalu mengukur throughput insert, latensi search top-k dengan filter
+  ``user_id`` (p50/p95) dan waktu buka ulang store (restart).
+• Qdrant diukur lewat ``qdrant-client``: server (``--qdrant-url``) atau mode
+  lokal in-process (``--qdrant-local``); dilewati bila paket tidak tersedia.
+• Vektor acak ternormalisasi — yang diukur mesin pencarinya, bukan embedder.
+
+Contoh:
+    python -m benchmarks.bench_vector_store --sizes 10000,100000 --users 50
+    python -m benchmarks.bench_vector_store --sizes 1000000 --dims 384 \\
+        --qdrant-url http://localhost:6333
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from mcp_client.utils.embedded_store import EmbeddedVectorStore
+
+BATCH = 5_000
+
+
+def _dataset(n: int, dims: int, users: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dims), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [str(uuid.UUID(int=i)) for i in range(n)]
+    payloads = [{"data": f"memori {i}", "user_id": f"user-{i % users}"} for i in range(n)]
+    return vectors, ids, payloads
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _measure_search(
+    search: Callable[[np.ndarray, str], Any], vectors: np.ndarray, users: int, queries: int
+) -> Dict[str, float]:
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(vectors), size=queries)
+    search(vectors[picks[0]], f"user-{picks[0] % users}")  # warm-up
+    samples = []
+    for i in picks:
+        tic = time.perf_counter()
+        search(vectors[i], f"user-{i % users}")
+        samples.append((time.perf_counter() - tic) * 1000)
+    return {
+        "search_p50_ms": round(statistics.median(samples), 3),
+        "search_p95_ms": round(_percentile(samples, 0.95), 3),
+    }
+
+
+# ---------------------------------------------------------------------------
+#  Embedded
+# ---------------------------------------------------------------------------
+def bench_embedded(vectors, ids, payloads, users: int, queries: int, k: int) -> Dict[str, Any]:
+    root = Path(tempfile.mkdtemp(prefix="bench_embedded_"))
+    try:
+        store = EmbeddedVectorStore(str(root), embedding_model_dims=vectors.shape[1])
+        tic = time.perf_counter()
+        for start in range(0, len(ids), BATCH):
+            end = start + BATCH
+            store.insert(vectors[start:end], payloads[start:end], ids[start:end])
+        insert_sec = time.perf_counter() - tic
+
+        # insert inkremental tunggal (jalur mem0.add sehari-hari)
+        tic = time.perf_counter()
+        for i in range(100):
+            store.insert([vectors[i].tolist()], [payloads[i]], [f"extra-{i}"])
+        append_ms = (time.perf_counter() - tic) * 10
+        store.close()
+
+        tic = time.perf_counter()
+        store = EmbeddedVectorStore(str(root), embedding_model_dims=vectors.shape[1])
+        reopen_sec = time.perf_counter() - tic
+
+        result = {
+            "insert_per_sec": round(len(ids) / insert_sec),
+            "append_one_ms": round(append_ms, 3),
+            "reopen_sec": round(reopen_sec, 3),
+        }
+        result.update(
+            _measure_search(
+                lambda q, user: store.search("", q, k, {"user_id": user}),
+                vectors,
+                users,
+                queries,
+            )
+        )
+        store.close()
+        return result
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+#  Qdrant
+# ---------------------------------------------------------------------------
+def bench_qdrant(
+    vectors, ids, payloads, users: int, queries: int, k: int, url: Optional[str], local: bool
+) -> Optional[Dict[str, Any]]:
+    try:
+        from qdrant_client import QdrantClient, models
+    except ImportError:
+        print("  [qdrant] qdrant-client tidak terpasang – dilewati")
+        return None
+    if not url and not local:
+        print("  [qdrant] tidak ada --qdrant-url / --qdrant-local – dilewati")
+        return None
+
+    root = Path(tempfile.mkdtemp(prefix="bench_qdrant_")) if local else None
+    collection = f"bench_{uuid.uuid4().hex[:8]}"
+
+    def _connect():
+        return QdrantClient(path=str(root)) if root else QdrantClient(url=url)
+
+    client = _connect()
+    try:
+        client.create_collection(
+            collection,
+            vectors_config=models.VectorParams(
+                size=vectors.shape[1], distance=models.Distance.COSINE
+            ),
+        )
+        if not root:
+            client.create_payload_index(collection, "user_id", models.PayloadSchemaType.KEYWORD)
+
+        tic = time.perf_counter()
+        for start in range(0, len(ids), BATCH):
+            end = start + BATCH
+            client.upsert(
+                collection,
+                points=models.Batch(
+                    ids=ids[start:end],
+                    vectors=vectors[start:end].tolist(),
+                    payloads=payloads[start:end],
+                ),
+                wait=True,
+            )
+        insert_sec = time.perf_counter() - tic
+
+        reopen_sec = None
+        if root:
+            client.close()
+            tic = time.perf_counter()
+            client = _connect()
+            reopen_sec = round(time.perf_counter() - tic, 3)
+
+        def _search(q: np.ndarray, user: str):
+            return client.query_points(
+                collection,
+                query=q.tolist(),
+                limit=k,
+                query_filter=models.Filter(
+                    must=[models.FieldCondition(key="user_id", match=models.MatchValue(value=user))]
+                ),
+            )
+
+        result: Dict[str, Any] = {
+            "insert_per_sec": round(len(ids) / insert_sec),
+            "reopen_sec": reopen_sec,
+        }
+        result.update(_measure_search(_search, vectors, users, queries))
+        return result
+    finally:
+        try:
+            client.delete_collection(collection)
+            client.close()
+        finally:
+            if root:
+                shutil.rmtree(root, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+#  CLI
+# ---------------------------------------------------------------------------
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="10000,100000", help="jumlah memori, koma")
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--qdrant-url", default=None)
+    parser.add_argument("--qdrant-local", action="store_true")
+    parser.add_argument("--json", dest="json_out", default=None, help="simpan hasil ke file")
+    args = parser.parse_args()
+
+    report = []
+    for n in (int(s) for s in args.sizes.split(",")):
+        print(f"\n== {n:,} memori · {args.dims} dim · {args.users} user ==")
+        vectors, ids, payloads = _dataset(n, args.dims, args.users)
+        row: Dict[str, Any] = {"memories": n, "dims": args.dims, "users": args.users}
+        row["embedded"] = bench_embedded(vectors, ids, payloads, args.users, args.queries, args.k)
+        print(f"  embedded : {row['embedded']}")
+        row["qdrant"] = bench_qdrant(
+            vectors, ids, payloads, args.users, args.queries, args.k,
+            args.qdrant_url, args.qdrant_local,
+        )
+        if row["qdrant"]:
+            print(f"  qdrant   : {row['qdrant']}")
+        report.append(row)
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nHasil disimpan ke {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
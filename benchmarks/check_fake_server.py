@@ -0,0 +1,107 @@
+"""
+Cek regresi kontrak tool terhadap stub MCP Server (FastMCP)
+===========================================================
+Menghubungkan MCPClient ke ``fake_mcp_server`` (stdio) dan memastikan
+``ToolResult.data`` berisi payload tool itu sendiri — bukan wrapper
+``{"result": "<teks JSON>"}`` yang ditambahkan FastMCP untuk return ``-> str``.
+Pipeline KAK & docgen lalu dijalankan sekali dan balasannya diperiksa.
+
+Contoh:
+    python -m benchmarks.check_fake_server
+Exit code 1 jika ada cek yang gagal.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# Settings mewajibkan OPENAI_API_KEY; stub tidak memeriksa nilainya
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from benchmarks.fake_openai import FakeOpenAIServer  # noqa: E402
+from benchmarks.inmemory_mem0 import InMemoryMem0  # noqa: E402
+
+FAKE_MCP_SERVER = str(ROOT / "benchmarks" / "fake_mcp_server.py")
+
+
+async def main_async() -> List[Tuple[str, bool, str]]:
+    server = FakeOpenAIServer(latency_ms=0, jitter_ms=0).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+
+    from mcp_client.client import MCPClient
+
+    client = MCPClient()
+    client.memory_mgr = InMemoryMem0(latency_ms=0)  # type: ignore[assignment]
+    if not await client.connect(FAKE_MCP_SERVER):
+        server.stop()
+        raise SystemExit("Gagal konek ke stub MCP server")
+
+    checks: List[Tuple[str, Callable[[], Any], Callable[[Any], bool]]] = [
+        (
+            "list_kak_files → list",
+            lambda: client.call_tool_result("list_kak_files", {}),
+            lambda r: isinstance(r.data, list) and bool(r.data),
+        ),
+        (
+            "read_project_markdown → {status, text}",
+            lambda: client.call_tool_result(
+                "read_project_markdown", {"project_name": "bank_sumsel_babel"}
+            ),
+            lambda r: r.status == "success" and isinstance(r.get("text"), str),
+        ),
+        (
+            "get_template_placeholders → {placeholders}",
+            lambda: client.call_tool_result("get_template_placeholders", {}),
+            lambda r: isinstance(r.get("placeholders"), list),
+        ),
+        (
+            "build_summary_tender_payload → {instruction, context}",
+            lambda: client.call_tool_result(
+                "build_summary_tender_payload",
+                {
+                    "prompt_instruction_name": "kak_analyzer",
+                    "kak_tor_md_name": "bank_sumsel_babel",
+                },
+            ),
+            lambda r: isinstance(r.get("instruction"), str)
+            and isinstance(r.get("context"), str),
+        ),
+    ]
+    results: List[Tuple[str, bool, str]] = []
+    try:
+        for label, call, ok in checks:
+            res = await call()
+            results.append((label, bool(ok(res)), repr(res.data)[:120]))
+
+        reply = await client._run_kak(
+            "check-kak", "Analisa proyek bank sumsel babel", "check"
+        )
+        results.append(
+            ("pipeline KAK → ringkasan JSON", reply.lstrip().startswith("{"), reply[:120])
+        )
+        reply = await client._run_docgen(
+            "check-doc", "Buatkan proposal proyek bank sumsel babel", "check"
+        )
+        results.append(
+            ("pipeline docgen → path .docx", reply.rstrip().endswith(".docx"), reply[-120:])
+        )
+    finally:
+        await client.cleanup()
+        server.stop()
+    return results
+
+
+def main() -> None:
+    results = asyncio.run(main_async())
+    for label, ok, detail in results:
+        print(f"[{'OK' if ok else 'GAGAL'}] {label}" + ("" if ok else f"\n       {detail}"))
+    if not all(ok for _, ok, _ in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
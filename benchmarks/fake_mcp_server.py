@@ -0,0 +1,141 @@
+"""
+Stub MCP Server (stdio) untuk benchmark offline
+===============================================
+Mengimplementasikan tool yang dipakai pipeline ProjectWise dengan data sintetis:
+``list_kak_files``, ``build_summary_tender_payload``, ``save_summary_markdown_tool``,
+``read_project_markdown``, ``get_template_placeholders``, ``generate_proposal_docx``.
+
+ENV opsional:
+• BENCH_MCP_CPU_MS   → kerja CPU sintetis per render docx (meniru python-docx)
+• BENCH_MCP_DOC_KB   → ukuran markdown proyek sintetis (KB)
+
+Dijalankan oleh MCPClient.connect("benchmarks/fake_mcp_server.py").
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from mcp.server.fastmcp import FastMCP
+
+CPU_MS = float(os.getenv("BENCH_MCP_CPU_MS", "20"))
+DOC_KB = int(os.getenv("BENCH_MCP_DOC_KB", "40"))
+
+PROJECTS = [
+    "bank_sumsel_babel",
+    "pemkot_palembang_sd_wan",
+    "bpjs_core_switch",
+    "pln_data_center",
+]
+PLACEHOLDERS = [
+    "nama_proyek",
+    "latar_belakang",
+    "ruang_lingkup",
+    "solusi_teknis",
+    "jadwal",
+    "sla",
+    "tim_proyek",
+]
+
+mcp = FastMCP("projectwise-bench")
+
+
+def _markdown(project: str) -> str:
+    """Dokumen KAK sintetis ±DOC_KB KB dengan beberapa heading."""
+    sections = []
+    i = 0
+    while sum(len(s) for s in sections) < DOC_KB * 1024:
+        i += 1
+        sections.append(
+            f"## Bagian {i}: {project}\n"
+            + (
+                f"Kebutuhan {i} untuk {project} meliputi perangkat jaringan, "
+                "SLA 99.5% dengan waktu respon 4 jam, dan pemeliharaan 12 bulan. "
+            )
+            * 8
+            + "\n"
+        )
+    return f"# KAK {project}\n\n" + "\n".join(sections)
+
+
+def _burn_cpu(ms: float) -> None:
+    """Kerja CPU sintetis (hashing) selama ±ms milidetik."""
+    deadline = time.perf_counter() + ms / 1000
+    data = b"projectwise"
+    while time.perf_counter() < deadline:
+        data = hashlib.sha256(data).digest()
+
+
+def _not_found(name: str) -> Optional[str]:
+    """Seperti server asli: nama proyek harus TANPA ekstensi."""
+    if name.endswith((".md", ".txt")) or name not in PROJECTS:
+        return json.dumps({"status": "error", "error": f"File '{name}' tidak ditemukan."})
+    return None
+
+
+@mcp.tool()
+def list_kak_files() -> str:
+    """Daftar nama file KAK/TOR yang tersedia (dengan ekstensi, seperti server asli)."""
+    return json.dumps([f"{p}.md" for p in PROJECTS])
+
+
+@mcp.tool()
+def build_summary_tender_payload(
+    prompt_instruction_name: str, kak_tor_md_name: str
+) -> str:
+    """Payload {instruction, context} untuk ringkasan KAK."""
+    error = _not_found(kak_tor_md_name)
+    if error:
+        return error
+    return json.dumps(
+        {
+            "instruction": f"Ringkas KAK sesuai template {prompt_instruction_name}.",
+            "context": _markdown(kak_tor_md_name),
+        }
+    )
+
+
+@mcp.tool()
+def save_summary_markdown_tool(summary: str, project: str) -> str:
+    """Simpan ringkasan (tidak benar-benar menulis file).
+
+    ``project`` → ``nama_pelanggan_nama_proyek``, maksimal 50 karakter.
+    """
+    if len(project) > 50:
+        return json.dumps({"status": "error", "error": "project maksimal 50 karakter"})
+    return json.dumps(
+        {"status": "success", "path": f"summaries/{project}.md", "bytes": len(summary)}
+    )
+
+
+@mcp.tool()
+def read_project_markdown(project_name: str) -> str:
+    """Isi markdown proyek."""
+    error = _not_found(project_name)
+    if error:
+        return error
+    return json.dumps(
+        {"status": "success", "file": f"{project_name}.md", "text": _markdown(project_name)}
+    )
+
+
+@mcp.tool()
+def get_template_placeholders() -> str:
+    """Placeholder template proposal."""
+    return json.dumps({"status": "success", "placeholders": PLACEHOLDERS})
+
+
+@mcp.tool()
+def generate_proposal_docx(
+    context: Dict[str, Any], override_template: Optional[str] = None
+) -> str:
+    """Render proposal docx (CPU-bound sintetis)."""
+    _burn_cpu(CPU_MS)
+    name = str(context.get("nama_proyek", "proposal")).replace(" ", "_")
+    return json.dumps({"status": "success", "path": f"output/{name}.docx"})
+
+
+if __name__ == "__main__":
+    mcp.run()
@@ -0,0 +1,64 @@
+"""
+Pengganti Mem0Manager in-memory untuk benchmark offline (tanpa Qdrant/OpenAI).
+
+Antarmuka sama dengan ``mcp_client.utils.mem0_utils.Mem0Manager`` yang dipakai
+MCPClient; pencarian memakai skor overlap token sederhana.
+"""
+
+import asyncio
+import re
+from collections import defaultdict
+from typing import Dict, List
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> set:
+    return set(_WORD_RE.findall(text.lower()))
+
+
+class InMemoryMem0:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self._store: Dict[str, List[str]] = defaultdict(list)
+
+    async def _sleep(self) -> None:
+        if self.latency_ms > 0:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    async def init(self) -> None:
+        return None
+
+    async def warm_up(self) -> None:
+        return None
+
+    async def open_session(self, user_id: str = "default") -> None:
+        return None
+
+    def start_consolidation(self, interval_sec: float) -> None:
+        return None
+
+    async def stop_consolidation(self) -> None:
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {"users": len(self._store)}
+
+    async def get_memories(
+        self, query: str, *, user_id: str = "default", limit: int = 5
+    ) -> List[str]:
+        await self._sleep()
+        q = _tokens(query)
+        scored = sorted(
+            ((len(q & _tokens(m)), m) for m in self._store[user_id]),
+            key=lambda x: x[0],
+            reverse=True,
+        )
+        return [m for score, m in scored[:limit] if score > 0]
+
+    async def add_conversation(
+        self, messages: List[Dict[str, str]], *, user_id: str = "default"
+    ) -> None:
+        await self._sleep()
+        for msg in messages:
+            self._store[user_id].append(f"{msg['role']}: {msg['content']}")
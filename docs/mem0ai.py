@@ -1,15 +1,19 @@
 import os
 import asyncio
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 from mem0 import AsyncMemory
 from typing import List, Dict
 
+from mcp_client.utils.http_pool import http_pool
+from mcp_client.utils.mem0_utils import share_http_pool
+
 load_dotenv()
 
-# OpenAI client setup
+# OpenAI client setup – async, memakai pool HTTP bersama (keep-alive, HTTP/2,
+# DNS cache). Jangan membuat OpenAI() sinkron baru per modul.
 openai_api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=openai_api_key)
+client = AsyncOpenAI(api_key=openai_api_key, http_client=http_pool.async_client())
 
 # Memory config
 config = {
@@ -44,7 +48,10 @@ config = {
 
 
 async def init_memory() -> AsyncMemory:
-    return await AsyncMemory.from_config(config)
+    memory = await AsyncMemory.from_config(config)
+    # LLM & embedder internal mem0 ikut memakai pool yang sama
+    share_http_pool(memory)
+    return memory
 
 
 async def chat_with_memory(
@@ -77,7 +84,7 @@ async def chat_with_memory(
     ]
 
     try:
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4o-mini",
             messages=messages,  # type: ignore
         )
@@ -105,6 +112,7 @@ async def main():
             break
         response = await chat_with_memory(user_input, memory)
         print("AI:", response)
+    await http_pool.aclose()
 
 
 if __name__ == "__main__":
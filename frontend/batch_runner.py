@@ -0,0 +1,191 @@
+# batch_runner.py
+"""
+Batch query runner untuk ProjectWise MCP-Client
+===============================================
+• Membaca query dari file JSONL secara streaming, satu objek per baris:
+      {"id": "q-001", "query": "Analisa proyek X", "user_id": "andi"}
+  (``id`` opsional → nomor baris; ``user_id`` opsional → "default").
+• Menjalankan MCPClient.process_query() secara konkuren dengan batas
+  ``--concurrency``.
+• Hasil ditulis ke JSONL segera setelah tiap query selesai, lengkap dengan
+  latensi, timing per tahap (span tracing) dan pemakaian token.
+• ``--resume`` melewati id yang sudah berstatus ``ok`` di file output,
+  sehingga batch yang terputus bisa dilanjutkan.
+
+Contoh (triage tender malam hari):
+    python -m frontend.batch_runner queries.jsonl -o results.jsonl \\
+        --concurrency 4 --resume
+------------------------------------------------------
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from mcp_client.client import MCPClient
+from mcp_client.settings import get_settings
+from mcp_client.utils import runtime
+from mcp_client.utils.tracing import tracer
+from mcp_client.utils.usage import usage_ledger
+
+
+settings = get_settings()
+
+
+def iter_queries(path: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Stream (id, record) dari file JSONL; baris kosong/invalid dilewati."""
+    with path.open(encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"[batch] Baris {lineno} bukan JSON valid: {e}")
+                continue
+            if not record.get("query"):
+                print(f"[batch] Baris {lineno} tanpa field 'query', dilewati.")
+                continue
+            yield str(record.get("id") or lineno), record
+
+
+def completed_ids(path: Path, retry_failed: bool = True) -> Set[str]:
+    """Id yang sudah selesai di file output (untuk --resume)."""
+    done: Set[str] = set()
+    if not path.exists():
+        return done
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # baris terpotong saat proses terhenti
+            if row.get("status") == "ok" or not retry_failed:
+                done.add(str(row.get("id")))
+    return done
+
+
+async def run_batch(
+    client: MCPClient,
+    input_path: Path,
+    output_path: Path,
+    concurrency: int = 4,
+    resume: bool = False,
+    retry_failed: bool = True,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Jalankan seluruh query di *input_path*; kembalikan ringkasan batch."""
+    skip = completed_ids(output_path, retry_failed) if resume else set()
+    sem = asyncio.Semaphore(concurrency)
+    write_lock = asyncio.Lock()
+    stats = {"ok": 0, "error": 0, "skipped": 0}
+    tasks: Set[asyncio.Task] = set()
+    tic = time.perf_counter()
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    out = output_path.open("a" if resume else "w", encoding="utf-8")
+
+    async def _one(qid: str, record: Dict[str, Any]) -> None:
+        trace_id = uuid.uuid4().hex[:8]
+        row: Dict[str, Any] = {
+            "id": qid,
+            "query": record["query"],
+            "user_id": record.get("user_id", "default"),
+            "trace_id": trace_id,
+        }
+        started = time.perf_counter()
+        try:
+            reply = await asyncio.wait_for(
+                client.process_query(
+                    record["query"], user_id=row["user_id"], trace_id=trace_id
+                ),
+                timeout=timeout,
+            )
+            row.update(status="ok", reply=reply)
+        except Exception as e:
+            row.update(status="error", error=f"{type(e).__name__}: {e}")
+        finally:
+            sem.release()
+        row["latency_sec"] = round(time.perf_counter() - started, 3)
+        row["stages"] = {
+            k: round(v, 3) for k, v in tracer.stage_timings(trace_id).items()
+        }
+        row["usage"] = usage_ledger.trace_usage(trace_id)
+        row["finished_at"] = datetime.now(timezone.utc).isoformat()
+        stats[row["status"]] += 1
+        async with write_lock:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+        print(
+            f"[batch] {row['id']} {row['status']} {row['latency_sec']:.2f}s "
+            f"(ok={stats['ok']} error={stats['error']})"
+        )
+
+    try:
+        for qid, record in iter_queries(input_path):
+            if qid in skip:
+                stats["skipped"] += 1
+                continue
+            # Backpressure: baca baris berikutnya hanya jika ada slot kosong
+            await sem.acquire()
+            task = asyncio.create_task(_one(qid, record))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        out.close()
+
+    elapsed = time.perf_counter() - tic
+    processed = stats["ok"] + stats["error"]
+    return {
+        **stats,
+        "elapsed_sec": round(elapsed, 2),
+        "throughput_qpm": round(processed / elapsed * 60, 2) if elapsed else 0.0,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    client = MCPClient()
+    if not await client.connect(args.server):
+        print("Gagal terhubung ke server. Periksa URL atau jalankan server dulu.")
+        return
+    try:
+        summary = await run_batch(
+            client,
+            Path(args.input),
+            Path(args.output),
+            concurrency=args.concurrency,
+            resume=args.resume,
+            retry_failed=not args.no_retry_failed,
+            timeout=args.timeout,
+        )
+        print(f"[batch] Selesai: {json.dumps(summary)}")
+    finally:
+        await client.cleanup()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Batch runner process_query dari JSONL")
+    ap.add_argument("input", help="file JSONL berisi query")
+    ap.add_argument("-o", "--output", default="batch_results.jsonl")
+    ap.add_argument("-c", "--concurrency", type=int, default=4)
+    ap.add_argument("--server", default=settings.mcp_server_url)
+    ap.add_argument("--resume", action="store_true", help="lanjutkan batch sebelumnya")
+    ap.add_argument(
+        "--no-retry-failed",
+        action="store_true",
+        help="saat --resume, jangan ulangi query yang sebelumnya error",
+    )
+    ap.add_argument("--timeout", type=float, default=None, help="batas detik per query")
+    runtime.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
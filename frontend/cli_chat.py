@@ -16,17 +16,44 @@ Sesi interaktif terminal untuk ProjectWise MCP-Client
 import asyncio
 import signal
 import sys
+import threading
 from datetime import datetime
 
 from mcp_client.client import MCPClient
-from mcp_client.settings import Settings
+from mcp_client.settings import get_settings
+from mcp_client.utils import runtime
 
 
-settings = Settings()  # type: ignore
+settings = get_settings()
 
 DEFAULT_SERVER = settings.mcp_server_url
 
 
+async def ainput(prompt: str) -> str:
+    """``input()`` di daemon thread: event loop (prefetch, monitor) tetap jalan
+    dan Ctrl-C tidak tertahan menunggu thread pembaca selesai."""
+    loop = asyncio.get_running_loop()
+    fut: asyncio.Future[str] = loop.create_future()
+
+    def _settle(value: str | None, error: BaseException | None) -> None:
+        if fut.done():
+            return
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(value or "")
+
+    def _read() -> None:
+        try:
+            value, error = input(prompt), None
+        except BaseException as e:  # EOFError/KeyboardInterrupt diteruskan ke REPL
+            value, error = None, e
+        loop.call_soon_threadsafe(_settle, value, error)
+
+    threading.Thread(target=_read, name="cli-input", daemon=True).start()
+    return await fut
+
+
 async def interactive():
     """REPL utama"""
     print("╔═ ProjectWise Terminal ───────────────────────────────═╗")
@@ -37,17 +64,19 @@ async def interactive():
     client = MCPClient()
 
     # 2. Minta URL server
-    url = input(f"URL MCP Server [{DEFAULT_SERVER}]: ").strip() or DEFAULT_SERVER
+    url = (await ainput(f"URL MCP Server [{DEFAULT_SERVER}]: ")).strip() or DEFAULT_SERVER
 
     # 3. Coba koneksi
     if not await client.connect(url):
         print("Gagal terhubung ke server. Periksa URL atau jalankan server dulu.")
         return
+    # prefetch memori user agar query pertama tidak menunggu vector store
+    await client.open_session()
 
     # 4. Masuk REPL
     try:
         while True:
-            query = input("\nAnda > ").strip()
+            query = (await ainput("\nAnda > ")).strip()
             if query.lower() in ["exit", "quit"]:
                 break
             if not query:
@@ -71,9 +100,14 @@ async def interactive():
 
 
 def main():
+    # Console UTF-8 (Windows) – dulu dilakukan saat import mcp_client.client
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, "reconfigure"):
+            stream.reconfigure(encoding="utf-8", errors="replace")
+
     # Agar Ctrl-C langsung mematikan event-loop Windows juga
     signal.signal(signal.SIGINT, lambda s, f: sys.exit(0))
-    asyncio.run(interactive())
+    runtime.run(interactive())
 
 
 if __name__ == "__main__":
@@ -1,45 +1,61 @@
-import sys
-import io
 import json
 
 
-from mcp_client.utils.safe_args import _safe_args, _truncate_by_tokens
-from mcp_client.settings import Settings
-from contextlib import AsyncExitStack
-from typing import Any, Dict, List, Optional
-from mcp_client.utils.intent_router import classify_intent
+from mcp_client.utils.safe_args import _safe_args, _truncate_by_tokens, warm_tokenizer
+from mcp_client.utils.prompt_loader import preload_prompts
+from mcp_client.utils.prompt_registry import prompt_registry
+from mcp_client.utils.runtime import loop_monitor
+from mcp_client.utils.summary_store import summary_store
+from mcp_client.utils.section_index import Retrieval, SectionIndex
+from mcp_client.utils.session_supervisor import SupervisedSession
+from mcp_client.settings import get_settings
+from contextlib import AsyncExitStack, contextmanager
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+from mcp_client.utils.intent_router import classify_intent, classify_intent_local
 from mcp_client.utils.slug_kak import infer_kak_md, best_match
 from mcp_client.utils.mem0_utils import Mem0Manager
+from mcp_client.utils.answer_cache import CacheLookup, SemanticAnswerCache
+from mcp_client.utils.stdio_pool import StdioServerPool
+from mcp_client.utils.cassette import (
+    Cassette,
+    CassetteLLM,
+    CassetteMemory,
+    CassetteSession,
+)
+from mcp_client.utils.cascade import model_cascade, valid_chat_turn
+from mcp_client.utils.loop_guard import LoopGuard, loop_stats
+from mcp_client.utils.degradation import Overloaded, current_policy, load_controller
+from mcp_client.utils.http_pool import http_pool
+from mcp_client.utils.tool_result import ToolResult
+from mcp_client.utils.tracing import tracer
+from mcp_client.utils.usage import set_scope, usage_ledger
 
 import traceback
-import nest_asyncio
-from dotenv import load_dotenv
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.sse import sse_client
 from mcp.client.stdio import stdio_client
-from openai import AsyncOpenAI
 
-from mcp_client.utils.pipeline_kak import run as run_kak_pipeline
-from mcp_client.utils.pipeline_docgen import run as run_docgen_pipeline
+from mcp_client.utils.pipeline_kak import SummaryNotSaved, run as run_kak_pipeline
+from mcp_client.utils.bulk_kak import run_bulk_kak
+from mcp_client.utils.pipeline_docgen import DocgenFailed, run as run_docgen_pipeline
 
 import asyncio
 import uuid
 import time
 
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", errors="replace")
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8", errors="replace")
+from mcp_client.utils.logger import logger, payload_repr, trace_id_var
 
-from mcp_client.utils.logger import logger  # noqa: E402
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 TOOL_TIMEOUT_SEC = 30
 PIPE_TIMEOUT_SEC = 180
+OTHER_PERSONA = prompt_registry.register(
+    "other_persona",
+    "Anda adalah “ProjectWise”, asisten virtual untuk tim Presales & PM.",
+).text
 
-
-nest_asyncio.apply()
-
-load_dotenv()
-
-settings = Settings()  # type: ignore
+settings = get_settings()
 
 
 class MCPClient:
@@ -52,57 +68,116 @@ class MCPClient:
             model: The OpenAI model to use.
         """
         # Initialize session and client object
-        self.session: Optional[ClientSession] = None
+        self.session: Optional[
+            Union[ClientSession, StdioServerPool, SupervisedSession, CassetteSession]
+        ] = None
         self.exit_stack = AsyncExitStack()
         self.stdio: Optional[Any] = None
         self.write: Optional[Any] = None
-        self.llm = AsyncOpenAI()
+        self._llm: Optional["AsyncOpenAI"] = None
         self.memory_mgr = Mem0Manager()
         self.model = model
         self.tools = []  # Populated by MCP Server available tools
         self.messages = []  # Chain of thoug store
         self.logger = logger
+        self.startup_timings: Dict[str, float] = {}
+        self.answer_cache: Optional[SemanticAnswerCache] = None
+        if settings.answer_cache_enabled:
+            self.answer_cache = SemanticAnswerCache(
+                threshold=settings.answer_cache_threshold,
+                max_entries=settings.answer_cache_max_entries,
+                version_ttl=settings.answer_cache_version_ttl_sec,
+            )
+        self.section_index: Optional[SectionIndex] = None
+        if settings.section_index_enabled:
+            self.section_index = SectionIndex(
+                top_k=settings.section_index_top_k,
+                max_chars=settings.section_index_max_chars,
+                refresh_sec=settings.section_index_refresh_sec,
+                use_embeddings=settings.section_index_embeddings,
+            )
+        if settings.llm_pricing:
+            usage_ledger.set_pricing(settings.llm_pricing)
+        self.cassette: Optional[Cassette] = None
+        if settings.cassette_mode:
+            self.use_cassette(
+                Cassette(
+                    settings.cassette_path,
+                    mode=settings.cassette_mode,
+                    latency=settings.cassette_latency,
+                )
+            )
+
+    @property
+    def llm(self) -> "AsyncOpenAI":
+        """Client OpenAI dibuat saat pertama dipakai (import openai cukup berat)."""
+        if self._llm is None:
+            self._llm = self._make_llm()  # type: ignore[assignment]
+        return self._llm
+
+    @staticmethod
+    def _make_llm() -> Any:
+        from openai import AsyncOpenAI
+
+        return load_controller.gate(AsyncOpenAI(http_client=http_pool.async_client()))
+
+    @llm.setter
+    def llm(self, value: "AsyncOpenAI") -> None:
+        self._llm = value
+
+    def use_cassette(self, cassette: Cassette) -> None:
+        """Rekam (record) atau putar ulang (replay) lalu lintas LLM, MCP & memori.
+
+        Panggil sebelum ``connect()``; saat replay tidak ada koneksi ke
+        OpenAI, MCP Server maupun mem0.
+        """
+        self.cassette = cassette
+        # client asli dibuat malas: replay tidak menyentuh OpenAI sama sekali
+        real = self._llm
+        self._llm = CassetteLLM(  # type: ignore[assignment]
+            (lambda: real) if real is not None else self._make_llm, cassette
+        )
+        self.memory_mgr = CassetteMemory(self.memory_mgr, cassette)  # type: ignore[assignment]
 
     # TODO: connect to the MCP Server
     async def connect(self, server_endpoint: str = settings.mcp_server_url):
         """Connect to an MCP server
 
+        Inisialisasi yang tidak bergantung pada transport (mem0, warm-up LLM,
+        tokenizer, prompt) berjalan paralel dengan handshake MCP. Durasi tiap
+        fase disimpan di ``self.startup_timings``.
+
         Args:
             str:
                 server_endpoint: url_endpoint to mcp server with sse transport. default 'http://127.0.0.1:5000/sse'
         """
+        self.startup_timings = {}
+        tic = time.perf_counter()
+
+        # Transport wajib dibuka di task ini (context anyio), sisanya di background
+        background = [asyncio.create_task(self._init_memory())]
+        if settings.startup_warmup and not self._replaying:
+            background.append(asyncio.create_task(self._warm_up()))
 
         try:
-            if server_endpoint.startswith("http"):
-                self.logger.info("Menghubungkan ke MCP Server via SSE...")
-                read_stream, write_stream = await self.exit_stack.enter_async_context(
-                    sse_client(server_endpoint)  # type: ignore
-                )
-                self.session = await self.exit_stack.enter_async_context(
-                    ClientSession(read_stream, write_stream)
-                )
-            else:
-                self.logger.info("Menghubungkan ke MCP Server via STDIN/STDOUT...")
-                server_params = StdioServerParameters(
-                    command="python",
-                    args=[server_endpoint],
-                )
-                # Connect to the server
-                stdio_transport = await self.exit_stack.enter_async_context(
-                    stdio_client(server_params)
-                )
-                self.stdio, self.write = stdio_transport
-                self.session = await self.exit_stack.enter_async_context(
-                    ClientSession(self.stdio, self.write)
-                )
+            with self._phase("transport"):
+                if self._replaying:
+                    # Replay: seluruh respons MCP berasal dari cassette
+                    self.logger.info("Replay cassette – tanpa koneksi MCP Server.")
+                    self.session = CassetteSession(self.cassette)
+                else:
+                    await self._open_transport(server_endpoint)
+                    if self.cassette is not None:
+                        self.session = CassetteSession(self.cassette, real=self.session)
 
             # Inisialisasi koneksi
-            await self.session.initialize()
-            await self.memory_mgr.init()
+            with self._phase("initialize"):
+                await self.session.initialize()
             self.logger.info("Berhasil terhubung ke MCP Server.")
 
             # List available tools
-            mcp_tools = await self.get_tools()
+            with self._phase("tools"):
+                mcp_tools = await self.get_tools()
             self.tools = [
                 {
                     "name": tool["function"]["name"],
@@ -112,34 +187,172 @@ class MCPClient:
                 for tool in mcp_tools
             ]
             self.logger.info(f"Tools tersedia: {[tool['name'] for tool in self.tools]}")
+
+            # Tunggu mem0 & warm-up; kegagalan mem0 tetap menggagalkan connect
+            await asyncio.gather(*background)
+            tracer.start_exporter(
+                settings.trace_export_interval_sec,
+                settings.trace_export_path,
+                settings.metrics_export_path,
+                settings.trace_export_endpoint,
+            )
+            if settings.usage_snapshot_path:
+                usage_ledger.start_snapshots(
+                    settings.usage_snapshot_interval_sec, settings.usage_snapshot_path
+                )
+            loop_monitor.start()
+            load_controller.start()
+            if settings.memory_consolidate_interval_sec > 0 and not self._replaying:
+                self.memory_mgr.start_consolidation(
+                    settings.memory_consolidate_interval_sec
+                )
+            self.startup_timings["total"] = time.perf_counter() - tic
+            self.logger.info(
+                "Startup timings: "
+                + ", ".join(f"{k}={v:.2f}s" for k, v in self.startup_timings.items())
+            )
             return True
 
         except Exception as e:
             self.logger.error(f"Gagal terhubung ke MCP Server: {e}")
             traceback.print_exc()
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
             # memanggil cleanup jika koneksi gagal di tengah jalan
             await self.cleanup()
             return False
 
-    # TODO: call a mcp tool
-    async def call_tool(self, name: str, args: Dict[str, Any]) -> str:
-        """_summary_
+    async def _open_transport(self, server_endpoint: str) -> None:
+        """Buka transport SSE / stdio (atau pool stdio) dan set ``self.session``."""
+        if server_endpoint.startswith("http"):
+            self.logger.info("Menghubungkan ke MCP Server via SSE...")
+            if settings.mcp_supervised:
+                self._supervise("sse", lambda: sse_client(server_endpoint))
+                return
+            read_stream, write_stream = await self.exit_stack.enter_async_context(
+                sse_client(server_endpoint)  # type: ignore
+            )
+            self.session = await self.exit_stack.enter_async_context(
+                ClientSession(read_stream, write_stream)
+            )
+        else:
+            self.logger.info("Menghubungkan ke MCP Server via STDIN/STDOUT...")
+            server_params = StdioServerParameters(
+                command="python",
+                args=[server_endpoint],
+            )
+            if settings.mcp_stdio_pool_size > 1:
+                # Beberapa proses server agar tool CPU-bound tersebar ke semua core
+                self.logger.info(
+                    f"Menjalankan pool {settings.mcp_stdio_pool_size} proses MCP Server..."
+                )
+                self.session = StdioServerPool(
+                    server_params,
+                    size=settings.mcp_stdio_pool_size,
+                    max_inflight=settings.mcp_stdio_max_inflight,
+                    pinned_tools=settings.mcp_stdio_pinned_tools,
+                )
+                self.exit_stack.push_async_callback(self.session.aclose)
+            elif settings.mcp_supervised:
+                self._supervise("stdio", lambda: stdio_client(server_params))
+            else:
+                # Connect to the server
+                stdio_transport = await self.exit_stack.enter_async_context(
+                    stdio_client(server_params)
+                )
+                self.stdio, self.write = stdio_transport
+                self.session = await self.exit_stack.enter_async_context(
+                    ClientSession(self.stdio, self.write)
+                )
 
-        Args:
-            name (str): _description_
-            args (Dict[str, Any]): _description_
+    def _supervise(self, label: str, open_transport) -> None:
+        """Sesi yang reconnect otomatis; katalog tool diperbarui setiap pulih."""
+
+        def _on_reconnect(tools_result: Any) -> None:
+            self.tools = [
+                {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "parameters": tool.inputSchema,
+                }
+                for tool in tools_result.tools
+            ]
+            self.logger.info(f"Katalog tool dimuat ulang: {len(self.tools)} tool")
+
+        self.session = SupervisedSession(
+            open_transport,
+            label,
+            idempotent_tools=settings.mcp_idempotent_tools,
+            retries=settings.mcp_call_retries,
+            backoff_base=settings.mcp_reconnect_base_sec,
+            backoff_max=settings.mcp_reconnect_max_sec,
+            wait_timeout=settings.mcp_reconnect_wait_sec,
+            on_reconnect=_on_reconnect,
+        )
+        self.exit_stack.push_async_callback(self.session.aclose)
+
+    @contextmanager
+    def _phase(self, name: str):
+        """Catat durasi satu fase startup ke ``self.startup_timings``."""
+        tic = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[name] = time.perf_counter() - tic
+
+    @property
+    def _replaying(self) -> bool:
+        return self.cassette is not None and not self.cassette.recording
+
+    async def _init_memory(self) -> None:
+        with self._phase("memory_init"):
+            await self.memory_mgr.init()
+        if settings.startup_warmup and not self._replaying:
+            with self._phase("warmup_embedder"):
+                await self.memory_mgr.warm_up()
+
+    async def _warm_up(self) -> None:
+        """Buka koneksi keep-alive ke LLM, muat tokenizer & prompt sebelum query pertama."""
+
+        async def _llm():
+            with self._phase("warmup_llm"):
+                await self.llm.models.retrieve(self.model)
+
+        async def _tokenizer():
+            with self._phase("warmup_tokenizer"):
+                await asyncio.to_thread(warm_tokenizer)
+
+        async def _prompts():
+            with self._phase("warmup_prompts"):
+                await asyncio.to_thread(preload_prompts)
+
+        results = await asyncio.gather(
+            _llm(), _tokenizer(), _prompts(), return_exceptions=True
+        )
+        for res in results:
+            if isinstance(res, Exception):
+                # Warm-up hanya optimasi; jangan gagalkan connect
+                self.logger.warning(f"Warm-up gagal: {res}")
+
+    async def call_tool_result(self, name: str, args: Dict[str, Any]) -> ToolResult:
+        """Panggil tool MCP; hasil (semua content part) di-parse sekali.
 
         Returns:
-            str: _description_
+            ToolResult: teks gabungan, JSON ter-parse & envelope status.
         """
         try:
-            # Call our tool
-            result = await self.session.call_tool(name, args)  # type: ignore
-            return f"{result.content[0].text}"  # type: ignore
+            with tracer.span(f"tool.{name}", tool=name):
+                result = await self.session.call_tool(name, args)  # type: ignore
+            return ToolResult.from_mcp(name, result)
         except Exception as e:
             self.logger.error(f"Gagal memanggil MCP tool: {e}")
             raise
 
+    async def call_tool(self, name: str, args: Dict[str, Any]) -> str:
+        """Seperti ``call_tool_result`` tetapi mengembalikan teks mentah."""
+        return (await self.call_tool_result(name, args)).text
+
     # TODO: get mcp tool list
     async def get_tools(self) -> List[Dict[str, Any]]:
         """Get available tools from the MCP server in OpenAI format.
@@ -169,19 +382,61 @@ class MCPClient:
             self.logger.error(f"Gagal mendapatkan MCP Tools: {e}")
             raise
 
+    async def open_session(self, user_id: str = "default") -> None:
+        """Prefetch memori user (dipanggil frontend saat sesi user dimulai)."""
+        if current_policy().skip_memory:
+            return
+        try:
+            await self.memory_mgr.open_session(user_id)
+        except Exception as e:
+            self.logger.warning(f"Prefetch memori {user_id} gagal: {e}")
+
     # TODO: proses query with chat memory mem0
     async def process_query(
-        self, query: str, user_id: str = "default", max_turns: int = 20
+        self,
+        query: str,
+        user_id: str = "default",
+        max_turns: int = 20,
+        trace_id: Optional[str] = None,
+    ) -> str:
+        trace_id = trace_id or uuid.uuid4().hex[:8]
+        trace_id_var.set(trace_id)
+        set_scope(user_id=user_id, intent="-")
+        with tracer.span("process_query", user_id=user_id) as sp:
+            try:
+                async with load_controller.admit() as policy:
+                    if policy.level:
+                        sp.set(degradation=policy.level)
+                    return await self._process_query(
+                        trace_id, query, user_id, max_turns
+                    )
+            except Overloaded as e:
+                self.logger.warning(f"[{trace_id}] Request ditolak (admission): {e}")
+                return "Maaf, sistem sedang sibuk. Silakan coba beberapa saat lagi."
+
+    async def _process_query(
+        self, trace_id: str, query: str, user_id: str, max_turns: int
     ) -> str:
-        trace_id = uuid.uuid4().hex[:8]
         tic = time.perf_counter()
         self.logger.info(f"[{trace_id}] > Memproses query: {query!r}")
+        policy = current_policy()
+        if policy.level:
+            max_turns = policy.turns(max_turns)
+            self.logger.info(
+                f"[{trace_id}] Mode degradasi level {policy.level} (max_turns={max_turns})"
+            )
 
         # ---------- 1. Intent Classification (dengan retry) -------------------- #
         intent = "other"
-        for attempt in range(3):
+        if policy.local_intent:
+            with tracer.span("classify_intent.local"):
+                route = classify_intent_local(query)
+            intent = route.intent if route.confidence_score >= 0.7 else "other"
+            self.logger.info(f"[{trace_id}] Intent lokal: {intent}")
+        for attempt in range(0 if policy.local_intent else 3):
             try:
-                route = await classify_intent(self.llm, query, self.model)
+                with tracer.span("classify_intent", attempt=attempt + 1):
+                    route = await classify_intent(self.llm, query, self.model)
                 intent = route.intent if route.confidence_score >= 0.7 else "other"
                 self.logger.info(
                     f"[{trace_id}] Intent: {intent} (conf={route.confidence_score:.2f})"
@@ -194,13 +449,15 @@ class MCPClient:
                 if attempt == 2:
                     self.logger.warning(f"[{trace_id}] Fallback ke intent 'other'")
                 await asyncio.sleep(2**attempt)
+        tracer.annotate(intent=intent)
+        set_scope(intent=intent)
 
         # ---------- 2. Jalankan pipeline khusus -------------------------------- #
         try:
             if intent == "kak_analyzer":
-                return await self._run_kak(trace_id, query, user_id, max_turns)
+                return await self._run_kak(trace_id, query, user_id)
             elif intent == "generate_document":
-                return await self._run_docgen(trace_id, query, user_id, max_turns)
+                return await self._run_docgen(trace_id, query, user_id)
             else:
                 return await self._run_other(trace_id, query, user_id, max_turns)
 
@@ -209,94 +466,108 @@ class MCPClient:
             self.logger.info(f"[{trace_id}] -- Total latency: {toc:0.2f}s")
 
     # ======================= HELPER – PIPELINE SPESIFIK ========================= #
-    async def _run_kak(self, trace_id: str, query: str, user_id: str, max_turns: int):
+    async def _run_kak(self, trace_id: str, query: str, user_id: str):
         slug = infer_kak_md(query)
 
         # list_kak_files bisa gagal; aman-kan
         try:
-            files_json = await self.call_tool("list_kak_files", {})
-            all_files = json.loads(files_json)
+            all_files = (await self.call_tool_result("list_kak_files", {})).data or []
         except Exception:
             all_files = []
         kak_md = best_match(all_files, slug) or slug  # type: ignore
 
         try:
-            result = await asyncio.wait_for(
-                run_kak_pipeline(
-                    client=self,
-                    user_query=query,
-                    prompt_instruction_name="kak_analyzer",
-                    kak_tor_md_name=kak_md,  # type: ignore
-                    max_turns=max_turns,
-                ),
-                timeout=PIPE_TIMEOUT_SEC,
-            )
+            with tracer.span("pipeline.kak", kak_md=kak_md or ""):
+                result = await asyncio.wait_for(
+                    run_kak_pipeline(
+                        client=self,
+                        user_query=query,
+                        prompt_instruction_name="kak_analyzer",
+                        kak_tor_md_name=kak_md,  # type: ignore
+                        trace_id=trace_id,
+                    ),
+                    timeout=PIPE_TIMEOUT_SEC,
+                )
             reply = result
         except asyncio.TimeoutError:
             self.logger.error(f"[{trace_id}] run_kak_pipeline TIMEOUT")
             reply = "Maaf, analisis KAK memerlukan waktu lebih lama dari batas sistem."
+        except SummaryNotSaved as e:
+            self.logger.error(f"[{trace_id}] {e}")
+            reply = f"{e.summary}\n\nCatatan: {e} Silakan ulangi analisis untuk menyimpannya."
         except Exception as e:
             self.logger.error(f"[{trace_id}] run_kak_pipeline error: {e}")
             reply = f"Terjadi kesalahan saat analisis KAK: {e}"
 
         # commit memori
-        await self.memory_mgr.add_conversation(
-            [
-                {"role": "user", "content": query},
-                {"role": "assistant", "content": reply},
-            ],
-            user_id=user_id,
-        )
+        await self._commit_memory(query, reply, user_id)
         return reply
 
-    async def _run_docgen(
-        self, trace_id: str, query: str, user_id: str, max_turns: int
-    ):
+    async def _run_docgen(self, trace_id: str, query: str, user_id: str):
         slug = infer_kak_md(query)
 
         try:
-            files_json = await self.call_tool("list_kak_files", {})
-            all_files = json.loads(files_json)
+            all_files = (await self.call_tool_result("list_kak_files", {})).data or []
         except Exception:
             all_files = []
         kak_md = best_match(all_files, slug) or slug  # type: ignore
 
         try:
-            result = await asyncio.wait_for(
-                run_docgen_pipeline(
-                    client=self,
-                    project_name=kak_md,  # type: ignore
-                    user_query=query,
-                    override_template=None,
-                    max_turns=max_turns,
-                ),
-                timeout=PIPE_TIMEOUT_SEC,
-            )
+            with tracer.span("pipeline.docgen", project=kak_md or ""):
+                result = await asyncio.wait_for(
+                    run_docgen_pipeline(
+                        client=self,
+                        project_name=kak_md,  # type: ignore
+                        user_query=query,
+                        override_template=None,
+                        trace_id=trace_id,
+                    ),
+                    timeout=PIPE_TIMEOUT_SEC,
+                )
             reply = f"Proposal berhasil dibuat untuk proyek “{kak_md}”.\n\nLokasi file: {result}"
         except asyncio.TimeoutError:
             self.logger.error(f"[{trace_id}] run_docgen_pipeline TIMEOUT")
             reply = "Maaf, pembuatan proposal melebihi batas waktu."
+        except DocgenFailed as e:
+            self.logger.warning(f"[{trace_id}] run_docgen_pipeline gagal: {e}")
+            reply = f"Proposal untuk proyek “{kak_md}” belum dapat dibuat: {e}"
         except Exception as e:
             self.logger.error(f"[{trace_id}] run_docgen_pipeline error: {e}")
             reply = f"Terjadi kesalahan saat generate proposal: {e}"
 
-        await self.memory_mgr.add_conversation(
-            [
-                {"role": "user", "content": query},
-                {"role": "assistant", "content": reply},
-            ],
-            user_id=user_id,
-        )
+        await self._commit_memory(query, reply, user_id)
         return reply
 
     # ----------------- Fallback chat dengan Tool-Calling ------------------------ #
     async def _run_other(self, trace_id: str, query: str, user_id: str, max_turns: int):
-        # ambil memori relevan
-        try:
-            memories = await self.memory_mgr.get_memories(query, limit=5)
-        except Exception as e:
-            self.logger.error(f"[{trace_id}] mem0 search error: {e}")
-            memories = []
+        tic = time.perf_counter()
+        cached = CacheLookup()
+        if self.answer_cache is not None and not self._replaying:
+            with tracer.span("answer_cache.lookup") as sp:
+                cached = await self.answer_cache.lookup(self, query)
+                sp.set(hit=cached.answer is not None, similarity=round(cached.similarity, 4))
+            if cached.answer is not None:
+                self.logger.info(
+                    f"[{trace_id}] Answer cache HIT {cached.project} "
+                    f"(sim={cached.similarity:.3f})"
+                )
+                await self._commit_memory(query, cached.answer, user_id)
+                return cached.answer
+
+        # ambil memori relevan (dilewati saat mode degradasi). Jawaban yang
+        # akan masuk answer cache dibagi ke semua user → dibuat TANPA memori
+        # user agar isi memori pribadi tidak bocor ke user lain.
+        policy = current_policy()
+        memories = []
+        shared_answer = self.answer_cache is not None and cached.cacheable
+        if not policy.skip_memory and not shared_answer:
+            try:
+                with tracer.span("mem0.search"):
+                    memories = await self.memory_mgr.get_memories(
+                        query, user_id=user_id, limit=5
+                    )
+            except Exception as e:
+                self.logger.error(f"[{trace_id}] mem0 search error: {e}")
 
         mem_block = (
             "\n".join(f"- {_truncate_by_tokens(m)}" for m in memories) or "[Tidak ada]"
@@ -309,31 +580,72 @@ class MCPClient:
                 "Gunakan memori di atas jika membantu."
             ),
         }
+        # persona statis lebih dulu agar prefix prompt stabil (prefix cache)
         messages = [
+            {"role": "system", "content": OTHER_PERSONA},
             system_mem,
-            {
-                "role": "system",
-                "content": "Anda adalah “ProjectWise”, asisten virtual untuk tim Presales & PM.",
-            },
             {"role": "user", "content": query},
         ]
         tools = await self.get_tools()
+
+        # section relevan dari index lokal → dokumen utuh tidak perlu ditarik
+        retrieval = Retrieval()
+        if self.section_index is not None:
+            with tracer.span("section_index.retrieve") as sp:
+                retrieval = await self.section_index.retrieve(
+                    self, query, project=cached.project
+                )
+                sp.set(
+                    project=retrieval.project or "",
+                    sections=len(retrieval.sections),
+                    chars=retrieval.chars,
+                )
+        if retrieval.sections:
+            messages.insert(2, {"role": "system", "content": retrieval.render()})
+            tools = [t for t in tools if t["function"]["name"] != "read_project_markdown"]
+            self.logger.info(
+                f"[{trace_id}] Section index {retrieval.project}: "
+                f"{len(retrieval.sections)} section, {retrieval.chars} dari "
+                f"{retrieval.total_chars} karakter dokumen"
+            )
+        self.logger.info(
+            f"[{trace_id}] Prompt awal ±{sum(len(m['content']) for m in messages)} karakter"
+        )
         final_answer = None
+        tier = 0  # sekali eskalasi, turn berikutnya tetap di model besar
+        guard = LoopGuard("other")
 
         try:
             for turn in range(max_turns):
                 self.logger.info(f"[{trace_id}] - Turn {turn + 1}/{max_turns}")
-                response = await self.llm.chat.completions.create(
-                    model=self.model,
-                    messages=messages,  # type: ignore
-                    tools=tools,  # type: ignore
-                    tool_choice="auto",
+
+                async def _turn(model: str):
+                    with tracer.span(
+                        "llm.turn", call_site="other", turn=turn + 1, model=model
+                    ) as sp:
+                        response = await self.llm.chat.completions.create(
+                            model=model,
+                            messages=messages,  # type: ignore
+                            tools=tools,  # type: ignore
+                            tool_choice=guard.tool_choice or "auto",
+                        )
+                    usage_ledger.record(
+                        "other", response, model=model, latency=sp.duration
+                    )
+                    return response
+
+                response, tier = await model_cascade.run(
+                    "other", self.model, _turn, valid_chat_turn, start_tier=tier
                 )
                 assistant_msg = response.choices[0].message
                 messages.append(assistant_msg.model_dump())
 
                 if not assistant_msg.tool_calls:  # ▶ Jawaban final
                     final_answer = assistant_msg.content or "Tidak ada jawaban."
+                    if shared_answer and not memories and assistant_msg.content:
+                        self.answer_cache.store(
+                            cached, query, final_answer, time.perf_counter() - tic
+                        )
                     break
 
                 # ─ Jalankan setiap tool call (parallel → gather) ─
@@ -342,10 +654,16 @@ class MCPClient:
                     try:
                         args = json.loads(tc.function.arguments)
                         self.logger.info(
-                            f"[{trace_id}]  · tool '{fname}' args={_safe_args(args)}"
+                            f"[{trace_id}]  · tool '{fname}'",
+                            extra={"payload": payload_repr(_safe_args(args))},
                         )
-                        return await asyncio.wait_for(
-                            self.call_tool(fname, args), timeout=TOOL_TIMEOUT_SEC
+                        return await guard.call(
+                            fname,
+                            args,
+                            lambda: asyncio.wait_for(
+                                self.call_tool_result(fname, args),
+                                timeout=TOOL_TIMEOUT_SEC,
+                            ),
                         )
                     except asyncio.TimeoutError:
                         self.logger.error(f"[{trace_id}] tool {fname} TIMEOUT")
@@ -364,9 +682,10 @@ class MCPClient:
                             "role": "tool",
                             "tool_call_id": tc.id,
                             "name": tc.function.name,
-                            "content": out,
+                            "content": policy.cap_tool_output(str(out)),
                         }
                     )
+                guard.end_turn(turn, max_turns)
 
             if not final_answer:
                 self.logger.warning(f"[{trace_id}] Batas {max_turns} turn tercapai.")
@@ -377,15 +696,73 @@ class MCPClient:
         finally:
             answer_to_save = final_answer or "Maaf, terjadi kegagalan internal."
             # commit memori apa pun hasilnya
+            await self._commit_memory(query, answer_to_save, user_id)
+
+        return answer_to_save
+
+    async def _commit_memory(self, query: str, reply: str, user_id: str) -> None:
+        if current_policy().skip_memory:
+            return
+        with tracer.span("mem0.add_conversation"):
             await self.memory_mgr.add_conversation(
                 [
                     {"role": "user", "content": query},
-                    {"role": "assistant", "content": answer_to_save},
+                    {"role": "assistant", "content": reply},
                 ],
                 user_id=user_id,
             )
 
-        return answer_to_save
+    async def analyze_all_kak(
+        self,
+        name_filter: Optional[str] = None,
+        workers: int = 4,
+        force: bool = False,
+        progress: Optional[Any] = None,
+    ) -> Dict[str, Any]:
+        """Analisis massal seluruh KAK/TOR (lihat ``utils.bulk_kak``).
+
+        Tanpa klasifikasi intent, fuzzy match maupun penulisan memori per
+        dokumen; dokumen yang tidak berubah sejak analisis terakhir dilewati.
+        """
+        return await run_bulk_kak(
+            self,
+            name_filter=name_filter,
+            workers=workers,
+            force=force,
+            progress=progress,
+        )
+
+    def usage_report(self, trace_id: Optional[str] = None) -> Dict[str, Any]:
+        """Total token & biaya: seluruh proses, atau satu trace bila diberikan."""
+        if trace_id is not None:
+            return usage_ledger.trace_usage(trace_id)
+        return {
+            **usage_ledger.snapshot(),
+            "cascade": model_cascade.stats(),
+            "loop_guard": loop_stats.snapshot(),
+            "load": load_controller.stats(),
+            "http": http_pool.snapshot(),
+            "memory": self.memory_mgr.stats(),
+            "prompts": prompt_registry.stats(),
+            "kak_summaries": summary_store.stats(),
+            "section_index": self.section_index.stats() if self.section_index else None,
+            "mcp_session": self._session_stats(),
+            "event_loop": loop_monitor.stats(),
+        }
+
+    def _session_stats(self) -> Optional[Dict[str, Any]]:
+        """Reconnect & downtime sesi MCP (hanya untuk sesi yang diawasi)."""
+        session = self.session
+        if isinstance(session, CassetteSession):
+            session = session.real
+        return session.stats() if isinstance(session, SupervisedSession) else None
+
+    async def _flush_tracing(self) -> None:
+        await tracer.flush(
+            settings.trace_export_path,
+            settings.metrics_export_path,
+            settings.trace_export_endpoint,
+        )
 
     # TODO: cleanup
     async def cleanup(self):
@@ -397,7 +774,23 @@ class MCPClient:
         :raises Exception: Re-raises any exception that occurs during the cleanup process.
         """
         try:
+            await tracer.stop_exporter()
+            await self._flush_tracing()
+            await usage_ledger.stop_snapshots()
+            await self.memory_mgr.stop_consolidation()
+            await loop_monitor.stop()
+            await load_controller.stop()
+            if settings.usage_snapshot_path:
+                await asyncio.to_thread(
+                    usage_ledger.write_snapshot, settings.usage_snapshot_path
+                )
+            if self.cassette is not None and self.cassette.recording:
+                await asyncio.to_thread(self.cassette.save)
+            if self.answer_cache is not None:
+                self.logger.info(f"Answer cache: {self.answer_cache.stats()}")
             await self.exit_stack.aclose()
+            self.logger.info(f"HTTP pool: {http_pool.snapshot()}")
+            await http_pool.aclose()
             self.logger.info("Terputus dari MCP Server.")
 
         except Exception as e:
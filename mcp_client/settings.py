@@ -1,5 +1,8 @@
+from dotenv import load_dotenv
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Dict, List, Optional
 
 
 # .env absolute path
@@ -13,6 +16,113 @@ class Settings(BaseSettings):
     # MCP Server Endpoint
     mcp_server_url: str = "http://localhost:5000/sse"
 
+    # Pool proses MCP Server untuk transport stdio
+    mcp_stdio_pool_size: int = 1
+    mcp_stdio_max_inflight: int = 4
+    mcp_stdio_pinned_tools: Dict[str, int] = {}
+    # Sesi SSE/stdio tunggal yang diawasi: reconnect otomatis + retry tool idempotent
+    mcp_supervised: bool = True
+    mcp_reconnect_base_sec: float = 0.5
+    mcp_reconnect_max_sec: float = 15.0
+    mcp_reconnect_wait_sec: float = 30.0  # lama call_tool menunggu sesi pulih
+    mcp_call_retries: int = 2
+    mcp_idempotent_tools: List[str] = [
+        "list_kak_files",
+        "read_project_markdown",
+        "get_template_placeholders",
+        "build_summary_tender_payload",
+    ]
+
+    # Warm-up koneksi LLM/embedder, tokenizer & prompt saat connect()
+    startup_warmup: bool = True
+
+    # Tracing span & metrik latensi (OTLP JSON + teks Prometheus)
+    trace_export_path: Optional[str] = "logs/traces.jsonl"
+    metrics_export_path: Optional[str] = "logs/metrics.prom"
+    trace_export_endpoint: Optional[str] = None
+    trace_export_interval_sec: float = 15.0
+
+    # Akuntansi token & biaya (snapshot JSONL berkala)
+    usage_snapshot_path: Optional[str] = "logs/usage_snapshots.jsonl"
+    usage_snapshot_interval_sec: float = 60.0
+    # {"model-prefix": [input, cached_input, output]} USD per 1 juta token
+    llm_pricing: Dict[str, List[float]] = {}
+
+    # Cassette record/replay lalu lintas LLM & MCP (None = nonaktif)
+    cassette_mode: Optional[str] = None  # record | replay
+    cassette_path: str = "logs/cassette.jsonl.gz"
+    cassette_latency: str = "original"  # original | zero
+
+    # Loop guard tool-calling: trip setelah tool identik gagal N kali
+    loop_guard_max_failures: int = 2
+
+    # Admission & degradasi adaptif saat beban tinggi
+    degrade_enabled: bool = True
+    degrade_inflight_high: int = 16
+    degrade_llm_wait_high_sec: float = 2.0
+    degrade_p95_high_sec: float = 60.0
+    degrade_latency_window_sec: float = 300.0  # umur maksimum sampel latensi p95
+    degrade_cooldown_sec: float = 30.0
+    degrade_max_inflight: int = 0  # batas admission; 0 = tanpa batas
+    llm_max_concurrency: int = 16
+
+    # Pool HTTP bersama (OpenAI chat, answer cache & mem0)
+    http_max_connections: int = 100
+    http_max_keepalive: int = 20
+    http_keepalive_expiry_sec: float = 60.0
+    http2: bool = True
+    http_dns_ttl_sec: float = 300.0
+    http_timeout_sec: float = 600.0
+
+    # Backend vektor mem0: "qdrant" (server) atau "embedded" (NumPy in-process)
+    memory_backend: str = "qdrant"
+    embedded_store_path: str = "mcp_client/embedded_store"
+
+    # Partisi memori per user: prefetch saat sesi dibuka + rerank lokal
+    memory_prefetch_size: int = 200
+    memory_prefetch_scan: int = 1_000
+    memory_local_min_score: float = 0.5
+    memory_session_ttl_sec: float = 1_800.0
+    memory_session_max_users: int = 256
+
+    # Kebersihan memori: filter tulis + konsolidasi berkala (0 = nonaktif)
+    memory_dedupe_threshold: float = 0.85
+    memory_write_dedupe_window: int = 20
+    memory_ttl_days: float = 180.0
+    memory_consolidate_interval_sec: float = 3_600.0
+    memory_consolidate_probes: int = 3
+
+    # Runtime event loop: uvloop opsional + monitor lag loop (0 = nonaktif)
+    use_uvloop: bool = False
+    loop_lag_interval_sec: float = 0.25
+    loop_lag_warn_ms: float = 100.0
+
+    # Eksekutor DAG pipeline KAK/docgen: batas langkah paralel & timeout per langkah
+    pipeline_max_parallel_steps: int = 32
+    pipeline_tool_timeout_sec: float = 30.0
+    pipeline_llm_timeout_sec: float = 120.0
+
+    # Analisis KAK massal: fingerprint dokumen yang sudah diringkas
+    bulk_kak_state_path: str = "logs/bulk_kak_state.json"
+
+    # Docgen memakai ulang ringkasan KAK (0 hari = nonaktif, selalu baca markdown)
+    kak_summary_store_path: str = "logs/kak_summaries.json"
+    docgen_summary_max_age_days: float = 30.0
+    docgen_fallback_max_chars: int = 8_000
+
+    # Cache jawaban semantik untuk Q&A proyek (_run_other)
+    answer_cache_enabled: bool = True
+    answer_cache_threshold: float = 0.92
+    answer_cache_max_entries: int = 256
+    answer_cache_version_ttl_sec: float = 300.0
+
+    # Index section markdown proyek (BM25) untuk retrieval Q&A di _run_other
+    section_index_enabled: bool = True
+    section_index_top_k: int = 4
+    section_index_max_chars: int = 6_000
+    section_index_refresh_sec: float = 300.0
+    section_index_embeddings: bool = False  # gabung BM25 + embedding (RRF)
+
     # Kunci API dan host model
     openai_api_key: str
     ollama_host: str = "http://localhost:11434"
@@ -21,6 +131,24 @@ class Settings(BaseSettings):
     llm_model: str = "gpt-4o-mini"
     embed_model: str = "text-embedding-3-small"
     llm_temperature: float = 0.0
+    # Cascade: model cepat dicoba dulu pada call-site ini, eskalasi ke
+    # llm_model jika validasi gagal / confidence rendah (None = nonaktif)
+    llm_fast_model: Optional[str] = None
+    model_cascade: List[str] = ["router", "other", "docgen"]
+    cascade_min_confidence: float = 0.7
 
     # Direktori penyimpanan dan dokumen
     prompt_base_path: str = "mcp_client/prompts"
+    # Interval minimum cek mtime file prompt (hot reload)
+    prompt_reload_interval_sec: float = 2.0
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Instance Settings tunggal per proses; .env hanya dibaca sekali.
+
+    ``load_dotenv`` tetap dipanggil karena SDK OpenAI & konfigurasi mem0
+    membaca kunci langsung dari environment.
+    """
+    load_dotenv()
+    return Settings()  # type: ignore
@@ -0,0 +1,195 @@
+# utils/answer_cache.py
+from __future__ import annotations
+import asyncio
+import hashlib
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.logger import logger
+from mcp_client.utils.slug_kak import best_match, infer_kak_md, project_stem
+from mcp_client.utils.tracing import tracer
+from mcp_client.utils.usage import usage_ledger
+
+settings = get_settings()
+
+
+def _normalize(vec: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return [x / norm for x in vec]
+
+
+def _dot(a: List[float], b: List[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+@dataclass
+class _Entry:
+    query: str
+    embedding: List[float]  # sudah dinormalisasi → cosine = dot product
+    answer: str
+    latency_sec: float
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+@dataclass
+class CacheLookup:
+    """Hasil lookup; dipakai lagi oleh ``store`` saat cache miss."""
+
+    project: Optional[str] = None
+    version: Optional[str] = None
+    embedding: Optional[List[float]] = None
+    answer: Optional[str] = None
+    similarity: float = 0.0
+
+    @property
+    def cacheable(self) -> bool:
+        return bool(self.project and self.version and self.embedding)
+
+
+class SemanticAnswerCache:
+    """Cache jawaban Q&A proyek berbasis kemiripan embedding query.
+
+    Entri di-scope per proyek (slug dari ``list_kak_files``) dan per versi
+    dokumen (hash ``read_project_markdown``). Versi di-memo selama
+    ``version_ttl`` detik; jika dokumen berubah, entri versi lama dibuang.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries: int = 256,
+        version_ttl: float = 300.0,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.version_ttl = version_ttl
+        # (project, version) → entri
+        self._entries: Dict[Tuple[str, str], List[_Entry]] = {}
+        self._versions: Dict[str, Tuple[float, str]] = {}
+        self._catalog: Tuple[float, List[str]] = (0.0, [])
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.bypass = 0
+        self.latency_saved_sec = 0.0
+        tracer.register_collector(self.render_prometheus)
+
+    # ------------- scope & versi dokumen -----------------------------
+    async def _project_for(self, client, query: str) -> Optional[str]:
+        slug = infer_kak_md(query)
+        if not slug:
+            return None
+        fetched_at, catalog = self._catalog
+        if time.monotonic() - fetched_at > self.version_ttl:
+            catalog = (await client.call_tool_result("list_kak_files", {})).data or []
+            self._catalog = (time.monotonic(), catalog)
+        match = best_match(catalog, slug)
+        return project_stem(match) if match else None
+
+    async def _version_of(self, client, project: str) -> str:
+        cached = self._versions.get(project)
+        if cached and time.monotonic() - cached[0] <= self.version_ttl:
+            return cached[1]
+        result = await client.call_tool_result(
+            "read_project_markdown", {"project_name": project}
+        )
+        text = result.get("text")
+        if result.status != "success" or not isinstance(text, str):
+            # dokumen tidak terbaca → bukan versi; lookup dilewati (bypass)
+            raise LookupError(
+                f"Dokumen {project} tidak terbaca: {result.error or result.text[:100]}"
+            )
+        version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        self._versions[project] = (time.monotonic(), version)
+        if cached and cached[1] != version:
+            with self._lock:
+                dropped = self._entries.pop((project, cached[1]), [])
+            logger.info(
+                f"[answer_cache] Dokumen {project} berubah, {len(dropped)} entri dibuang"
+            )
+        return version
+
+    async def _embed(self, client, query: str) -> List[float]:
+        with tracer.span("answer_cache.embed") as sp:
+            resp = await client.llm.embeddings.create(
+                model=settings.embed_model, input=query
+            )
+        usage_ledger.record(
+            "answer_cache.embed", resp, model=settings.embed_model, latency=sp.duration
+        )
+        return _normalize(list(resp.data[0].embedding))
+
+    # ------------- API -----------------------------------------------
+    async def lookup(self, client, query: str) -> CacheLookup:
+        """Cari jawaban tersimpan yang mirip; kegagalan apa pun → miss."""
+        result = CacheLookup()
+        try:
+            result.project = await self._project_for(client, query)
+            if not result.project:
+                self.bypass += 1
+                return result
+            result.version, result.embedding = await asyncio.gather(
+                self._version_of(client, result.project), self._embed(client, query)
+            )
+        except Exception as e:
+            logger.warning(f"[answer_cache] Lookup dilewati: {e}")
+            self.bypass += 1
+            return CacheLookup()
+
+        with self._lock:
+            self.lookups += 1
+            best: Optional[_Entry] = None
+            for entry in self._entries.get((result.project, result.version), []):
+                sim = _dot(result.embedding, entry.embedding)
+                if sim > result.similarity:
+                    result.similarity, best = sim, entry
+            if best is not None and result.similarity >= self.threshold:
+                best.hits += 1
+                self.hits += 1
+                self.latency_saved_sec += best.latency_sec
+                result.answer = best.answer
+        return result
+
+    def store(self, lookup: CacheLookup, query: str, answer: str, latency_sec: float) -> None:
+        if not lookup.cacheable:
+            return
+        entry = _Entry(query, lookup.embedding, answer, latency_sec)  # type: ignore[arg-type]
+        with self._lock:
+            bucket = self._entries.setdefault((lookup.project, lookup.version), [])  # type: ignore[arg-type]
+            bucket.append(entry)
+            if len(bucket) > self.max_entries:
+                # buang entri paling jarang terpakai (lalu paling lama)
+                bucket.sort(key=lambda e: (e.hits, e.created_at))
+                del bucket[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = sum(len(v) for v in self._entries.values())
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "bypass": self.bypass,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "latency_saved_sec": round(self.latency_saved_sec, 3),
+                "entries": entries,
+            }
+
+    def render_prometheus(self) -> str:
+        s = self.stats()
+        return "\n".join(
+            [
+                "# TYPE projectwise_answer_cache_lookups_total counter",
+                f"projectwise_answer_cache_lookups_total {s['lookups']}",
+                "# TYPE projectwise_answer_cache_hits_total counter",
+                f"projectwise_answer_cache_hits_total {s['hits']}",
+                "# TYPE projectwise_answer_cache_latency_saved_seconds_total counter",
+                f"projectwise_answer_cache_latency_saved_seconds_total {s['latency_saved_sec']}",
+                "# TYPE projectwise_answer_cache_entries gauge",
+                f"projectwise_answer_cache_entries {s['entries']}",
+            ]
+        )
@@ -0,0 +1,199 @@
+# utils/bulk_kak.py
+from __future__ import annotations
+import asyncio
+import fnmatch
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.logger import logger, trace_id_var
+from mcp_client.utils.pipeline_kak import (
+    EMPTY_SUMMARY_REPLY,
+    SummaryNotSaved,
+    _system_prompt,
+    payload_success,
+    run as run_kak_pipeline,
+)
+from mcp_client.utils.slug_kak import project_stem
+from mcp_client.utils.tool_result import ToolResult
+from mcp_client.utils.tracing import tracer
+from mcp_client.utils.usage import set_scope
+
+settings = get_settings()
+
+PROMPT_INSTRUCTION_NAME = "kak_analyzer"
+_FAILED_REPLIES = (EMPTY_SUMMARY_REPLY,)
+
+
+# ---------------------------------------------------------------------------
+#  State fingerprint dokumen yang sudah diringkas
+# ---------------------------------------------------------------------------
+def _load_state(path: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"[bulk_kak] State {path} tidak terbaca, mulai dari kosong: {e}")
+        return {}
+
+
+def _save_state(path: Path, state: Dict[str, Dict[str, Any]]) -> None:
+    """Tulis atomik (tmp + replace) agar state tidak korup saat proses terhenti."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _fingerprint(payload: ToolResult, prompt: str) -> str:
+    """Hash konteks KAK + prompt sistem; berubah jika dokumen/prompt berubah."""
+    context = payload.get("context", "")
+    h = hashlib.sha256()
+    h.update(prompt.encode("utf-8"))
+    h.update(b"\0")
+    h.update(context.encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def _matches(name: str, name_filter: Optional[str]) -> bool:
+    """Filter glob (``bank_*``) atau substring case-insensitive."""
+    if not name_filter:
+        return True
+    if any(ch in name_filter for ch in "*?["):
+        return fnmatch.fnmatch(name.lower(), name_filter.lower())
+    return name_filter.lower() in name.lower()
+
+
+# ---------------------------------------------------------------------------
+#  Bulk runner
+# ---------------------------------------------------------------------------
+async def run_bulk_kak(
+    client,
+    name_filter: Optional[str] = None,
+    workers: int = 4,
+    force: bool = False,
+    state_path: Optional[str] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Analisis seluruh KAK/TOR dari ``list_kak_files`` dengan worker pool.
+
+    Prompt sistem dan daftar file diambil SEKALI lalu dibagi ke
+    semua worker. Payload tiap dokumen di-fingerprint; dokumen yang sudah
+    diringkas dan tidak berubah dilewati (kecuali ``force``). ``progress``
+    dipanggil setiap dokumen selesai dengan ringkasan sementara.
+    """
+    state_file = Path(state_path or settings.bulk_kak_state_path)
+    state = _load_state(state_file)
+    state_lock = asyncio.Lock()
+
+    files = (await client.call_tool_result("list_kak_files", {})).data or []
+    names: List[str] = [f for f in files if _matches(str(f), name_filter)]
+    prompt = _system_prompt()
+
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for name in names:
+        queue.put_nowait(name)
+
+    counts = {"done": 0, "skipped": 0, "failed": 0}
+    results: List[Dict[str, Any]] = []
+    tic = time.perf_counter()
+
+    def _summary() -> Dict[str, Any]:
+        elapsed = time.perf_counter() - tic
+        finished = counts["done"] + counts["failed"]
+        return {
+            "total": len(names),
+            **counts,
+            "remaining": len(names) - finished - counts["skipped"],
+            "elapsed_sec": round(elapsed, 2),
+            "throughput_docs_per_min": round(finished / elapsed * 60, 2)
+            if elapsed
+            else 0.0,
+        }
+
+    async def _analyze(name: str) -> Dict[str, Any]:
+        trace_id = uuid.uuid4().hex[:8]
+        trace_id_var.set(trace_id)
+        started = time.perf_counter()
+        row: Dict[str, Any] = {"kak": name, "trace_id": trace_id}
+
+        with tracer.span("bulk.kak", kak_md=name):
+            payload = await client.call_tool_result(
+                "build_summary_tender_payload",
+                {
+                    "prompt_instruction_name": PROMPT_INSTRUCTION_NAME,
+                    "kak_tor_md_name": project_stem(name),
+                },
+            )
+            if not payload_success(payload):
+                return {**row, "status": "failed", "error": payload.text[:200]}
+
+            fingerprint = _fingerprint(payload, prompt)
+            prev = state.get(name)
+            if not force and prev and prev.get("fingerprint") == fingerprint:
+                return {**row, "status": "skipped"}
+
+            try:
+                reply = await run_kak_pipeline(
+                    client=client,
+                    user_query=f"Analisa proyek {name}",
+                    prompt_instruction_name=PROMPT_INSTRUCTION_NAME,
+                    kak_tor_md_name=name,
+                    trace_id=trace_id,
+                    prefetched_payload=payload,
+                )
+            except SummaryNotSaved as e:
+                # fingerprint tidak disimpan → dokumen dicoba lagi di run berikutnya
+                row["latency_sec"] = round(time.perf_counter() - started, 3)
+                return {**row, "status": "failed", "error": str(e)}
+
+        row["latency_sec"] = round(time.perf_counter() - started, 3)
+        if reply in _FAILED_REPLIES:
+            return {**row, "status": "failed", "error": reply}
+
+        async with state_lock:
+            state[name] = {
+                "fingerprint": fingerprint,
+                "analyzed_at": datetime.now(timezone.utc).isoformat(),
+            }
+            await asyncio.to_thread(_save_state, state_file, dict(state))
+        return {**row, "status": "done", "summary": reply}
+
+    async def _worker() -> None:
+        set_scope(user_id="bulk", intent="kak_analyzer")
+        while True:
+            try:
+                name = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                row = await _analyze(name)
+            except Exception as e:
+                logger.error(f"[bulk_kak] {name} gagal: {e}")
+                row = {"kak": name, "status": "failed", "error": str(e)}
+            counts[row["status"]] += 1
+            results.append(row)
+            snap = _summary()
+            logger.info(
+                f"[bulk_kak] {name} → {row['status']} | "
+                f"{snap['done'] + snap['failed'] + snap['skipped']}/{snap['total']} "
+                f"({snap['throughput_docs_per_min']} dok/menit)"
+            )
+            if progress is not None:
+                progress({**snap, "last": row})
+
+    logger.info(
+        f"[bulk_kak] {len(names)}/{len(files)} dokumen cocok, workers={workers}"
+    )
+    await asyncio.gather(*(_worker() for _ in range(max(1, min(workers, len(names) or 1)))))
+
+    summary = _summary()
+    logger.info(f"[bulk_kak] Selesai: {summary}")
+    return {**summary, "results": results}
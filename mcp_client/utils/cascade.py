@@ -0,0 +1,144 @@
+# utils/cascade.py
+from __future__ import annotations
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.logger import logger
+from mcp_client.utils.tracing import tracer
+
+settings = get_settings()
+
+T = TypeVar("T")
+TIER_NAMES = ("fast", "strong")
+
+
+def valid_chat_turn(response: Any) -> bool:
+    """Balasan chat layak dipakai: ada konten, atau semua argumen tool-call JSON valid."""
+    msg = response.choices[0].message
+    if msg.tool_calls:
+        try:
+            for tc in msg.tool_calls:
+                json.loads(tc.function.arguments or "{}")
+        except json.JSONDecodeError:
+            return False
+        return True
+    return bool((msg.content or "").strip())
+
+
+class ModelCascade:
+    """Kebijakan model bertingkat per call-site: model cepat dulu, naik bila gagal.
+
+    ``attempt(model)`` menjalankan satu panggilan LLM; ``accept(result)``
+    memvalidasi hasilnya (JSON valid, confidence cukup, context lengkap, …).
+    Exception atau hasil yang ditolak → eskalasi ke tier berikutnya; hasil
+    tier terakhir selalu dikembalikan apa adanya.
+    """
+
+    def __init__(
+        self,
+        fast_model: Optional[str] = None,
+        call_sites: Optional[List[str]] = None,
+    ):
+        self.fast_model = fast_model
+        self.call_sites = set(call_sites or [])
+        self._lock = threading.Lock()
+        # call_site → counter
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.escalations: Dict[str, int] = defaultdict(int)
+        # (call_site, tier) → [jumlah, total latensi]
+        self.tier_latency: Dict[Tuple[str, str], List[float]] = defaultdict(
+            lambda: [0, 0.0]
+        )
+        tracer.register_collector(self.render_prometheus)
+
+    def tiers(self, call_site: str, strong_model: str) -> List[str]:
+        if (
+            self.fast_model
+            and call_site in self.call_sites
+            and self.fast_model != strong_model
+        ):
+            return [self.fast_model, strong_model]
+        return [strong_model]
+
+    async def run(
+        self,
+        call_site: str,
+        strong_model: str,
+        attempt: Callable[[str], Awaitable[T]],
+        accept: Callable[[T], bool],
+        start_tier: int = 0,
+    ) -> Tuple[T, int]:
+        """Kembalikan (hasil, indeks tier) agar pemanggil bisa tetap di tier itu."""
+        models = self.tiers(call_site, strong_model)
+        tier = min(start_tier, len(models) - 1)
+        with self._lock:
+            self.calls[call_site] += 1
+        while True:
+            model = models[tier]
+            tier_name = TIER_NAMES[tier] if len(models) > 1 else "single"
+            last = tier == len(models) - 1
+            tic = time.perf_counter()
+            try:
+                with tracer.span(f"cascade.{call_site}.{tier_name}", model=model):
+                    result = await attempt(model)
+                ok = last or accept(result)
+                reason = "rejected"
+            except Exception as e:
+                if last:
+                    raise
+                ok, reason = False, f"{type(e).__name__}: {e}"
+            finally:
+                with self._lock:
+                    stat = self.tier_latency[(call_site, tier_name)]
+                    stat[0] += 1
+                    stat[1] += time.perf_counter() - tic
+            if ok:
+                return result, tier
+            with self._lock:
+                self.escalations[call_site] += 1
+            logger.info(
+                f"[cascade] {call_site}: eskalasi {model} → {models[tier + 1]} ({reason})"
+            )
+            tier += 1
+
+    # ------------- laporan -------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            report: Dict[str, Any] = {}
+            for site, calls in self.calls.items():
+                escalated = self.escalations.get(site, 0)
+                report[site] = {
+                    "calls": calls,
+                    "escalations": escalated,
+                    "escalation_rate": round(escalated / calls, 4) if calls else 0.0,
+                    "tiers": {
+                        tier: {
+                            "calls": int(n),
+                            "mean_latency_sec": round(total / n, 4) if n else 0.0,
+                        }
+                        for (s, tier), (n, total) in self.tier_latency.items()
+                        if s == site
+                    },
+                }
+            return report
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# TYPE projectwise_cascade_calls_total counter",
+            "# TYPE projectwise_cascade_escalations_total counter",
+        ]
+        with self._lock:
+            for site, calls in sorted(self.calls.items()):
+                lines.append(f'projectwise_cascade_calls_total{{call_site="{site}"}} {calls}')
+                lines.append(
+                    f'projectwise_cascade_escalations_total{{call_site="{site}"}} '
+                    f"{self.escalations.get(site, 0)}"
+                )
+        return "\n".join(lines)
+
+
+model_cascade = ModelCascade(settings.llm_fast_model, settings.model_cascade)
@@ -0,0 +1,291 @@
+# utils/cassette.py
+from __future__ import annotations
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from mcp_client.utils.logger import logger
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMiss(LookupError):
+    """Tidak ada rekaman yang cocok untuk request saat replay."""
+
+
+def _default(obj: Any) -> Any:
+    # response_format=IntentRoute (kelas pydantic) → cukup namanya
+    if isinstance(obj, type):
+        return obj.__name__
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    return repr(obj)
+
+
+def request_key(kind: str, request: Any) -> str:
+    """Hash kanonik request (urutan key JSON distabilkan)."""
+    raw = json.dumps(request, sort_keys=True, ensure_ascii=False, default=_default)
+    return hashlib.sha256(f"{kind}\n{raw}".encode("utf-8")).hexdigest()[:24]
+
+
+class Cassette:
+    """Rekam/putar ulang lalu lintas LLM, MCP tool & memori beserta timing-nya.
+
+    File berupa JSONL ter-gzip, satu interaksi per baris:
+    ``{"kind", "key", "elapsed", "response" | "error"}``. Saat replay, rekaman
+    dicocokkan via hash request (FIFO per key) sehingga urutan eksekusi
+    konkuren tidak memengaruhi hasil; ``latency="original"`` meniru durasi
+    asli (dikali ``speed``), ``"zero"`` langsung mengembalikan respons.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = REPLAY,
+        latency: str = "original",
+        speed: float = 1.0,
+        strict: bool = True,
+    ):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Mode cassette tidak dikenal: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self.speed = speed
+        self.strict = strict
+        self.entries: List[Dict[str, Any]] = []
+        self._by_key: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._by_kind: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if mode == REPLAY:
+            self.load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    # ------------- persistensi ---------------------------------------
+    def load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._by_key[entry["key"]].append(entry)
+                    self._by_kind[entry["kind"]].append(entry)
+        logger.info(
+            f"[cassette] {sum(len(q) for q in self._by_key.values())} interaksi dimuat dari {self.path}"
+        )
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            entries = list(self.entries)
+        with gzip.open(self.path, "wt", encoding="utf-8") as fh:
+            for entry in entries:
+                fh.write(json.dumps(entry, ensure_ascii=False, default=_default) + "\n")
+        logger.info(f"[cassette] {len(entries)} interaksi direkam ke {self.path}")
+
+    # ------------- rekam / putar -------------------------------------
+    async def exchange(
+        self,
+        kind: str,
+        request: Any,
+        call: Optional[Callable[[], Awaitable[Any]]],
+        dump: Callable[[Any], Any],
+        load: Callable[[Any], Any],
+    ) -> Any:
+        """Jalankan *call* (record) atau kembalikan rekaman (replay)."""
+        key = request_key(kind, request)
+        if self.mode == REPLAY:
+            return await self._replay(kind, key, load)
+
+        assert call is not None
+        tic = time.perf_counter()
+        entry: Dict[str, Any] = {"kind": kind, "key": key}
+        try:
+            result = await call()
+            entry["response"] = dump(result)
+            return result
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            entry["elapsed"] = round(time.perf_counter() - tic, 4)
+            with self._lock:
+                self.entries.append(entry)
+
+    async def _replay(self, kind: str, key: str, load: Callable[[Any], Any]) -> Any:
+        with self._lock:
+            queue = self._by_key.get(key)
+            if queue:
+                entry = queue.popleft()
+                self._by_kind[kind].remove(entry)
+                self.hits += 1
+            elif not self.strict and self._by_kind.get(kind):
+                # Fallback non-strict: rekaman berikutnya dengan jenis sama
+                entry = self._by_kind[kind].popleft()
+                self._by_key[entry["key"]].remove(entry)
+                self.misses += 1
+            else:
+                self.misses += 1
+                raise CassetteMiss(f"Tidak ada rekaman {kind} untuk key {key}")
+        if self.latency == "original" and entry.get("elapsed"):
+            await asyncio.sleep(entry["elapsed"] * self.speed)
+        if "error" in entry:
+            raise RuntimeError(f"[cassette] {entry['error']}")
+        return load(entry["response"])
+
+
+# ---------------------------------------------------------------------------
+#  Proxy: LLM, MCP session & memori
+# ---------------------------------------------------------------------------
+def _dump_model(obj: Any) -> Any:
+    return obj.model_dump(mode="json")
+
+
+def _load_chat(data: Any) -> Any:
+    from openai.types.chat import ChatCompletion
+
+    return ChatCompletion.model_validate(data)
+
+
+class _CassetteCompletions:
+    def __init__(self, llm: "CassetteLLM", cassette: Cassette):
+        self._llm = llm
+        self._cassette = cassette
+
+    async def create(self, **kwargs: Any) -> Any:
+        return await self._cassette.exchange(
+            "llm.create",
+            kwargs,
+            lambda: self._llm.real.chat.completions.create(**kwargs),
+            _dump_model,
+            _load_chat,
+        )
+
+    async def parse(self, **kwargs: Any) -> Any:
+        return await self._cassette.exchange(
+            "llm.parse",
+            kwargs,
+            lambda: self._llm.real.chat.completions.parse(**kwargs),
+            _dump_model,
+            _load_chat,
+        )
+
+
+class _CassetteChat:
+    def __init__(self, llm: "CassetteLLM", cassette: Cassette):
+        self.completions = _CassetteCompletions(llm, cassette)
+
+
+class CassetteLLM:
+    """Proxy AsyncOpenAI; ``chat.completions.create/parse`` lewat cassette.
+
+    Client asli dibuat lewat ``factory`` hanya saat benar-benar dipanggil
+    (record) → replay tidak butuh OPENAI_API_KEY maupun koneksi OpenAI.
+    """
+
+    def __init__(self, factory: Callable[[], Any], cassette: Cassette):
+        self._factory = factory
+        self._real: Any = None
+        self.chat = _CassetteChat(self, cassette)
+
+    @property
+    def real(self) -> Any:
+        if self._real is None:
+            self._real = self._factory()
+        return self._real
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.real, name)
+
+
+class CassetteSession:
+    """Pengganti ClientSession: rekam panggilan MCP, atau putar tanpa server."""
+
+    def __init__(self, cassette: Cassette, real: Optional[Any] = None):
+        self._cassette = cassette
+        self._real = real
+
+    @property
+    def real(self) -> Optional[Any]:
+        """Session MCP asli (None saat replay)."""
+        return self._real
+
+    async def initialize(self) -> None:
+        if self._real is not None:
+            await self._real.initialize()
+
+    async def list_tools(self) -> Any:
+        from mcp.types import ListToolsResult
+
+        return await self._cassette.exchange(
+            "mcp.list_tools",
+            {},
+            lambda: self._real.list_tools(),  # type: ignore[union-attr]
+            _dump_model,
+            ListToolsResult.model_validate,
+        )
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        from mcp.types import CallToolResult
+
+        args = arguments or {}
+        return await self._cassette.exchange(
+            "mcp.call_tool",
+            {"name": name, "arguments": args},
+            lambda: self._real.call_tool(name, args),  # type: ignore[union-attr]
+            _dump_model,
+            CallToolResult.model_validate,
+        )
+
+
+class CassetteMemory:
+    """Bungkus Mem0Manager: hasil search direkam; saat replay tidak menyentuh mem0."""
+
+    def __init__(self, real: Any, cassette: Cassette):
+        self._real = real
+        self._cassette = cassette
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._real, name)
+
+    async def init(self) -> None:
+        if self._cassette.recording:
+            await self._real.init()
+
+    async def warm_up(self) -> None:
+        if self._cassette.recording:
+            await self._real.warm_up()
+
+    async def open_session(self, user_id: str = "default") -> None:
+        if self._cassette.recording:
+            await self._real.open_session(user_id)
+
+    async def get_memories(
+        self, query: str, *, user_id: str = "default", limit: int = 5
+    ) -> List[str]:
+        return await self._cassette.exchange(
+            "memory.search",
+            {"query": query, "user_id": user_id, "limit": limit},
+            lambda: self._real.get_memories(query, user_id=user_id, limit=limit),
+            list,
+            list,
+        )
+
+    async def add_conversation(
+        self, messages: List[Dict[str, str]], *, user_id: str = "default"
+    ) -> None:
+        if self._cassette.recording:
+            await self._real.add_conversation(messages, user_id=user_id)
@@ -0,0 +1,136 @@
+# utils/dag.py
+from __future__ import annotations
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.logger import logger
+from mcp_client.utils.tracing import tracer
+
+settings = get_settings()
+
+RETRY_DELAY_SEC = 0.5
+
+
+@dataclass(frozen=True)
+class Step:
+    """Satu langkah pipeline.
+
+    ``run`` dipanggil dengan keyword argument sesuai ``inputs`` (nama output
+    langkah lain atau key context awal); nilai kembaliannya disimpan sebagai
+    ``output`` (default: nama langkah). Jika output sudah ada di context
+    awal, langkah dilewati (mis. payload yang sudah di-prefetch).
+    """
+
+    name: str
+    run: Callable[..., Awaitable[Any]]
+    inputs: Tuple[str, ...] = ()
+    output: Optional[str] = None
+    timeout: Optional[float] = None
+    retries: int = 0
+    optional: bool = False  # gagal → output None, pipeline lanjut
+
+    @property
+    def key(self) -> str:
+        return self.output or self.name
+
+
+class StepFailed(RuntimeError):
+    def __init__(self, step: str, cause: BaseException):
+        super().__init__(f"Langkah '{step}' gagal: {cause!r}")
+        self.step = step
+        self.cause = cause
+
+
+class StepError(RuntimeError):
+    """Kegagalan terkontrol dari dalam langkah (pesan siap ditampilkan); tidak di-retry."""
+
+
+# Batas langkah paralel bersama untuk semua pipeline dalam proses
+_limiter: Optional[asyncio.Semaphore] = None
+
+
+def _shared_limiter() -> asyncio.Semaphore:
+    global _limiter
+    if _limiter is None:
+        _limiter = asyncio.Semaphore(max(1, settings.pipeline_max_parallel_steps))
+    return _limiter
+
+
+class Pipeline:
+    """Eksekutor DAG async: langkah yang input-nya sudah tersedia dijalankan
+    bersamaan (dibatasi limiter bersama), masing-masing dengan timeout,
+    retry dan span ``dag.step`` sendiri."""
+
+    def __init__(self, name: str, steps: Sequence[Step]):
+        keys = [s.key for s in steps]
+        duplicates = {k for k in keys if keys.count(k) > 1}
+        if duplicates:
+            raise ValueError(f"Output langkah ganda di pipeline {name}: {sorted(duplicates)}")
+        self.name = name
+        self.steps = list(steps)
+        self.last_timings: Dict[str, float] = {}
+
+    async def run(self, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        values: Dict[str, Any] = dict(context or {})
+        pending = [s for s in self.steps if s.key not in values]
+        running: Dict[asyncio.Task, Step] = {}
+        self.last_timings = {}
+        tic = time.perf_counter()
+
+        try:
+            while pending or running:
+                for step in [s for s in pending if all(i in values for i in s.inputs)]:
+                    pending.remove(step)
+                    task = asyncio.create_task(
+                        self._run_step(step, {i: values[i] for i in step.inputs}),
+                        name=f"dag-{self.name}-{step.name}",
+                    )
+                    running[task] = step
+                if not running:
+                    missing = {i for s in pending for i in s.inputs if i not in values}
+                    raise ValueError(
+                        f"Pipeline {self.name}: input tidak tersedia {sorted(missing)}"
+                    )
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step = running.pop(task)
+                    values[step.key] = task.result()  # StepFailed diteruskan
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        self.last_timings["total"] = time.perf_counter() - tic
+        return values
+
+    async def _run_step(self, step: Step, kwargs: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            for attempt in range(step.retries + 1):
+                try:
+                    async with _shared_limiter():
+                        with tracer.span(
+                            "dag.step", pipeline=self.name, step=step.name, attempt=attempt + 1
+                        ):
+                            return await asyncio.wait_for(step.run(**kwargs), timeout=step.timeout)
+                except Exception as e:
+                    if attempt < step.retries and not isinstance(e, StepError):
+                        logger.warning(
+                            f"[dag] {self.name}.{step.name} gagal ({e!r}), "
+                            f"ulang {attempt + 1}/{step.retries}"
+                        )
+                        await asyncio.sleep(RETRY_DELAY_SEC * (attempt + 1))
+                        continue
+                    if step.optional:
+                        logger.warning(f"[dag] {self.name}.{step.name} dilewati: {e!r}")
+                        return None
+                    if isinstance(e, StepError):
+                        raise
+                    raise StepFailed(step.name, e) from e
+        finally:
+            self.last_timings[step.name] = time.perf_counter() - started
@@ -0,0 +1,273 @@
+# utils/degradation.py
+from __future__ import annotations
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.logger import logger
+from mcp_client.utils.tracing import tracer
+from mcp_client.utils.usage import usage_scope
+
+settings = get_settings()
+
+
+# ---------------------------------------------------------------------------
+#  Level degradasi (kumulatif: level lebih tinggi = lebih banyak dipangkas)
+# ---------------------------------------------------------------------------
+@dataclass(frozen=True)
+class DegradationPolicy:
+    level: int = 0
+    skip_memory: bool = False  # tanpa mem0 search & add_conversation
+    local_intent: bool = False  # router keyword lokal, tanpa LLM
+    # hanya loop tool-calling chat (other); pipeline KAK/docgen berupa DAG
+    # tanpa turn, dibatasi timeout per langkah
+    max_turns_factor: float = 1.0
+    tool_output_max_chars: Optional[int] = None
+
+    def turns(self, max_turns: int) -> int:
+        if self.max_turns_factor >= 1.0:
+            return max_turns
+        return max(2, int(max_turns * self.max_turns_factor))
+
+    def cap_tool_output(self, text: str) -> str:
+        limit = self.tool_output_max_chars
+        if limit is None or len(text) <= limit:
+            return text
+        return text[:limit] + f"\n…[dipotong {len(text) - limit} karakter – beban tinggi]"
+
+
+LEVELS = (
+    DegradationPolicy(0),
+    DegradationPolicy(1, skip_memory=True),
+    DegradationPolicy(2, skip_memory=True, local_intent=True),
+    DegradationPolicy(3, skip_memory=True, local_intent=True, max_turns_factor=0.5),
+    DegradationPolicy(
+        4,
+        skip_memory=True,
+        local_intent=True,
+        max_turns_factor=0.5,
+        tool_output_max_chars=4_000,
+    ),
+)
+# Ambang tekanan (pressure) untuk naik ke level 1..4
+LEVEL_THRESHOLDS = (0.6, 0.8, 1.0, 1.25)
+# Turun level hanya jika pressure < ambang × faktor ini (hysteresis)
+RECOVERY_FACTOR = 0.8
+# Hanya latensi chat yang jadi sinyal beban; KAK/docgen memang lama (LLM panjang)
+LATENCY_INTENTS = frozenset({"other"})
+# Evaluasi ulang berkala agar level bisa turun walau tidak ada request baru
+EVAL_INTERVAL_SEC = 5.0
+
+degradation_var: contextvars.ContextVar[DegradationPolicy] = contextvars.ContextVar(
+    "degradation", default=LEVELS[0]
+)
+
+
+def current_policy() -> DegradationPolicy:
+    """Kebijakan degradasi untuk request (task) saat ini."""
+    return degradation_var.get()
+
+
+class Overloaded(RuntimeError):
+    """Request ditolak karena jumlah in-flight melewati batas admission."""
+
+
+# ---------------------------------------------------------------------------
+#  Gate LLM: semaphore + pengukuran waktu antre
+# ---------------------------------------------------------------------------
+class _GatedCompletions:
+    def __init__(self, real: Any, controller: "LoadController"):
+        self._real = real
+        self._controller = controller
+
+    async def create(self, **kwargs: Any) -> Any:
+        async with self._controller.llm_slot():
+            return await self._real.create(**kwargs)
+
+    async def parse(self, **kwargs: Any) -> Any:
+        async with self._controller.llm_slot():
+            return await self._real.parse(**kwargs)
+
+
+class _GatedChat:
+    def __init__(self, real: Any, controller: "LoadController"):
+        self.completions = _GatedCompletions(real.completions, controller)
+
+
+class GatedLLM:
+    """Proxy AsyncOpenAI; ``chat.completions`` dibatasi & diukur antreannya."""
+
+    def __init__(self, real: Any, controller: "LoadController"):
+        self._real = real
+        self.chat = _GatedChat(real.chat, controller)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._real, name)
+
+
+# ---------------------------------------------------------------------------
+#  Controller
+# ---------------------------------------------------------------------------
+class LoadController:
+    """Admission & degradasi adaptif berdasarkan beban.
+
+    Sinyal: jumlah request in-flight, EWMA waktu antre slot LLM, dan p95
+    latensi request chat (intent ``other``) dalam ``degrade_latency_window_sec``
+    terakhir. Masing-masing dinormalisasi ke ambang "high"
+    di Settings; nilai terbesar menjadi *pressure*. Naik level langsung
+    saat pressure melewati ambang; turun satu level per ``cooldown`` detik
+    dan hanya jika pressure sudah di bawah ambang × ``RECOVERY_FACTOR``.
+    """
+
+    def __init__(self, window: int = 200, ewma_alpha: float = 0.2):
+        self.enabled = settings.degrade_enabled
+        self.level = 0
+        self.inflight = 0
+        self.llm_wait_ewma = 0.0
+        self.pressure = 0.0
+        self.rejected = 0
+        self.transitions: Dict[int, int] = {lvl.level: 0 for lvl in LEVELS}
+        # (waktu selesai monotonic, latensi)
+        self._latencies: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self._alpha = ewma_alpha
+        self._changed_at = 0.0
+        self._lock = threading.Lock()
+        self._llm_sem: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        tracer.register_collector(self.render_prometheus)
+
+    # ------------- sinyal --------------------------------------------
+    def _p95(self) -> float:
+        horizon = time.monotonic() - settings.degrade_latency_window_sec
+        while self._latencies and self._latencies[0][0] < horizon:
+            self._latencies.popleft()
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(latency for _, latency in self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def _evaluate(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.pressure = max(
+                self.inflight / max(settings.degrade_inflight_high, 1),
+                self.llm_wait_ewma / settings.degrade_llm_wait_high_sec,
+                self._p95() / settings.degrade_p95_high_sec,
+            )
+            target = sum(1 for t in LEVEL_THRESHOLDS if self.pressure >= t)
+            now = time.monotonic()
+            if target > self.level:
+                new_level = target
+            elif (
+                self.level > 0
+                and self.pressure < LEVEL_THRESHOLDS[self.level - 1] * RECOVERY_FACTOR
+                and now - self._changed_at >= settings.degrade_cooldown_sec
+            ):
+                new_level = self.level - 1
+            else:
+                return
+            old, self.level, self._changed_at = self.level, new_level, now
+            self.transitions[new_level] += 1
+        logger.warning(
+            f"[degradation] Level {old} → {new_level} (pressure={self.pressure:.2f}, "
+            f"inflight={self.inflight}, llm_wait={self.llm_wait_ewma:.2f}s, "
+            f"p95={self._p95():.1f}s)"
+        )
+
+    # ------------- admission -----------------------------------------
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[DegradationPolicy]:
+        """Daftarkan satu request; set kebijakan level saat ini di contextvar."""
+        cap = settings.degrade_max_inflight
+        if self.enabled and cap and self.inflight >= cap:
+            self.rejected += 1
+            raise Overloaded(f"{self.inflight} request in-flight (batas {cap})")
+        self.inflight += 1
+        self._evaluate()
+        policy = LEVELS[self.level]
+        token = degradation_var.set(policy)
+        tic = time.perf_counter()
+        try:
+            yield policy
+        finally:
+            degradation_var.reset(token)
+            self.inflight -= 1
+            if usage_scope.get().get("intent") in LATENCY_INTENTS:
+                self._latencies.append((time.monotonic(), time.perf_counter() - tic))
+            self._evaluate()
+
+    @asynccontextmanager
+    async def llm_slot(self) -> AsyncIterator[None]:
+        if self._llm_sem is None:
+            self._llm_sem = asyncio.Semaphore(settings.llm_max_concurrency)
+        tic = time.perf_counter()
+        async with self._llm_sem:
+            wait = time.perf_counter() - tic
+            self.llm_wait_ewma += self._alpha * (wait - self.llm_wait_ewma)
+            self._evaluate()
+            yield
+
+    def gate(self, llm: Any) -> GatedLLM:
+        return GatedLLM(llm, self)
+
+    # ------------- evaluasi berkala ----------------------------------
+    def start(self) -> None:
+        """Mulai evaluasi berkala di loop yang sedang berjalan (idempotent)."""
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._loop(), name="load-controller")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(EVAL_INTERVAL_SEC)
+            self._evaluate()
+
+    # ------------- laporan -------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "pressure": round(self.pressure, 3),
+            "inflight": self.inflight,
+            "llm_wait_ewma_sec": round(self.llm_wait_ewma, 4),
+            "p95_latency_sec": round(self._p95(), 3),
+            "rejected": self.rejected,
+            "transitions": dict(self.transitions),
+        }
+
+    def render_prometheus(self) -> str:
+        s = self.stats()
+        lines = [
+            "# TYPE projectwise_degradation_level gauge",
+            f"projectwise_degradation_level {s['level']}",
+            "# TYPE projectwise_load_pressure gauge",
+            f"projectwise_load_pressure {s['pressure']}",
+            "# TYPE projectwise_inflight_requests gauge",
+            f"projectwise_inflight_requests {s['inflight']}",
+            "# TYPE projectwise_llm_queue_wait_seconds gauge",
+            f"projectwise_llm_queue_wait_seconds {s['llm_wait_ewma_sec']}",
+            "# TYPE projectwise_admission_rejected_total counter",
+            f"projectwise_admission_rejected_total {s['rejected']}",
+            "# TYPE projectwise_degradation_transitions_total counter",
+        ]
+        for level, n in sorted(s["transitions"].items()):
+            lines.append(f'projectwise_degradation_transitions_total{{level="{level}"}} {n}')
+        return "\n".join(lines)
+
+
+load_controller = LoadController()
@@ -0,0 +1,420 @@
+# utils/embedded_store.py
+from __future__ import annotations
+import hashlib
+import json
+import re
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from mcp_client.utils.logger import logger
+
+try:  # antarmuka mem0 (opsional saat dipakai standalone / benchmark)
+    from mem0.vector_stores.base import VectorStoreBase
+except ImportError:  # pragma: no cover
+    VectorStoreBase = object  # type: ignore[misc,assignment]
+
+SHARED_PARTITION = "_shared"
+_MIN_CAPACITY = 1_024
+_SLUG_RE = re.compile(r"[^a-zA-Z0-9_-]+")
+
+
+@dataclass
+class OutputData:
+    """Bentuk hasil yang dibaca mem0: ``.id``, ``.score``, ``.payload``."""
+
+    id: Optional[str]
+    score: Optional[float]
+    payload: Optional[Dict[str, Any]]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _match(payload: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    """Semantik filter sama dengan provider Qdrant mem0 (equality / range)."""
+    if not filters:
+        return True
+    for key, value in filters.items():
+        if key not in payload:
+            return False
+        actual = payload[key]
+        if isinstance(value, dict) and "gte" in value and "lte" in value:
+            if not value["gte"] <= actual <= value["lte"]:
+                return False
+        elif actual != value:
+            return False
+    return True
+
+
+class _Partition:
+    """Matriks embedding satu user: ``vectors.f32`` (memmap) + ``meta.jsonl`` (log).
+
+    Baris ditulis append-only; log mencatat ``add``/``del``/``upd`` sehingga
+    restart cukup me-replay log tanpa membaca ulang vektor. Vektor disimpan
+    ternormalisasi → cosine similarity = dot product.
+    """
+
+    def __init__(self, directory: Path, key: str, dims: int):
+        self.dir = directory
+        self.key = key
+        self.dims = dims
+        self.n = 0  # baris terpakai (termasuk yang sudah dihapus)
+        self.ids: List[Optional[str]] = []
+        self.row_of: Dict[str, int] = {}
+        self.payloads: Dict[str, Dict[str, Any]] = {}
+        self.alive = np.zeros(0, dtype=bool)
+        self._mm: Optional[np.memmap] = None
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._vec_path = self.dir / "vectors.f32"
+        self._log_path = self.dir / "meta.jsonl"
+        if self._log_path.exists():
+            self._replay()
+        else:
+            self._log = self._log_path.open("a", encoding="utf-8")
+            self._write({"op": "init", "key": key, "dims": dims})
+        if self._vec_path.exists():
+            self._map(self._vec_path.stat().st_size // (4 * self.dims))
+
+    # ------------- persistensi ---------------------------------------
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._log.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _replay(self) -> None:
+        with self._log_path.open(encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # baris terakhir terpotong (crash saat menulis)
+                op = rec["op"]
+                if op == "init":
+                    self.key, self.dims = rec["key"], rec["dims"]
+                elif op == "add":
+                    self._set_row(rec["row"], rec["id"], rec["payload"])
+                elif op == "del":
+                    self._drop(rec["id"])
+                elif op == "upd":
+                    self.payloads[rec["id"]] = rec["payload"]
+        self._log = self._log_path.open("a", encoding="utf-8")
+
+    def _map(self, capacity: int) -> None:
+        if self._mm is not None:
+            self._mm.flush()
+            del self._mm
+        size = capacity * self.dims * 4
+        with open(self._vec_path, "ab") as fh:
+            if fh.tell() < size:
+                fh.truncate(size)
+        self._mm = np.memmap(
+            self._vec_path, dtype=np.float32, mode="r+", shape=(capacity, self.dims)
+        )
+        if len(self.alive) < capacity:
+            self.alive = np.concatenate(
+                [self.alive, np.zeros(capacity - len(self.alive), dtype=bool)]
+            )
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._mm is None else self._mm.shape[0]
+
+    def _set_row(self, row: int, vid: str, payload: Dict[str, Any]) -> None:
+        if vid in self.row_of:
+            self._drop(vid)
+        while len(self.ids) <= row:
+            self.ids.append(None)
+        if len(self.alive) <= row:
+            self.alive = np.concatenate(
+                [self.alive, np.zeros(max(row + 1, 2 * len(self.alive)) - len(self.alive), dtype=bool)]
+            )
+        self.ids[row] = vid
+        self.row_of[vid] = row
+        self.payloads[vid] = payload
+        self.alive[row] = True
+        self.n = max(self.n, row + 1)
+
+    def _drop(self, vid: str) -> None:
+        row = self.row_of.pop(vid, None)
+        self.payloads.pop(vid, None)
+        if row is not None:
+            self.ids[row] = None
+            self.alive[row] = False
+
+    # ------------- operasi -------------------------------------------
+    def append(
+        self, vectors: np.ndarray, ids: List[str], payloads: List[Dict[str, Any]]
+    ) -> None:
+        k = len(ids)
+        if self.n + k > self.capacity:
+            self._map(max(_MIN_CAPACITY, 2 * self.capacity, self.n + k))
+        start = self.n
+        self._mm[start : start + k] = vectors  # type: ignore[index]
+        self._mm.flush()  # type: ignore[union-attr]
+        # vektor sudah di disk sebelum log "add" → replay selalu konsisten
+        for i, (vid, payload) in enumerate(zip(ids, payloads)):
+            self._set_row(start + i, vid, payload)
+            self._write({"op": "add", "id": vid, "row": start + i, "payload": payload})
+        self._log.flush()
+
+    def delete(self, vid: str) -> None:
+        self._drop(vid)
+        self._write({"op": "del", "id": vid})
+        self._log.flush()
+
+    def set_payload(self, vid: str, payload: Dict[str, Any]) -> None:
+        self.payloads[vid] = payload
+        self._write({"op": "upd", "id": vid, "payload": payload})
+        self._log.flush()
+
+    def vector(self, vid: str) -> np.ndarray:
+        return np.array(self._mm[self.row_of[vid]])  # type: ignore[index]
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[OutputData]:
+        if not self.row_of or self._mm is None:
+            return []
+        scores = self._mm[: self.n] @ query
+        scores = np.where(self.alive[: self.n], scores, -np.inf)
+        live = len(self.row_of)
+        if predicate is None and k < live:
+            top = np.argpartition(-scores, k)[:k]
+            order = top[np.argsort(-scores[top])]
+        else:
+            order = np.argsort(-scores)[:live]
+        results: List[OutputData] = []
+        for row in order:
+            vid = self.ids[row]
+            if vid is None:
+                continue
+            payload = self.payloads[vid]
+            if predicate is not None and not predicate(payload):
+                continue
+            results.append(OutputData(vid, float(scores[row]), dict(payload)))
+            if len(results) >= k:
+                break
+        return results
+
+    def compact(self) -> None:
+        """Tulis ulang hanya baris hidup (dipanggil saat >50% baris terhapus)."""
+        rows = [self.row_of[vid] for vid in self.row_of]
+        ids = list(self.row_of)
+        vectors = np.array(self._mm[rows]) if rows else np.zeros((0, self.dims), np.float32)  # type: ignore[index]
+        payloads = [self.payloads[vid] for vid in ids]
+        self.close()
+        self._vec_path.unlink(missing_ok=True)
+        self._log_path.unlink(missing_ok=True)
+        self.__init__(self.dir, self.key, self.dims)  # type: ignore[misc]
+        if ids:
+            self.append(vectors, ids, payloads)
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm = None
+        self._log.close()
+
+
+class EmbeddedVectorStore(VectorStoreBase):  # type: ignore[misc,valid-type]
+    """Vector store in-process untuk mem0 (pengganti Qdrant single-node).
+
+    Satu partisi (matriks NumPy memmap) per ``user_id``; pencarian dengan
+    filter ``user_id`` hanya menyentuh matriks user tersebut dan memakai
+    top-k tervektorisasi (``argpartition``) atas cosine similarity.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        collection_name: str = "mem0",
+        embedding_model_dims: int = 1536,
+    ):
+        self.root = Path(path)
+        self.collection_name = collection_name
+        self.dims = embedding_model_dims
+        self._lock = threading.RLock()
+        self._partitions: Dict[str, _Partition] = {}
+        self._where: Dict[str, _Partition] = {}
+        self.create_col(collection_name)
+
+    # ------------- partisi -------------------------------------------
+    @property
+    def _col_dir(self) -> Path:
+        return self.root / self.collection_name
+
+    @staticmethod
+    def _dirname(key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+        return f"{_SLUG_RE.sub('_', key)[:40]}-{digest}"
+
+    def _load_partitions(self) -> None:
+        for sub in sorted(self._col_dir.iterdir()):
+            if (sub / "meta.jsonl").exists():
+                part = _Partition(sub, key="", dims=self.dims)
+                self.dims = part.dims
+                self._partitions[part.key] = part
+                for vid in part.row_of:
+                    self._where[vid] = part
+
+    def _partition(self, key: str, dims: Optional[int] = None) -> _Partition:
+        part = self._partitions.get(key)
+        if part is None:
+            if dims:
+                self.dims = dims
+            part = _Partition(self._col_dir / self._dirname(key), key, self.dims)
+            self._partitions[key] = part
+        return part
+
+    def _targets(self, filters: Optional[Dict[str, Any]]) -> Iterable[_Partition]:
+        if filters and "user_id" in filters and not isinstance(filters["user_id"], dict):
+            part = self._partitions.get(str(filters["user_id"]))
+            return [part] if part else []
+        return list(self._partitions.values())
+
+    @staticmethod
+    def _key(payload: Dict[str, Any]) -> str:
+        return str(payload.get("user_id") or SHARED_PARTITION)
+
+    # ------------- VectorStoreBase -----------------------------------
+    def create_col(self, name: str, vector_size: Optional[int] = None, distance: Any = None):
+        with self._lock:
+            self.collection_name = name
+            if vector_size:
+                self.dims = vector_size
+            self._col_dir.mkdir(parents=True, exist_ok=True)
+            self._partitions.clear()
+            self._where.clear()
+            self._load_partitions()
+            return self
+
+    def insert(
+        self,
+        vectors: List[List[float]],
+        payloads: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> None:
+        ids = ids or [str(uuid.uuid4()) for _ in vectors]
+        payloads = payloads or [{} for _ in vectors]
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        groups: Dict[str, List[int]] = {}
+        for i, payload in enumerate(payloads):
+            groups.setdefault(self._key(payload), []).append(i)
+        with self._lock:
+            for key, idx in groups.items():
+                part = self._partition(key, dims=matrix.shape[1])
+                for i in idx:
+                    old = self._where.get(ids[i])
+                    if old is not None and old is not part:
+                        old.delete(ids[i])
+                part.append(matrix[idx], [ids[i] for i in idx], [payloads[i] for i in idx])
+                for i in idx:
+                    self._where[ids[i]] = part
+
+    def search(
+        self,
+        query: str,
+        vectors: List[float],
+        limit: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[OutputData]:
+        q = np.asarray(vectors, dtype=np.float32).reshape(-1)
+        q = q / (np.linalg.norm(q) or 1.0)
+        rest = {k: v for k, v in (filters or {}).items() if k != "user_id"}
+        predicate = (lambda p: _match(p, rest)) if rest else None
+        with self._lock:
+            hits: List[OutputData] = []
+            for part in self._targets(filters):
+                hits.extend(part.search(q, limit, predicate))
+        hits.sort(key=lambda h: h.score or 0.0, reverse=True)
+        return hits[:limit]
+
+    def delete(self, vector_id: str) -> None:
+        with self._lock:
+            part = self._where.pop(vector_id, None)
+            if part is None:
+                logger.warning(f"[embedded_store] Vektor {vector_id} tidak ditemukan")
+                return
+            part.delete(vector_id)
+            if part.n > _MIN_CAPACITY and len(part.row_of) < part.n // 2:
+                part.compact()
+
+    def update(
+        self,
+        vector_id: str,
+        vector: Optional[List[float]] = None,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        with self._lock:
+            part = self._where.get(vector_id)
+            if part is None:
+                raise ValueError(f"Vector {vector_id} not found")
+            new_payload = payload if payload is not None else part.payloads[vector_id]
+            if vector is None and self._key(new_payload) == part.key:
+                part.set_payload(vector_id, new_payload)
+                return
+            vec = vector if vector is not None else part.vector(vector_id).tolist()
+            self.insert([vec], [new_payload], [vector_id])
+
+    def get(self, vector_id: str) -> Optional[OutputData]:
+        with self._lock:
+            part = self._where.get(vector_id)
+            if part is None:
+                return None
+            return OutputData(vector_id, None, dict(part.payloads[vector_id]))
+
+    def list_cols(self) -> List[str]:
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir()) if self.root.exists() else []
+
+    def delete_col(self) -> None:
+        with self._lock:
+            for part in self._partitions.values():
+                part.close()
+            self._partitions.clear()
+            self._where.clear()
+            shutil.rmtree(self._col_dir, ignore_errors=True)
+
+    def col_info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.collection_name,
+                "count": len(self._where),
+                "dimension": self.dims,
+                "partitions": {k: len(p.row_of) for k, p in self._partitions.items()},
+            }
+
+    def list(
+        self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = 100
+    ) -> List[List[OutputData]]:
+        limit = limit or 100
+        rest = {k: v for k, v in (filters or {}).items() if k != "user_id"}
+        results: List[OutputData] = []
+        with self._lock:
+            for part in self._targets(filters):
+                for vid, payload in part.payloads.items():
+                    if _match(payload, rest):
+                        results.append(OutputData(vid, None, dict(payload)))
+                        if len(results) >= limit:
+                            return [results]
+        # mem0 membaca ``list(...)[0]`` (format scroll Qdrant)
+        return [results]
+
+    def reset(self) -> None:
+        logger.warning(f"[embedded_store] Reset koleksi {self.collection_name}")
+        self.delete_col()
+        self.create_col(self.collection_name)
+
+    def close(self) -> None:
+        with self._lock:
+            for part in self._partitions.values():
+                part.close()
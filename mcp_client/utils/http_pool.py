@@ -0,0 +1,276 @@
+# utils/http_pool.py
+from __future__ import annotations
+import asyncio
+import importlib.util
+import ipaddress
+import os
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.logger import logger
+from mcp_client.utils.tracing import tracer
+
+if TYPE_CHECKING:
+    import httpx
+
+settings = get_settings()
+
+_PROXY_ENV = ("HTTPS_PROXY", "HTTP_PROXY", "ALL_PROXY", "https_proxy", "http_proxy", "all_proxy")
+
+
+class _PoolStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.dns_hits = 0
+        self.dns_misses = 0
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+class _DnsCache:
+    """Cache hasil getaddrinfo (host, port) → IP selama ``ttl`` detik."""
+
+    def __init__(self, ttl: float, stats: _PoolStats):
+        self.ttl = ttl
+        self.stats = stats
+        self._entries: Dict[Tuple[str, int], Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_ip(host: str) -> bool:
+        try:
+            ipaddress.ip_address(host)
+            return True
+        except ValueError:
+            return False
+
+    def get(self, host: str, port: int) -> Optional[str]:
+        if self._is_ip(host) or host == "localhost":
+            return host
+        with self._lock:
+            entry = self._entries.get((host, port))
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            self.stats.incr("dns_hits")
+            return entry[1]
+        self.stats.incr("dns_misses")
+        return None
+
+    def put(self, host: str, port: int, infos: List[Any]) -> str:
+        address = infos[0][4][0]
+        with self._lock:
+            self._entries[(host, port)] = (time.monotonic(), address)
+        return address
+
+    def invalidate(self, host: str, port: int) -> None:
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+def _make_backends(dns: _DnsCache, stats: _PoolStats) -> Tuple[Any, Any]:
+    """Network backend httpcore (async & sync) dengan DNS cache + hitung koneksi baru.
+
+    SNI/verifikasi TLS tetap memakai hostname asli (httpcore mengirim
+    ``server_hostname`` dari origin request), hanya socket TCP yang memakai IP.
+    """
+    import httpcore
+
+    class _AsyncBackend(httpcore.AnyIOBackend):
+        async def connect_tcp(self, host, port, *args, **kwargs):  # type: ignore[override]
+            address = dns.get(host, port)
+            if address is None:
+                infos = await asyncio.get_running_loop().getaddrinfo(
+                    host, port, type=socket.SOCK_STREAM
+                )
+                address = dns.put(host, port, infos)
+            stats.incr("new_connections")
+            try:
+                return await super().connect_tcp(address, port, *args, **kwargs)
+            except httpcore.ConnectError:
+                dns.invalidate(host, port)
+                raise
+
+    class _SyncBackend(httpcore.SyncBackend):
+        def connect_tcp(self, host, port, *args, **kwargs):  # type: ignore[override]
+            address = dns.get(host, port)
+            if address is None:
+                address = dns.put(
+                    host, port, socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+                )
+            stats.incr("new_connections")
+            try:
+                return super().connect_tcp(address, port, *args, **kwargs)
+            except httpcore.ConnectError:
+                dns.invalidate(host, port)
+                raise
+
+    return _AsyncBackend(), _SyncBackend()
+
+
+class HttpPool:
+    """Transport HTTP bersama untuk OpenAI (chat), answer cache & mem0.
+
+    Satu ``httpx.AsyncClient`` (AsyncOpenAI MCPClient) dan satu
+    ``httpx.Client`` sinkron (client OpenAI internal mem0 yang dipanggil di
+    thread) dengan limit pool, keep-alive, HTTP/2 dan DNS cache yang sama.
+    """
+
+    def __init__(self) -> None:
+        self.stats = _PoolStats()
+        self.dns = _DnsCache(settings.http_dns_ttl_sec, self.stats)
+        self._async: Optional["httpx.AsyncClient"] = None
+        self._sync: Optional["httpx.Client"] = None
+        self._backends: Optional[Tuple[Any, Any]] = None
+        self._lock = threading.Lock()
+        tracer.register_collector(self.render_prometheus)
+
+    # ------------- konfigurasi ---------------------------------------
+    @staticmethod
+    def _http2() -> bool:
+        if settings.http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("[http_pool] Paket 'h2' tidak ada, fallback ke HTTP/1.1")
+            return False
+        return settings.http2
+
+    def _limits(self) -> "httpx.Limits":
+        import httpx
+
+        return httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive,
+            keepalive_expiry=settings.http_keepalive_expiry_sec,
+        )
+
+    def _pool_kwargs(self, http2: bool) -> Dict[str, Any]:
+        import httpx
+
+        limits = self._limits()
+        return {
+            "ssl_context": httpx.create_ssl_context(),
+            "max_connections": limits.max_connections,
+            "max_keepalive_connections": limits.max_keepalive_connections,
+            "keepalive_expiry": limits.keepalive_expiry,
+            "http1": True,
+            "http2": http2,
+        }
+
+    @staticmethod
+    def _use_proxy() -> bool:
+        # Proxy dari ENV: biarkan httpx yang memasang transport proxy-nya
+        return any(os.getenv(name) for name in _PROXY_ENV)
+
+    def _get_backends(self) -> Tuple[Any, Any]:
+        if self._backends is None:
+            self._backends = _make_backends(self.dns, self.stats)
+        return self._backends
+
+    # ------------- client --------------------------------------------
+    def async_client(self) -> "httpx.AsyncClient":
+        if self._async is None or self._async.is_closed:
+            import httpcore
+            import httpx
+
+            http2 = self._http2()
+            transport = None
+            if not self._use_proxy():
+                transport = httpx.AsyncHTTPTransport(http2=http2, limits=self._limits())
+                transport._pool = httpcore.AsyncConnectionPool(  # type: ignore[attr-defined]
+                    **self._pool_kwargs(http2), network_backend=self._get_backends()[0]
+                )
+
+            async def _count(_request: "httpx.Request") -> None:
+                self.stats.incr("requests")
+
+            self._async = httpx.AsyncClient(
+                http2=http2,
+                limits=self._limits(),
+                timeout=httpx.Timeout(settings.http_timeout_sec, connect=10.0),
+                transport=transport,
+                event_hooks={"request": [_count]},
+            )
+        return self._async
+
+    def sync_client(self) -> "httpx.Client":
+        with self._lock:
+            if self._sync is None or self._sync.is_closed:
+                import httpcore
+                import httpx
+
+                http2 = self._http2()
+                transport = None
+                if not self._use_proxy():
+                    transport = httpx.HTTPTransport(http2=http2, limits=self._limits())
+                    transport._pool = httpcore.ConnectionPool(  # type: ignore[attr-defined]
+                        **self._pool_kwargs(http2), network_backend=self._get_backends()[1]
+                    )
+
+                self._sync = httpx.Client(
+                    http2=http2,
+                    limits=self._limits(),
+                    timeout=httpx.Timeout(settings.http_timeout_sec, connect=10.0),
+                    transport=transport,
+                    event_hooks={"request": [lambda _r: self.stats.incr("requests")]},
+                )
+            return self._sync
+
+    async def aclose(self) -> None:
+        if self._async is not None:
+            await self._async.aclose()
+            self._async = None
+        if self._sync is not None:
+            await asyncio.to_thread(self._sync.close)
+            self._sync = None
+
+    # ------------- metrik --------------------------------------------
+    @staticmethod
+    def _pool_usage(client: Any) -> Tuple[int, int]:
+        """(koneksi terbuka, koneksi aktif) dari pool httpcore client."""
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        conns = getattr(pool, "connections", None) or []
+        open_ = [c for c in conns if not c.is_closed()]
+        return len(open_), sum(1 for c in open_ if not c.is_idle())
+
+    def snapshot(self) -> Dict[str, Any]:
+        s = self.stats
+        open_async, active_async = self._pool_usage(self._async)
+        open_sync, active_sync = self._pool_usage(self._sync)
+        active = active_async + active_sync
+        reused = max(0, s.requests - s.new_connections)
+        return {
+            "requests": s.requests,
+            "new_connections": s.new_connections,
+            "reuse_ratio": round(reused / s.requests, 4) if s.requests else 0.0,
+            "open_connections": open_async + open_sync,
+            "active_connections": active,
+            "utilization": round(active / settings.http_max_connections, 4),
+            "dns_hits": s.dns_hits,
+            "dns_misses": s.dns_misses,
+        }
+
+    def render_prometheus(self) -> str:
+        snap = self.snapshot()
+        return "\n".join(
+            [
+                "# TYPE projectwise_http_requests_total counter",
+                f"projectwise_http_requests_total {snap['requests']}",
+                "# TYPE projectwise_http_new_connections_total counter",
+                f"projectwise_http_new_connections_total {snap['new_connections']}",
+                "# TYPE projectwise_http_connection_reuse_ratio gauge",
+                f"projectwise_http_connection_reuse_ratio {snap['reuse_ratio']}",
+                "# TYPE projectwise_http_pool_active_connections gauge",
+                f"projectwise_http_pool_active_connections {snap['active_connections']}",
+                "# TYPE projectwise_http_pool_utilization gauge",
+                f"projectwise_http_pool_utilization {snap['utilization']}",
+                "# TYPE projectwise_http_dns_cache_hits_total counter",
+                f"projectwise_http_dns_cache_hits_total {snap['dns_hits']}",
+            ]
+        )
+
+
+http_pool = HttpPool()
@@ -1,8 +1,16 @@
 from __future__ import annotations
 import json
+import re
+import time
 from pydantic import BaseModel, Field, ValidationError
 from typing import Literal
+from mcp_client.settings import get_settings
+from mcp_client.utils.cascade import model_cascade
 from mcp_client.utils.logger import logger
+from mcp_client.utils.prompt_registry import prompt_registry
+from mcp_client.utils.usage import usage_ledger
+
+settings = get_settings()
 
 
 class IntentRoute(BaseModel):
@@ -10,119 +18,170 @@ class IntentRoute(BaseModel):
     confidence_score: float = Field(ge=0, le=1)
 
 
+# -------- fast path lokal (tanpa LLM) --------------------------
+_KAK_TRIGGERS = (
+    "analisa", "analisis", "summary", "summaries", "analyze", "analyzer", "ringkas",
+)
+_DOCGEN_TRIGGERS = (
+    "buatkan dokumen", "buat proposal", "buatkan proposal", "proposal teknis",
+    "proposal harga", "generate dokument", "generate document", "buatkan document",
+)
+_FILLER_RE = re.compile(r"\b(dong|ya|nih|deh|saya|ini)\b")
+_QUESTION_WORDS = ("apa", "berapa", "siapa", "kapan", "bagaimana", "mengapa", "dimana")
+
+
+def classify_intent_local(query: str) -> IntentRoute:
+    """Router keyword dari aturan prompt; dipakai saat beban tinggi.
+
+    Pertanyaan biasa → other; kata pemicu tanpa nama proyek → other
+    (perlu klarifikasi), sama seperti few-shot router LLM.
+    """
+    q = query.lower().strip()
+    words = q.replace("?", " ").split()
+    if words and words[0] in _QUESTION_WORDS:
+        return IntentRoute(intent="other", confidence_score=0.8)
+    rest = q.split("proyek", 1)[1] if "proyek" in q else ""
+    has_project = bool(_FILLER_RE.sub("", rest).strip(" ?.!,"))
+    if any(t in q for t in _DOCGEN_TRIGGERS):
+        return IntentRoute(intent="generate_document", confidence_score=0.85)
+    if any(t in q for t in _KAK_TRIGGERS) and has_project:
+        return IntentRoute(intent="kak_analyzer", confidence_score=0.85)
+    return IntentRoute(intent="other", confidence_score=0.75)
+
+
+# -------- prompt router (statis, dibangun sekali saat import) ----
+_ROUTER_SYSTEM = (
+    # ------------------------------------------------------------------
+    # KONTEXT & PERAN
+    # ------------------------------------------------------------------
+    "Anda adalah *AI ProjectWise* assistant cerdas untuk tim Presales & Project Manager.\n"
+    "Tugas: menganalisis setiap pesan user, lalu memilih SATU dari tiga intent:\n"
+    "  • kak_analyzer        → user MEMINTA analisis atau ringkasan KAK/TOR/proyek.\n"
+    "  • generate_document   → user MEMINTA pembuatan dokumen/proposal.\n"
+    "  • other               → di luar dua kategori di atas.\n"
+    " Jika user MEMINTA analisis proyek tetapi tidak memberikan informasi nama proyeknya, "
+    " Mintalah klafirikasi."
+    "\n"
+    # ------------------------------------------------------------------
+    # FORMAT KELUARAN WAJIB
+    # ------------------------------------------------------------------
+    "Kembalikan *hanya* JSON valid persis sesuai skema:\n"
+    '  {"intent":"<kak_analyzer|generate_document|other>", "confidence_score":0.xx}\n'
+    "JANGAN menambah properti lain.\n"
+    "\n"
+    # ------------------------------------------------------------------
+    # ATURAN KLASIFIKASI
+    # ------------------------------------------------------------------
+    "• Gunakan *kata kunci pemicu* berikut:\n"
+    '  – kak_analyzer: "analisa", "analisis", "summary", "summaries", "analyze", '
+    '"analyzer", "analisa ruang lingkup", "ringkas proyek", "analisa proyek".\n'
+    '  – generate_document: "buatkan dokumen", "buat proposal", "proposal teknis", '
+    '"proposal teknis dan penawaran", "proposal harga", "generate dokument", '
+    '"generate document", "buatkan document".\n'
+    "• Bila pesan HANYA pertanyaan/informasi tanpa permintaan aksi ⇒ intent = *other*.\n"
+    "• Jika kata kunci pemicu terdeteksi untuk intent dan nama proyek tidak diberikan,"
+    "dengan jelas. Anda WAJIB KLARIFIKASI.\n"
+    "• confidence_score selalu 0‑1; gunakan penilaian sendiri, tidak ada ambang tetap.\n"
+    "\n"
+    # ------------------------------------------------------------------
+    # PERILAKU SESUDAH KLASIFIKASI
+    # ------------------------------------------------------------------
+    "• Jika intent = kak_analyzer *atau* generate_document → "
+    "KEMBALIKAN JSON saja (jangan jawab isi permintaan).\n"
+    "• Jika intent = other → Anda boleh langsung menjawab pertanyaan user "
+    "tanpa memanggil tool *kecuali* Anda menilai tool diperlukan.\n"
+    "\n"
+)
+
+# Few-shot sebagai dialog — 4 contoh “golden”
+_ROUTER_FEWSHOT = [
+    {"role": "user", "content": "Analisa proyek Bank Sumsel Babel"},
+    {
+        "role": "assistant",
+        "content": '{"intent":"kak_analyzer","confidence_score":0.95}',
+    },
+    {"role": "user", "content": "Buat summaries/summary proyek Bank Sumsel Babel"},
+    {
+        "role": "assistant",
+        "content": '{"intent":"kak_analyzer","confidence_score":0.95}',
+    },
+    {
+        "role": "user",
+        "content": "Apa saja barang dan jasa di dalam proyek bank sumsel babel?",
+    },
+    {
+        "role": "assistant",
+        "content": '{"intent":"other","confidence_score":0.92}',
+    },
+    {
+        "role": "user",
+        "content": "Berapa SLA di dalam proyek bank sumsel babel?",
+    },
+    {
+        "role": "assistant",
+        "content": '{"intent":"other","confidence_score":0.92}',
+    },
+    {
+        "role": "user",
+        "content": "Berikan informasi terkait proyek bank sumsel babel?",
+    },
+    {
+        "role": "assistant",
+        "content": '{"intent":"other","confidence_score":0.92}',
+    },
+    {"role": "user", "content": "Buatkan proposal implementasi Switch Core"},
+    {
+        "role": "assistant",
+        "content": '{"intent":"generate_document","confidence_score":0.9}',
+    },
+    {"role": "user", "content": "Berapa harga Bitcoin hari ini?"},
+    {"role": "assistant", "content": '{"intent":"other","confidence_score":0.88}'},
+    {"role": "user", "content": "Bantu saya analisa proyek dong."},
+    {"role": "assistant", "content": '{"intent":"other","confidence_score":0.80}'},
+]
+
+_ROUTER_PREFIX = ({"role": "system", "content": _ROUTER_SYSTEM}, *_ROUTER_FEWSHOT)
+prompt_registry.register(
+    "router", "\n".join(m["content"] for m in _ROUTER_PREFIX)
+)
+
+
 # -------- classifier -------------------------------------------
 async def classify_intent(llm, query: str, model: str = "gpt-4o") -> IntentRoute:
     """
     Kembalikan IntentRoute; jika model gagal, default => other, score 0.0
+
+    Dengan cascade aktif, model cepat dicoba dulu dan eskalasi ke *model*
+    bila JSON tidak valid atau confidence di bawah ``cascade_min_confidence``.
     """
-    system_msg = (
-        # ------------------------------------------------------------------
-        # KONTEXT & PERAN
-        # ------------------------------------------------------------------
-        "Anda adalah *AI ProjectWise* assistant cerdas untuk tim Presales & Project Manager.\n"
-        "Tugas: menganalisis setiap pesan user, lalu memilih SATU dari tiga intent:\n"
-        "  • kak_analyzer        → user MEMINTA analisis atau ringkasan KAK/TOR/proyek.\n"
-        "  • generate_document   → user MEMINTA pembuatan dokumen/proposal.\n"
-        "  • other               → di luar dua kategori di atas.\n"
-        " Jika user MEMINTA analisis proyek tetapi tidak memberikan informasi nama proyeknya, "
-        " Mintalah klafirikasi."
-        "\n"
-        # ------------------------------------------------------------------
-        # FORMAT KELUARAN WAJIB
-        # ------------------------------------------------------------------
-        "Kembalikan *hanya* JSON valid persis sesuai skema:\n"
-        '  {"intent":"<kak_analyzer|generate_document|other>", "confidence_score":0.xx}\n'
-        "JANGAN menambah properti lain.\n"
-        "\n"
-        # ------------------------------------------------------------------
-        # ATURAN KLASIFIKASI
-        # ------------------------------------------------------------------
-        "• Gunakan *kata kunci pemicu* berikut:\n"
-        '  – kak_analyzer: "analisa", "analisis", "summary", "summaries", "analyze", '
-        '"analyzer", "analisa ruang lingkup", "ringkas proyek", "analisa proyek".\n'
-        '  – generate_document: "buatkan dokumen", "buat proposal", "proposal teknis", '
-        '"proposal teknis dan penawaran", "proposal harga", "generate dokument", '
-        '"generate document", "buatkan document".\n'
-        "• Bila pesan HANYA pertanyaan/informasi tanpa permintaan aksi ⇒ intent = *other*.\n"
-        "• Jika kata kunci pemicu terdeteksi untuk intent dan nama proyek tidak diberikan,"
-        "dengan jelas. Anda WAJIB KLARIFIKASI.\n"
-        "• confidence_score selalu 0‑1; gunakan penilaian sendiri, tidak ada ambang tetap.\n"
-        "\n"
-        # ------------------------------------------------------------------
-        # PERILAKU SESUDAH KLASIFIKASI
-        # ------------------------------------------------------------------
-        "• Jika intent = kak_analyzer *atau* generate_document → "
-        "KEMBALIKAN JSON saja (jangan jawab isi permintaan).\n"
-        "• Jika intent = other → Anda boleh langsung menjawab pertanyaan user "
-        "tanpa memanggil tool *kecuali* Anda menilai tool diperlukan.\n"
-        "\n"
-    )
-
-    # Few-shot sebagai dialog — 4 contoh “golden”
-    fewshot = [
-        {"role": "user", "content": "Analisa proyek Bank Sumsel Babel"},
-        {
-            "role": "assistant",
-            "content": '{"intent":"kak_analyzer","confidence_score":0.95}',
-        },
-        {"role": "user", "content": "Buat summaries/summary proyek Bank Sumsel Babel"},
-        {
-            "role": "assistant",
-            "content": '{"intent":"kak_analyzer","confidence_score":0.95}',
-        },
-        {
-            "role": "user",
-            "content": "Apa saja barang dan jasa di dalam proyek bank sumsel babel?",
-        },
-        {
-            "role": "assistant",
-            "content": '{"intent":"other","confidence_score":0.92}',
-        },
-        {
-            "role": "user",
-            "content": "Berapa SLA di dalam proyek bank sumsel babel?",
-        },
-        {
-            "role": "assistant",
-            "content": '{"intent":"other","confidence_score":0.92}',
-        },
-        {
-            "role": "user",
-            "content": "Berikan informasi terkait proyek bank sumsel babel?",
-        },
-        {
-            "role": "assistant",
-            "content": '{"intent":"other","confidence_score":0.92}',
-        },
-        {"role": "user", "content": "Buatkan proposal implementasi Switch Core"},
-        {
-            "role": "assistant",
-            "content": '{"intent":"generate_document","confidence_score":0.9}',
-        },
-        {"role": "user", "content": "Berapa harga Bitcoin hari ini?"},
-        {"role": "assistant", "content": '{"intent":"other","confidence_score":0.88}'},
-        {"role": "user", "content": "Bantu saya analisa proyek dong."},
-        {"role": "assistant", "content": '{"intent":"other","confidence_score":0.80}'},
-    ]
-
-    messages = [
-        {"role": "system", "content": system_msg},
-        *fewshot,
-        {"role": "user", "content": query},
-    ]
+    # prefix statis (system + few-shot) identik di setiap panggilan → prefix cache
+    messages = [*_ROUTER_PREFIX, {"role": "user", "content": query}]
 
-    try:
+    async def _attempt(tier_model: str) -> IntentRoute:
+        tic = time.perf_counter()
         resp = await llm.chat.completions.parse(
-            model=model,
+            model=tier_model,
             temperature=0,
             top_p=0,
             messages=messages,
             response_format=IntentRoute,
         )
+        usage_ledger.record(
+            "router", resp, model=tier_model, latency=time.perf_counter() - tic
+        )
         raw_json = resp.choices[0].message.content
-        logger.info(f"Raw router output: {raw_json}")
+        logger.info(f"Raw router output ({tier_model}): {raw_json}")
 
         return IntentRoute.model_validate_json(raw_json)
+
+    try:
+        route, _ = await model_cascade.run(
+            "router",
+            model,
+            _attempt,
+            lambda r: r.confidence_score >= settings.cascade_min_confidence,
+        )
+        return route
     except (ValidationError, json.JSONDecodeError) as ve:
         logger.info(f"Router JSON parse error: {ve}")
     except Exception as e:
@@ -1,6 +1,15 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Any
 
 
 # Buat folder logs jika belum ada
@@ -16,23 +25,136 @@ elif "mcp_client" in str(caller_path):
 else:
     log_file = log_dir / "mcp_generic.log"
 
+# Konfigurasi via ENV (logger di-load sebelum Settings; jangan bergantung padanya)
+LOG_CONSOLE_LEVEL = os.getenv("LOG_CONSOLE_LEVEL", "INFO").upper()
+LOG_FILE_FORMAT = os.getenv("LOG_FILE_FORMAT", "json").lower()  # json | text
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "300"))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+
+# trace_id aktif per task asyncio; di-set oleh MCPClient.process_query
+trace_id_var: ContextVar[str] = ContextVar("trace_id", default="-")
+
+
+class _TraceIdFilter(logging.Filter):
+    """Tempelkan trace_id konteks saat ini ke setiap record (di sisi pemanggil)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "trace_id"):
+            record.trace_id = trace_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Satu baris JSON per record: ts, level, logger, trace_id, msg (+ payload)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "msg": record.getMessage(),
+        }
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            data["payload"] = payload
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Format teks biasa; field ``payload`` (jika ada) ditempel di akhir baris."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            text += f" payload={json.dumps(payload, ensure_ascii=False, default=str)}"
+        return text
+
+
+def append_jsonl(path: Path, line: str) -> None:
+    """Tambahkan satu baris ke file JSONL, dirotasi seperti file log
+    (``LOG_MAX_BYTES``, ``LOG_BACKUP_COUNT``: file.1 … file.N)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        size = 0
+    if LOG_MAX_BYTES > 0 and size and size + len(line) > LOG_MAX_BYTES:
+        for i in range(LOG_BACKUP_COUNT - 1, 0, -1):
+            src = path.with_name(f"{path.name}.{i}")
+            if src.exists():
+                os.replace(src, path.with_name(f"{path.name}.{i + 1}"))
+        if LOG_BACKUP_COUNT > 0:
+            os.replace(path, path.with_name(f"{path.name}.1"))
+        else:
+            path.unlink(missing_ok=True)
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write(line + "\n")
+
+
+def payload_repr(value: Any, max_chars: int = LOG_PAYLOAD_MAX_CHARS) -> Any:
+    """Ringkas payload besar (args tool, JSON ringkasan) sebelum di-log.
+
+    String panjang dipotong menjadi ``awal…(+N chars)``; dict/list diproses
+    rekursif. Sebagian kecil record (``LOG_PAYLOAD_SAMPLE_RATE``) dibiarkan
+    utuh sebagai sampel untuk debugging.
+    """
+    if random.random() < LOG_PAYLOAD_SAMPLE_RATE:
+        return value
+    return _truncate(value, max_chars)
+
+
+def _truncate(value: Any, max_chars: int) -> Any:
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return f"{value[:max_chars]}…(+{len(value) - max_chars} chars)"
+    if isinstance(value, dict):
+        return {k: _truncate(v, max_chars) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_truncate(v, max_chars) for v in value]
+    return value
+
+
 logger = logging.getLogger("MCPLogger")
 logger.setLevel(logging.DEBUG)
 
-# File handler
-file_handler = logging.FileHandler(log_file)
+# File handler (rotating, JSON terstruktur)
+file_handler = RotatingFileHandler(
+    log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+)
 file_handler.setLevel(logging.DEBUG)
 file_handler.setFormatter(
-    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    JsonFormatter()
+    if LOG_FILE_FORMAT == "json"
+    else TextFormatter(
+        "%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s"
+    )
 )
-logger.addHandler(file_handler)
 
 # Console handler
 console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.INFO)
+console_handler.setLevel(LOG_CONSOLE_LEVEL)
 console_handler.setFormatter(
-    logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    TextFormatter("%(asctime)s - %(levelname)s - %(message)s")
+)
+
+# Event loop hanya menaruh record ke queue; I/O disk & console di thread listener
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+queue_handler = QueueHandler(_log_queue)
+queue_handler.addFilter(_TraceIdFilter())
+logger.addHandler(queue_handler)
+logger.propagate = False
+
+_listener = QueueListener(
+    _log_queue, file_handler, console_handler, respect_handler_level=True
 )
-logger.addHandler(console_handler)
+_listener.start()
+atexit.register(_listener.stop)
 
 logger.debug(f"Logger initialized from {caller_path}, writing to {log_file}")
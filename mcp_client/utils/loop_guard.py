@@ -0,0 +1,166 @@
+# utils/loop_guard.py
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import threading
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.logger import logger
+from mcp_client.utils.tool_result import ToolResult
+from mcp_client.utils.tracing import tracer
+
+settings = get_settings()
+
+_FAILURE_PREFIXES = ("Error executing", "TIMEOUT executing")
+
+
+def _canonical(args: Dict[str, Any]) -> str:
+    return json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", "ignore")).hexdigest()[:12]
+
+
+def _is_failure(result: Any) -> bool:
+    """Hasil tool yang menandakan kegagalan (string error atau status failure)."""
+    if isinstance(result, ToolResult):
+        return not result.ok
+    if not isinstance(result, str):
+        return False
+    if result.startswith(_FAILURE_PREFIXES):
+        return True
+    if result.startswith("{"):
+        try:
+            status = json.loads(result).get("status")
+        except Exception:
+            return False
+        return status in ("failure", "error")
+    return False
+
+
+class _LoopStats:
+    """Statistik global loop guard per call-site (diekspor ke Prometheus)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.trips: Dict[str, int] = defaultdict(int)
+        self.duplicates_served: Dict[str, int] = defaultdict(int)
+        self.turns_avoided: Dict[str, int] = defaultdict(int)
+        tracer.register_collector(self.render_prometheus)
+
+    def add(self, call_site: str, **counts: int) -> None:
+        with self._lock:
+            for name, n in counts.items():
+                getattr(self, name)[call_site] += n
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            sites = set(self.trips) | set(self.duplicates_served)
+            return {
+                site: {
+                    "trips": self.trips.get(site, 0),
+                    "duplicates_served": self.duplicates_served.get(site, 0),
+                    "turns_avoided": self.turns_avoided.get(site, 0),
+                }
+                for site in sorted(sites)
+            }
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in ("trips", "duplicates_served", "turns_avoided"):
+            name = f"projectwise_loop_guard_{metric}_total"
+            lines.append(f"# TYPE {name} counter")
+            for site, n in sorted(getattr(self, metric).items()):
+                lines.append(f'{name}{{call_site="{site}"}} {n}')
+        return "\n".join(lines)
+
+
+loop_stats = _LoopStats()
+
+
+class LoopGuard:
+    """Deteksi loop tool-calling dalam satu run pipeline.
+
+    Tiap turn di-fingerprint sebagai himpunan (tool, argumen kanonik, hash
+    hasil). Panggilan dengan (tool, argumen) yang sama dilayani dari cache
+    run ini tanpa menyentuh MCP Server. Guard "trip" bila ada panggilan
+    duplikat, fingerprint turn berulang, atau tool yang sama gagal
+    ``max_failures`` kali; setelah itu ``tool_choice`` dipaksa ``"none"``
+    agar LLM memberi jawaban final.
+    """
+
+    def __init__(self, call_site: str, max_failures: Optional[int] = None):
+        self.call_site = call_site
+        self.max_failures = max_failures or settings.loop_guard_max_failures
+        self.tripped: Optional[str] = None
+        self._results: Dict[Tuple[str, str], "asyncio.Future[Any]"] = {}
+        self._failures: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._seen_turns: Set[FrozenSet[Tuple[str, str, str]]] = set()
+        self._turn: List[Tuple[str, str, str]] = []
+        self._turn_duplicates = 0
+
+    @property
+    def tool_choice(self) -> Optional[str]:
+        """``"none"`` setelah guard trip; None = biarkan pilihan pemanggil."""
+        return "none" if self.tripped else None
+
+    async def call(
+        self, name: str, args: Dict[str, Any], execute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Eksekusi tool via *execute*, atau kembalikan hasil identik sebelumnya."""
+        key = (name, _canonical(args))
+        cached = self._results.get(key)
+        if cached is not None:
+            self._turn_duplicates += 1
+            loop_stats.add(self.call_site, duplicates_served=1)
+            logger.info(f"[loop_guard] {self.call_site}: '{name}' duplikat, pakai cache")
+            return await cached
+
+        task = asyncio.ensure_future(execute())
+        self._results[key] = task
+        try:
+            result = await task
+        except Exception:
+            self._forget_failure(key, task)
+            raise
+        if _is_failure(result):
+            # kegagalan tidak di-cache agar retry sekali tetap mungkin
+            self._forget_failure(key, task)
+        self._turn.append((name, key[1], _digest(str(result))))
+        return result
+
+    def _forget_failure(self, key: Tuple[str, str], task: "asyncio.Future[Any]") -> None:
+        if self._results.get(key) is task:
+            del self._results[key]
+        self._failures[key] += 1
+
+    def end_turn(self, turn: int, max_turns: int) -> bool:
+        """Evaluasi turn yang baru selesai (0-based); True jika guard trip."""
+        fingerprint = frozenset(self._turn)
+        reason: Optional[str] = None
+        if self._turn_duplicates:
+            reason = "panggilan tool duplikat"
+        elif fingerprint and fingerprint in self._seen_turns:
+            reason = "turn berulang"
+        elif any(n >= self.max_failures for n in self._failures.values()):
+            reason = "tool gagal berulang"
+        if fingerprint:
+            self._seen_turns.add(fingerprint)
+        self._turn = []
+        self._turn_duplicates = 0
+
+        if reason and not self.tripped:
+            self.tripped = reason
+            # sisa budget dikurangi satu turn final yang dipaksa
+            avoided = max(0, max_turns - (turn + 1) - 1)
+            loop_stats.add(self.call_site, trips=1, turns_avoided=avoided)
+            tracer.annotate(loop_guard=reason)
+            logger.warning(
+                f"[loop_guard] {self.call_site}: {reason} di turn {turn + 1}; "
+                f"paksa jawaban final (hemat ±{avoided} turn)"
+            )
+        return self.tripped is not None
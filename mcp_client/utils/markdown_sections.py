@@ -0,0 +1,70 @@
+# utils/markdown_sections.py
+from __future__ import annotations
+import re
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, List
+
+from mcp_client.utils.memory_index import tokenize
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+
+
+@dataclass
+class Section:
+    title: str
+    level: int  # 0 = teks sebelum heading pertama
+    text: str  # heading + isi
+
+    @property
+    def tokens(self) -> FrozenSet[str]:
+        return tokenize(self.text)
+
+
+def split_sections(markdown: str) -> List[Section]:
+    """Pecah markdown per heading (``#`` s/d ``######``), abaikan blok kode."""
+    sections: List[Section] = []
+    title, level, lines = "", 0, []
+    in_code = False
+    for line in markdown.splitlines():
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        match = None if in_code else _HEADING_RE.match(line)
+        if match:
+            if any(l.strip() for l in lines):
+                sections.append(Section(title, level, "\n".join(lines).strip()))
+            title, level, lines = match.group(2), len(match.group(1)), [line]
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append(Section(title, level, "\n".join(lines).strip()))
+    return sections
+
+
+def placeholder_terms(name: str) -> FrozenSet[str]:
+    """Kata kunci placeholder template: ``ruang_lingkup_pekerjaan`` → {ruang, lingkup, ...}."""
+    return tokenize(name.replace("_", " "))
+
+
+def select_sections(
+    sections: List[Section], terms: Iterable[str], max_chars: int
+) -> List[Section]:
+    """Section paling relevan untuk ``terms`` (judul berbobot 2×) dalam batas karakter.
+
+    Urutan dokumen dipertahankan; section tanpa kata kunci yang cocok tidak
+    diambil.
+    """
+    wanted = frozenset(terms)
+    scored = []
+    for i, sec in enumerate(sections):
+        score = 2 * len(wanted & tokenize(sec.title)) + len(wanted & sec.tokens)
+        if score:
+            scored.append((score, i, sec))
+    scored.sort(key=lambda row: (-row[0], row[1]))
+
+    picked, used = [], 0
+    for _, i, sec in scored:
+        if used + len(sec.text) > max_chars:
+            continue
+        picked.append((i, sec))
+        used += len(sec.text)
+    return [sec for _, sec in sorted(picked, key=lambda row: row[0])]
@@ -1,16 +1,20 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Set
 import os
 import asyncio
+import time
 
-from dotenv import load_dotenv
-from mem0 import AsyncMemory
-from mcp_client.settings import Settings
+from mcp_client.settings import get_settings
+from mcp_client.utils.http_pool import http_pool
+from mcp_client.utils.memory_hygiene import MemoryConsolidator, WriteFilter
+from mcp_client.utils.memory_index import memory_index, mem0_results
+from mcp_client.utils.tracing import tracer
+from mcp_client.utils.usage import usage_ledger
 
-settings = Settings()  # type: ignore
+if TYPE_CHECKING:
+    from mem0 import AsyncMemory
 
-
-load_dotenv()
+settings = get_settings()
 
 # -----------------------------------------------------
 #  Konfigurasi default – dapat dioverride via env/file
@@ -23,15 +27,26 @@ def _default_config() -> Dict[str, Any]:
     Nilai dapat dioverride via ENV:
     • MEM0_VECTOR_HOST, MEM0_VECTOR_PORT
     • OPENAI_API_KEY, MEM0_LLM_MODEL, MEM0_EMBED_MODEL
+    • MEMORY_BACKEND=embedded → vector store NumPy in-process (tanpa Qdrant)
     """
 
+    if settings.memory_backend == "embedded":
+        # mem0 hanya menerima provider bawaan; Qdrant lokal (tanpa server) dipakai
+        # sebagai placeholder lalu diganti EmbeddedVectorStore di Mem0Manager.init
+        vector_config: Dict[str, Any] = {
+            "path": os.path.join(settings.embedded_store_path, ".qdrant_bootstrap"),
+            "on_disk": False,
+        }
+    else:
+        vector_config = {
+            "host": os.getenv("MEM0_VECTOR_HOST", "localhost"),
+            "port": int(os.getenv("MEM0_VECTOR_PORT", "6333")),
+        }
+
     return {
         "vector_store": {
             "provider": "qdrant",
-            "config": {
-                "host": os.getenv("MEM0_VECTOR_HOST", "localhost"),
-                "port": int(os.getenv("MEM0_VECTOR_PORT", "6333")),
-            },
+            "config": vector_config,
         },
         "llm": {
             "provider": "openai",
@@ -54,6 +69,42 @@ def _default_config() -> Dict[str, Any]:
     }
 
 
+def share_http_pool(memory: AsyncMemory) -> None:
+    """Arahkan client OpenAI internal mem0 (LLM & embedder) ke pool HTTP bersama."""
+    for component in (getattr(memory, "llm", None), getattr(memory, "embedding_model", None)):
+        client = getattr(component, "client", None)
+        if client is not None and hasattr(client, "with_options"):
+            component.client = client.with_options(http_client=http_pool.sync_client())  # type: ignore[union-attr]
+
+
+def use_embedded_store(memory: AsyncMemory) -> None:
+    """Ganti vector store mem0 dengan EmbeddedVectorStore (per-user, memmap)."""
+    from mcp_client.utils.embedded_store import EmbeddedVectorStore
+
+    placeholder = memory.vector_store
+    client = getattr(placeholder, "client", None)
+    if client is not None and hasattr(client, "close"):
+        client.close()
+    memory.vector_store = EmbeddedVectorStore(
+        path=settings.embedded_store_path,
+        collection_name=memory.collection_name,
+        embedding_model_dims=memory.config.vector_store.config.embedding_model_dims,
+    )
+
+
+def _instrument_usage(memory: AsyncMemory) -> None:
+    """Catat pemakaian token client OpenAI internal mem0 (jika tersedia)."""
+    llm_client = getattr(getattr(memory, "llm", None), "client", None)
+    completions = getattr(getattr(llm_client, "chat", None), "completions", None)
+    if completions is not None and hasattr(completions, "create"):
+        completions.create = usage_ledger.wrap_sync(completions.create, "mem0.llm")
+
+    embed_client = getattr(getattr(memory, "embedding_model", None), "client", None)
+    embeddings = getattr(embed_client, "embeddings", None)
+    if embeddings is not None and hasattr(embeddings, "create"):
+        embeddings.create = usage_ledger.wrap_sync(embeddings.create, "mem0.embed")
+
+
 class Mem0Manager:
     """Wrapper asinkron untuk mem0 AsyncMemory agar lebih modular."""
 
@@ -62,6 +113,13 @@ class Mem0Manager:
         self._memory: Optional[AsyncMemory] = None
         # lock sederhana agar init hanya terjadi sekali
         self._init_lock = asyncio.Lock()
+        self.index = memory_index
+        # prefetch yang sedang berjalan per user (dibagi antar request paralel)
+        self._opening: Dict[str, asyncio.Task] = {}
+        # user yang aktif di proses ini → target konsolidasi berkala
+        self.users: Set[str] = set()
+        self.write_filter = WriteFilter()
+        self.consolidator = MemoryConsolidator(self)
 
     # ------------- lifecycle -----------------------------------------
     async def init(self) -> None:
@@ -69,7 +127,29 @@ class Mem0Manager:
         if self._memory is None:
             async with self._init_lock:
                 if self._memory is None:  # cek ulang di dalam lock
+                    # import lazy: mem0 menarik qdrant-client, openai, dsb.
+                    from mem0 import AsyncMemory
+
                     self._memory = await AsyncMemory.from_config(self._config)
+                    if settings.memory_backend == "embedded":
+                        use_embedded_store(self._memory)
+                    share_http_pool(self._memory)
+                    _instrument_usage(self._memory)
+
+    async def warm_up(self) -> None:
+        """Buka koneksi keep-alive ke endpoint embedder mem0 (best effort)."""
+        await self.init()
+        client = getattr(self.memory.embedding_model, "client", None)
+        models = getattr(client, "models", None)
+        if models is None:
+            return
+        try:
+            # Client embedder mem0 sinkron → jalankan di thread
+            await asyncio.to_thread(
+                models.retrieve, self._config["embedder"]["config"]["model"]
+            )
+        except Exception as e:
+            print(f"[Mem0] Gagal warm-up embedder: {e}")
 
     @property
     def memory(self) -> AsyncMemory:
@@ -79,15 +159,70 @@ class Mem0Manager:
             )
         return self._memory
 
+    def start_consolidation(self, interval_sec: float) -> None:
+        """Jadwalkan konsolidasi memori berkala (lihat ``MemoryConsolidator``)."""
+        self.consolidator.start(interval_sec)
+
+    async def stop_consolidation(self) -> None:
+        await self.consolidator.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.index.stats(),
+            "writes": self.write_filter.stats(),
+            "consolidation": self.consolidator.stats(),
+        }
+
+    # ------------- sesi per user -------------------------------------
+    async def open_session(self, user_id: str = "default") -> None:
+        """Prefetch memori user yang paling sering dipakai ke partisi lokal."""
+        self.users.add(user_id)
+        if self.index.is_open(user_id):
+            return
+        task = self._opening.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(self._prefetch(user_id))
+            self._opening[user_id] = task
+            task.add_done_callback(lambda _t: self._opening.pop(user_id, None))
+        await asyncio.shield(task)
+
+    async def _prefetch(self, user_id: str) -> None:
+        await self.init()
+        scan = settings.memory_prefetch_scan
+        try:
+            with tracer.span("mem0.prefetch", user_id=user_id) as sp:
+                result = await self.memory.get_all(user_id=user_id, limit=scan)
+                items = mem0_results(result)
+                loaded = self.index.load(user_id, items, complete=len(items) < scan)
+                sp.set(memories=loaded)
+        except Exception as e:
+            # partisi kosong → semua query jatuh ke vector store tanpa prefetch ulang
+            print(f"[Mem0] Gagal prefetch memori {user_id}: {e}")
+            self.index.load(user_id, [], complete=False)
+
     # ------------- operasi utama -------------------------------------
     async def get_memories(
         self, query: str, *, user_id: str = "default", limit: int = 5
     ) -> List[str]:
-        """Cari memori relevan untuk *query* dan kembalikan list string."""
+        """Cari memori relevan untuk *query* dan kembalikan list string.
+
+        Partisi lokal user dicoba dulu; vector store hanya saat local miss.
+        """
+        tic = time.perf_counter()
+        await self.open_session(user_id)
+        local = self.index.lookup(user_id, query, limit)
+        if local is not None:
+            tracer.annotate(memory_source="local")
+            self.index.record(user_id, time.perf_counter() - tic, "local")
+            return local
         await self.init()
         try:
             result = await self.memory.search(query=query, user_id=user_id, limit=limit)
-            return [item["memory"] for item in result.get("results", [])]
+            items = mem0_results(result)
+            self.index.merge(user_id, items)
+            tracer.annotate(memory_source="store")
+            self.index.record(user_id, time.perf_counter() - tic, "store")
+            return [item["memory"] for item in items]
         except Exception as e:
             # Jangan memutus alur chatbot – cukup log & kembalikan list kosong
             print(f"[Mem0] Gagal search memory: {e}")
@@ -96,10 +231,19 @@ class Mem0Manager:
     async def add_conversation(
         self, messages: List[Dict[str, str]], *, user_id: str = "default"
     ) -> None:
-        """Simpan *messages* (urutan dialog) ke memori."""
+        """Simpan *messages* (urutan dialog) ke memori.
+
+        Balasan error/fallback dan turn yang nyaris duplikat tidak disimpan.
+        """
+        self.users.add(user_id)
+        reason = self.write_filter.check(user_id, messages)
+        if reason is not None:
+            tracer.annotate(memory_skipped=reason)
+            return
         await self.init()
         try:
-            await self.memory.add(messages=messages, user_id=user_id)
+            result = await self.memory.add(messages=messages, user_id=user_id)
+            self.index.apply_events(user_id, mem0_results(result))
         except Exception as e:
             print(f"[Mem0] Gagal menambah memori: {e}")
 
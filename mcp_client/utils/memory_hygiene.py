@@ -0,0 +1,276 @@
+# utils/memory_hygiene.py
+from __future__ import annotations
+import asyncio
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Deque, Dict, FrozenSet, Iterable, List, Optional
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.logger import logger
+from mcp_client.utils.memory_index import mem0_results, tokenize
+from mcp_client.utils.tracing import tracer
+
+if TYPE_CHECKING:
+    from mcp_client.utils.mem0_utils import Mem0Manager
+
+settings = get_settings()
+
+# Balasan fallback/error dari MCPClient & pipeline – tidak layak jadi memori
+_ERROR_REPLY_RE = re.compile(
+    r"^(Maaf, (terjadi kegagalan internal|sistem sedang sibuk|analisis KAK memerlukan"
+    r"|pembuatan proposal melebihi|saya belum bisa menyelesaikan)"
+    r"|Terjadi kesalahan saat |Error executing |TIMEOUT executing "
+    r"|Ringkasan kosong\.|Proses mencapai batas maksimum turn\."
+    r"|Placeholder masih belum lengkap)"
+)
+
+
+def is_error_reply(text: str) -> bool:
+    return bool(_ERROR_REPLY_RE.match(text.strip()))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+# ---------------------------------------------------------------------------
+#  Filter sisi tulis
+# ---------------------------------------------------------------------------
+class WriteFilter:
+    """Saring percakapan sebelum ``mem0.add``.
+
+    Ditolak: balasan error/fallback, turn kosong, dan turn yang nyaris sama
+    (Jaccard token ≥ ``threshold``) dengan salah satu ``window`` turn terakhir
+    user yang sama.
+    """
+
+    def __init__(
+        self,
+        threshold: float = settings.memory_dedupe_threshold,
+        window: int = settings.memory_write_dedupe_window,
+    ):
+        self.threshold = threshold
+        self.window = window
+        self.accepted = 0
+        self.dropped: Dict[str, int] = defaultdict(int)
+        self._recent: Dict[str, Deque[FrozenSet[str]]] = {}
+        self._lock = threading.Lock()
+
+    def check(self, user_id: str, messages: List[Dict[str, str]]) -> Optional[str]:
+        """None = boleh disimpan; selain itu alasan penolakan."""
+        replies = [m.get("content") or "" for m in messages if m.get("role") == "assistant"]
+        if any(is_error_reply(r) for r in replies):
+            return self._drop("error_reply")
+        toks = tokenize(" ".join(m.get("content") or "" for m in messages))
+        if not toks:
+            return self._drop("empty")
+        with self._lock:
+            recent = self._recent.setdefault(user_id, deque(maxlen=self.window))
+            if any(jaccard(toks, prev) >= self.threshold for prev in recent):
+                self.dropped["near_duplicate"] += 1
+                return "near_duplicate"
+            recent.append(toks)
+            self.accepted += 1
+        return None
+
+    def _drop(self, reason: str) -> str:
+        with self._lock:
+            self.dropped[reason] += 1
+        return reason
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"accepted": self.accepted, "dropped": dict(self.dropped)}
+
+
+# ---------------------------------------------------------------------------
+#  Konsolidasi berkala
+# ---------------------------------------------------------------------------
+class MemoryConsolidator:
+    """Job background: gabungkan memori mirip & hapus memori basi per user.
+
+    Per user: memori dengan umur (``updated_at``) > ``ttl_days`` dihapus;
+    sisanya diurutkan dari yang terbaru dan memori yang Jaccard-nya
+    ≥ ``threshold`` terhadap memori lebih baru dianggap duplikat lalu
+    dihapus (versi terbaru yang dipertahankan). Ukuran store dan latensi
+    search vector store (embedding probe dihitung sekali) diukur sebelum
+    dan sesudah setiap putaran.
+    """
+
+    def __init__(
+        self,
+        manager: "Mem0Manager",
+        threshold: float = settings.memory_dedupe_threshold,
+        ttl_days: float = settings.memory_ttl_days,
+        probes: int = settings.memory_consolidate_probes,
+    ):
+        self.manager = manager
+        self.threshold = threshold
+        self.ttl_days = ttl_days
+        self.probes = probes
+        self.runs = 0
+        self.merged = 0
+        self.expired = 0
+        self.last_report: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+        tracer.register_collector(self.render_prometheus)
+
+    # ------------- ukur ----------------------------------------------
+    async def _snapshot(self, user_id: str) -> List[Dict[str, Any]]:
+        result = await self.manager.memory.get_all(
+            user_id=user_id, limit=settings.memory_prefetch_scan
+        )
+        return mem0_results(result)
+
+    async def _probe_vectors(self, items: List[Dict[str, Any]]) -> List[Any]:
+        embedder = self.manager.memory.embedding_model
+        texts = [it["memory"] for it in items[: self.probes] if it.get("memory")]
+        return [await asyncio.to_thread(embedder.embed, t, "search") for t in texts]
+
+    async def _search_ms(self, user_id: str, vectors: List[Any]) -> float:
+        if not vectors:
+            return 0.0
+        store = self.manager.memory.vector_store
+        tic = time.perf_counter()
+        for vec in vectors:
+            await asyncio.to_thread(
+                store.search, query="", vectors=vec, limit=5, filters={"user_id": user_id}
+            )
+        return (time.perf_counter() - tic) * 1000 / len(vectors)
+
+    # ------------- konsolidasi ---------------------------------------
+    def _plan(self, items: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """Tentukan id yang dihapus: {"expired": [...], "merged": [...]}."""
+        cutoff = (
+            datetime.now(timezone.utc) - timedelta(days=self.ttl_days)
+            if self.ttl_days > 0
+            else None
+        )
+        expired: List[str] = []
+        live = []
+        for it in items:
+            ts = _parse_ts(it.get("updated_at") or it.get("created_at"))
+            if cutoff is not None and ts is not None and ts < cutoff:
+                expired.append(it["id"])
+            else:
+                live.append((ts or datetime.min.replace(tzinfo=timezone.utc), it))
+
+        live.sort(key=lambda pair: pair[0], reverse=True)
+        kept: List[FrozenSet[str]] = []
+        merged: List[str] = []
+        for _, it in live:
+            toks = tokenize(it.get("memory") or "")
+            if any(jaccard(toks, k) >= self.threshold for k in kept):
+                merged.append(it["id"])
+            else:
+                kept.append(toks)
+        return {"expired": expired, "merged": merged}
+
+    async def consolidate_user(self, user_id: str) -> Dict[str, Any]:
+        before_items = await self._snapshot(user_id)
+        vectors = await self._probe_vectors(before_items)
+        before_ms = await self._search_ms(user_id, vectors)
+
+        plan = self._plan(before_items)
+        deleted = []
+        for memory_id in plan["expired"] + plan["merged"]:
+            try:
+                await self.manager.memory.delete(memory_id)
+                deleted.append({"id": memory_id, "event": "DELETE"})
+            except Exception as e:
+                logger.warning(f"[memory] Gagal hapus {memory_id} ({user_id}): {e}")
+        self.manager.index.apply_events(user_id, deleted)
+        self.expired += len(plan["expired"])
+        self.merged += len(plan["merged"])
+
+        after_ms = await self._search_ms(user_id, vectors) if deleted else before_ms
+        return {
+            "size_before": len(before_items),
+            "size_after": len(before_items) - len(deleted),
+            "expired": len(plan["expired"]),
+            "merged": len(plan["merged"]),
+            "search_ms_before": round(before_ms, 2),
+            "search_ms_after": round(after_ms, 2),
+        }
+
+    async def run_once(self, users: Iterable[str]) -> Dict[str, Any]:
+        await self.manager.init()
+        report: Dict[str, Any] = {}
+        with tracer.span("mem0.consolidate") as sp:
+            for user_id in sorted(set(users)):
+                try:
+                    report[user_id] = await self.consolidate_user(user_id)
+                except Exception as e:
+                    logger.error(f"[memory] Konsolidasi {user_id} gagal: {e}")
+            sp.set(users=len(report))
+        self.runs += 1
+        self.last_report = report
+        for user_id, r in report.items():
+            logger.info(
+                f"[memory] Konsolidasi {user_id}: {r['size_before']} → {r['size_after']} memori "
+                f"(merge {r['merged']}, expired {r['expired']}), search "
+                f"{r['search_ms_before']:.1f} → {r['search_ms_after']:.1f} ms"
+            )
+        return report
+
+    # ------------- jadwal --------------------------------------------
+    def start(self, interval_sec: float) -> None:
+        """Jalankan konsolidasi berkala untuk user yang aktif (idempotent)."""
+        if self._task is not None and not self._task.done():
+            return
+
+        async def _loop():
+            while True:
+                await asyncio.sleep(interval_sec)
+                try:
+                    await self.run_once(self.manager.users)
+                except Exception as e:
+                    logger.error(f"[memory] Konsolidasi berkala gagal: {e}")
+
+        self._task = asyncio.create_task(_loop(), name="memory-consolidation")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ------------- laporan -------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "merged": self.merged,
+            "expired": self.expired,
+            "last_report": self.last_report,
+        }
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# TYPE projectwise_memory_consolidation_runs_total counter",
+            f"projectwise_memory_consolidation_runs_total {self.runs}",
+            "# TYPE projectwise_memory_consolidated_total counter",
+            f'projectwise_memory_consolidated_total{{action="merged"}} {self.merged}',
+            f'projectwise_memory_consolidated_total{{action="expired"}} {self.expired}',
+            "# TYPE projectwise_memory_store_size gauge",
+        ]
+        for user_id, r in sorted(self.last_report.items()):
+            lines.append(f'projectwise_memory_store_size{{user_id="{user_id}"}} {r["size_after"]}')
+        return "\n".join(lines)
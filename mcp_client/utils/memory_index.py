@@ -0,0 +1,255 @@
+# utils/memory_index.py
+from __future__ import annotations
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, FrozenSet, List, Optional, TypeVar
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.tracing import tracer
+
+settings = get_settings()
+
+_WORD_RE = re.compile(r"\w+")
+T = TypeVar("T")
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    return frozenset(w for w in _WORD_RE.findall(text.lower()) if len(w) > 2)
+
+
+def mem0_results(result: Any) -> List[Dict[str, Any]]:
+    """Normalisasi output mem0 (``{"results": [...]}`` atau list lama v1.0)."""
+    if isinstance(result, dict):
+        return list(result.get("results") or [])
+    return list(result or [])
+
+
+class _UserPartition:
+    """Memori prefetch satu user: id → teks (+ token untuk rerank lokal)."""
+
+    def __init__(self, complete: bool):
+        # complete=True: snapshot berisi seluruh memori user di vector store
+        self.complete = complete
+        self.entries: Dict[str, str] = {}
+        self.tokens: Dict[str, FrozenSet[str]] = {}
+        self.last_used = time.monotonic()
+
+    def put(self, memory_id: str, text: str) -> None:
+        self.entries[memory_id] = text
+        self.tokens[memory_id] = tokenize(text)
+
+    def remove(self, memory_id: str) -> None:
+        self.entries.pop(memory_id, None)
+        self.tokens.pop(memory_id, None)
+
+
+class _UserStats:
+    def __init__(self, window: int = 200):
+        self.searches = 0
+        self.local_hits = 0
+        self.store_fallbacks = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def quantile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class UserMemoryIndex:
+    """Partisi memori per user dengan prefetch saat sesi dibuka.
+
+    Saat sesi user dibuka, memori yang paling sering terpakai dimuat ke
+    partisi lokal. Query berikutnya di-rerank secara leksikal (cakupan token
+    query) di partisi itu; vector store hanya dipanggil jika tidak ada memori
+    lokal yang mencapai ``min_score``. Partisi kedaluwarsa setelah idle
+    ``ttl`` detik dan dibatasi ``max_users`` (LRU).
+    """
+
+    def __init__(
+        self,
+        prefetch_size: int = settings.memory_prefetch_size,
+        min_score: float = settings.memory_local_min_score,
+        ttl: float = settings.memory_session_ttl_sec,
+        max_users: int = settings.memory_session_max_users,
+    ):
+        self.prefetch_size = prefetch_size
+        self.min_score = min_score
+        self.ttl = ttl
+        self.max_users = max_users
+        self._partitions: "OrderedDict[str, _UserPartition]" = OrderedDict()
+        # frekuensi pemakaian memori & statistik per user (bertahan lintas
+        # sesi, tetapi LRU dibatasi max_users seperti partisi)
+        self._usage: "OrderedDict[str, Counter]" = OrderedDict()
+        self._stats: "OrderedDict[str, _UserStats]" = OrderedDict()
+        self._total = _UserStats()
+        self._lock = threading.Lock()
+        tracer.register_collector(self.render_prometheus)
+
+    def _lru(
+        self, table: "OrderedDict[str, T]", user_id: str, factory: Callable[[], T]
+    ) -> T:
+        """Entri per user (dibuat jika belum ada); user paling lama dibuang."""
+        item = table.get(user_id)
+        if item is None:
+            item = table[user_id] = factory()
+            while len(table) > self.max_users:
+                table.popitem(last=False)
+        else:
+            table.move_to_end(user_id)
+        return item
+
+    # ------------- sesi ----------------------------------------------
+    def _partition(self, user_id: str) -> Optional[_UserPartition]:
+        part = self._partitions.get(user_id)
+        if part is None:
+            return None
+        if time.monotonic() - part.last_used > self.ttl:
+            del self._partitions[user_id]
+            return None
+        part.last_used = time.monotonic()
+        self._partitions.move_to_end(user_id)
+        return part
+
+    def is_open(self, user_id: str) -> bool:
+        with self._lock:
+            return self._partition(user_id) is not None
+
+    def load(self, user_id: str, items: List[Dict[str, Any]], complete: bool) -> int:
+        """Isi partisi user dari hasil ``get_all``; simpan yang paling sering dipakai."""
+        with self._lock:
+            usage = Counter(self._lru(self._usage, user_id, Counter))
+        ranked = sorted(
+            (it for it in items if it.get("id") and it.get("memory")),
+            key=lambda it: (
+                usage[it["id"]],
+                it.get("updated_at") or it.get("created_at") or "",
+            ),
+            reverse=True,
+        )
+        part = _UserPartition(complete=complete and len(ranked) <= self.prefetch_size)
+        for it in ranked[: self.prefetch_size]:
+            part.put(it["id"], it["memory"])
+        with self._lock:
+            self._partitions[user_id] = part
+            self._partitions.move_to_end(user_id)
+            while len(self._partitions) > self.max_users:
+                self._partitions.popitem(last=False)
+        return len(part.entries)
+
+    def close(self, user_id: str) -> None:
+        with self._lock:
+            self._partitions.pop(user_id, None)
+
+    # ------------- pencarian -----------------------------------------
+    def lookup(self, user_id: str, query: str, limit: int) -> Optional[List[str]]:
+        """Rerank lokal; None = miss (perlu ke vector store)."""
+        with self._lock:
+            part = self._partition(user_id)
+            if part is None:
+                return None
+            if not part.entries and part.complete:
+                return []  # user belum punya memori sama sekali
+            q = tokenize(query)
+            if not q:
+                return None
+            usage = self._lru(self._usage, user_id, Counter)
+            scored = []
+            for memory_id, toks in part.tokens.items():
+                score = len(q & toks) / len(q)
+                if score >= self.min_score:
+                    scored.append((score, usage[memory_id], memory_id))
+            if not scored:
+                return None
+            scored.sort(reverse=True)
+            hits = [memory_id for _, _, memory_id in scored[:limit]]
+            usage.update(hits)
+            return [part.entries[memory_id] for memory_id in hits]
+
+    def merge(self, user_id: str, items: List[Dict[str, Any]]) -> None:
+        """Masukkan hasil vector store ke partisi (jika terbuka) & hitung pemakaian."""
+        with self._lock:
+            self._lru(self._usage, user_id, Counter).update(
+                it["id"] for it in items if it.get("id")
+            )
+            part = self._partition(user_id)
+            if part is None:
+                return
+            for it in items:
+                if it.get("id") and it.get("memory"):
+                    part.put(it["id"], it["memory"])
+
+    def apply_events(self, user_id: str, items: List[Dict[str, Any]]) -> None:
+        """Sinkronkan partisi dengan event ADD/UPDATE/DELETE dari ``mem0.add``."""
+        with self._lock:
+            part = self._partitions.get(user_id)
+            if part is None:
+                return
+            for it in items:
+                memory_id, event = it.get("id"), it.get("event")
+                if not memory_id:
+                    continue
+                if event == "DELETE":
+                    part.remove(memory_id)
+                    self._usage.get(user_id, Counter()).pop(memory_id, None)
+                elif event in ("ADD", "UPDATE") and it.get("memory"):
+                    part.put(memory_id, it["memory"])
+
+    # ------------- laporan -------------------------------------------
+    def record(self, user_id: str, seconds: float, source: str) -> None:
+        with self._lock:
+            for s in (self._lru(self._stats, user_id, _UserStats), self._total):
+                s.searches += 1
+                if source == "local":
+                    s.local_hits += 1
+                elif source == "store":
+                    s.store_fallbacks += 1
+                s.latencies.append(seconds)
+
+    @staticmethod
+    def _summary(s: _UserStats) -> Dict[str, Any]:
+        return {
+            "searches": s.searches,
+            "local_hits": s.local_hits,
+            "store_fallbacks": s.store_fallbacks,
+            "p50_ms": round(s.quantile(0.5) * 1000, 2),
+            "p95_ms": round(s.quantile(0.95) * 1000, 2),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open_sessions": len(self._partitions),
+                "total": self._summary(self._total),
+                # hanya untuk laporan JSON; metrik Prometheus agregat saja
+                "users": {
+                    user_id: self._summary(s) for user_id, s in sorted(self._stats.items())
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        s = self.stats()
+        t = s["total"]
+        # tanpa label user_id: kardinalitas tetap & tidak perlu escape
+        return "\n".join(
+            [
+                "# TYPE projectwise_memory_open_sessions gauge",
+                f"projectwise_memory_open_sessions {s['open_sessions']}",
+                "# TYPE projectwise_memory_tracked_users gauge",
+                f"projectwise_memory_tracked_users {len(s['users'])}",
+                "# TYPE projectwise_memory_search_seconds summary",
+                f'projectwise_memory_search_seconds{{quantile="0.5"}} {t["p50_ms"] / 1000}',
+                f'projectwise_memory_search_seconds{{quantile="0.95"}} {t["p95_ms"] / 1000}',
+                f"projectwise_memory_search_seconds_count {t['searches']}",
+                "# TYPE projectwise_memory_local_hits_total counter",
+                f"projectwise_memory_local_hits_total {t['local_hits']}",
+                "# TYPE projectwise_memory_store_fallbacks_total counter",
+                f"projectwise_memory_store_fallbacks_total {t['store_fallbacks']}",
+            ]
+        )
+
+
+memory_index = UserMemoryIndex()
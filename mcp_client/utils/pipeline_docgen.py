@@ -1,30 +1,73 @@
 # utils/pipeline_docgen.py
 from __future__ import annotations
-import asyncio
-import json
-import traceback
-from enum import Enum, auto
-from typing import Any, Dict, List, Optional, Tuple, Union
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
 
+from mcp_client.settings import get_settings
+from mcp_client.utils.cascade import model_cascade
+from mcp_client.utils.dag import Pipeline, Step, StepError
+from mcp_client.utils.logger import payload_repr
+from mcp_client.utils.markdown_sections import (
+    placeholder_terms,
+    select_sections,
+    split_sections,
+)
 from mcp_client.utils.prompt_loader import load_prompt
+from mcp_client.utils.slug_kak import project_stem
+from mcp_client.utils.summary_store import summary_store
+from mcp_client.utils.tool_result import ToolResult, parse_json
+from mcp_client.utils.tracing import tracer
+from mcp_client.utils.usage import usage_ledger
+
+settings = get_settings()
+
+_FALLBACK_PROMPT = (
+    'Anda adalah "ProjectWise", asisten virtual untuk tim Presales & '
+    "Project Manager. Tugas Anda adalah generate document docx berdasarkan "
+    "proposal template yang sudah ada dan merangkum isi context sesuai "
+    "dengan context proyek yang diberikan. Ikuti DOCUMENT_GENERATOR_WORKFLOW."
+)
+
+
+class DocgenFailed(RuntimeError):
+    """Proposal tidak dibuat; pesan siap ditampilkan ke user."""
+
+
+@lru_cache(maxsize=8)
+def _parse_context(ctx_json: str) -> Any:
+    """JSON context placeholder dari LLM (di-cache: dicek di _accept, fill & render)."""
+    return parse_json(ctx_json)
+
+
+def _placeholder_list(result: ToolResult) -> List[str]:
+    """Output ``get_template_placeholders``: list langsung atau {placeholders: [...]}."""
+    if isinstance(result.data, list):
+        return list(result.data)
+    names = result.get("placeholders")
+    return list(names) if isinstance(names, list) else []
 
-try:
-    _SYSTEM_PROMPT = load_prompt("document_generator").strip()
-except Exception:
-    _SYSTEM_PROMPT = (
-        'Anda adalah "ProjectWise", asisten virtual untuk tim Presales & '
-        "Project Manager. Tugas Anda adalah generate document docx berdasarkan "
-        "proposal template yang sudah ada dan merangkum isi context sesuai "
-        "dengan context proyek yang diberikan. Ikuti DOCUMENT_GENERATOR_WORKFLOW."
-    )
+
+def _covered(placeholder: str, summary: Dict[str, Any]) -> bool:
+    """Placeholder dianggap tercakup bila ada field ringkasan (tidak kosong)
+    yang namanya sama atau kata kuncinya overlap ≥ 50%."""
+    terms = placeholder_terms(placeholder)
+    for key, value in summary.items():
+        if value in (None, "", [], {}):
+            continue
+        if key.lower() == placeholder.lower():
+            return True
+        key_terms = placeholder_terms(key)
+        if terms and key_terms and len(terms & key_terms) / len(terms | key_terms) >= 0.5:
+            return True
+    return False
 
 
-class _State(Enum):
-    INITIAL = auto()
-    RAW_READY = auto()
-    PLACEHOLDERS_OBTAINED = auto()
-    CONTEXT_SENT = auto()
-    DOC_SAVED = auto()
+def _system_prompt() -> str:
+    """Prompt sistem (cached oleh load_prompt); fallback jika file belum ada."""
+    try:
+        return load_prompt("document_generator").strip()
+    except Exception:
+        return _FALLBACK_PROMPT
 
 
 async def run(
@@ -32,199 +75,182 @@ async def run(
     project_name: str,
     user_query: Optional[str] = None,
     override_template: Optional[str] = None,
-    max_turns: int = 12,
-    max_parallel_tools: int = 5,
+    trace_id: str = "-",
 ) -> str:
-    """Main async workflow untuk pembuatan proposal docx."""
+    """Pembuatan proposal docx sebagai DAG:
+    (placeholders ∥ raw) → context → fill → render. Kembalikan path file;
+    gagal terkontrol → ``DocgenFailed``.
+
+    Tool dipanggil langsung oleh pipeline; LLM hanya mengisi JSON context.
+    Jika ada ringkasan KAK segar, ringkasan menjadi konteks utama dan
+    markdown mentah hanya dipakai (per section) untuk placeholder yang
+    tidak tercakup.
+    """
 
     log = client.logger
 
-    if project_name.lower().endswith((".md", ".txt")):
-        project_name = project_name.rsplit(".", 1)[0]
+    project_name = project_stem(project_name)
 
-    system_prompt = {"role": "system", "content": _SYSTEM_PROMPT}
     first_user_msg = (
         user_query or f"Buatkan proposal untuk proyek '{project_name}'. Ikuti prosedur."
     )
-    messages: List[Dict[str, Any]] = [
-        system_prompt,
-        {"role": "user", "content": first_user_msg},
-    ]
-
-    state: _State = _State.INITIAL
-    placeholders: List[str] = []
-    doc_path: Optional[str] = None
-    retries: Dict[str, int] = {}
-    sem = asyncio.Semaphore(max_parallel_tools)
-
-    async def _call_tool(name: str, args: Dict[str, Any]) -> str:
-        async with sem:
-            log.info(f"Memanggil tool '{name}' arg={args}")
-            try:
-                raw = await client.call_tool(name, args)
-                return raw if isinstance(raw, str) else json.dumps(raw)
-            except Exception as e:
-                traceback.print_exc()
-                return json.dumps({"status": "failure", "error": str(e)})
-
-    def _context_complete(ctx_json: str) -> bool:
-        try:
-            data = json.loads(ctx_json)
-            return isinstance(data, dict) and all(k in data for k in placeholders)
-        except Exception:
-            return False
-
-    for turn in range(max_turns):
-        log.info(f"— Turn {turn + 1}/{max_turns} | state={state.name}")
-
-        explicit_choice: Union[str, Dict[str, Any]] = "auto"
-        if state is _State.INITIAL and retries.get("read_project_markdown", 0) == 0:
-            explicit_choice = {
-                "type": "function",
-                "function": {"name": "read_project_markdown"},
-            }
-        elif (
-            state is _State.RAW_READY
-            and retries.get("get_template_placeholders", 0) == 0
-        ):
-            explicit_choice = {
-                "type": "function",
-                "function": {"name": "get_template_placeholders"},
-            }
-        elif (
-            state in {_State.CONTEXT_SENT, _State.PLACEHOLDERS_OBTAINED}
-            and retries.get("generate_proposal_docx", 0) == 0
-        ):
-            explicit_choice = {
-                "type": "function",
-                "function": {"name": "generate_proposal_docx"},
-            }
-
-        resp = await client.llm.chat.completions.create(
-            model=client.model,
-            messages=messages,  # type: ignore[arg-type]
-            tools=await client.get_tools(),  # type: ignore[arg-type]
-            tool_choice=explicit_choice,
+    cached = summary_store.get(project_name)
+
+    async def _call_tool(name: str, args: Dict[str, Any]) -> ToolResult:
+        log.info(
+            f"[{trace_id}] Memanggil tool '{name}'", extra={"payload": payload_repr(args)}
         )
-        assistant_msg = resp.choices[0].message
-        messages.append(assistant_msg.model_dump())
-
-        if not assistant_msg.tool_calls:
-            if state is _State.PLACEHOLDERS_OBTAINED:
-                ctx_raw = assistant_msg.content or ""
-                if not _context_complete(ctx_raw):
-                    retries["context"] = retries.get("context", 0) + 1
-                    if retries["context"] <= 1:
-                        missing = [
-                            ph
-                            for ph in placeholders
-                            if ph not in json.loads(ctx_raw or "{}")
-                        ]
-                        messages.append(
-                            {
-                                "role": "user",
-                                "content": (
-                                    "Beberapa placeholder masih kosong: "
-                                    f"{missing}. Mohon lengkapi JSON context sepenuhnya."
-                                ),
-                            }
-                        )
-                        continue
-                    return "Placeholder masih belum lengkap setelah 2× percobaan."
-
-                messages = [system_prompt, {"role": "user", "content": ctx_raw}]
-                state = _State.CONTEXT_SENT
-                continue
-
-            if state is _State.DOC_SAVED:
-                return (
-                    assistant_msg.content or f"Proposal berhasil dibuat di {doc_path}"
+        return await client.call_tool_result(name, args)
+
+    async def _placeholders() -> List[str]:
+        return _placeholder_list(await _call_tool("get_template_placeholders", {}))
+
+    async def _raw() -> ToolResult:
+        return await _call_tool("read_project_markdown", {"project_name": project_name})
+
+    async def _context(placeholders: List[str], raw: Optional[ToolResult]) -> str:
+        raw_ok = raw is not None and raw.status == "success"
+        text = raw.get("text", "") if raw_ok else ""
+        summary = cached.data if cached is not None else None
+        if summary is not None and raw_ok and not summary_store.is_current(cached, text):
+            log.info(f"[{trace_id}] Dokumen KAK '{project_name}' berubah, ringkasan diabaikan")
+            summary = None
+        if summary is None:
+            if not raw_ok:
+                raise StepError(
+                    (raw.error if raw is not None else None)
+                    or "Dokumen proyek tidak ditemukan."
                 )
+            return f"Isi dokumen proyek (`raw_context`):\n{text}"
 
-            continue
+        uncovered = [ph for ph in placeholders if not _covered(ph, summary)]
+        excerpt = ""
+        if uncovered and text:
+            terms = frozenset().union(*(placeholder_terms(ph) for ph in uncovered))
+            sections = select_sections(
+                split_sections(text), terms, settings.docgen_fallback_max_chars
+            )
+            excerpt = "\n\n".join(sec.text for sec in sections)
+        context = (
+            "Ringkasan KAK proyek berikut adalah `raw_context` utama.\n"
+            + cached.summary
+        )
+        if excerpt:
+            context += (
+                "\n\nCuplikan dokumen proyek untuk placeholder yang belum tercakup "
+                f"ringkasan {uncovered}:\n{excerpt}"
+            )
+        log.info(
+            f"[{trace_id}] Memakai ringkasan KAK '{cached.project}' "
+            f"(umur {cached.age_days:.1f} hari): "
+            f"{len(placeholders) - len(uncovered)}/{len(placeholders)} placeholder "
+            f"tercakup, konteks {len(context)} karakter"
+        )
+        return context
+
+    async def _fill(context: str, placeholders: List[str]) -> str:
+        messages: List[Dict[str, Any]] = [
+            {"role": "system", "content": _system_prompt()},
+            {"role": "user", "content": first_user_msg},
+            {"role": "user", "content": context},
+            {
+                "role": "user",
+                "content": (
+                    f"Daftar placeholder: {placeholders}\n"
+                    "Balas HANYA dengan objek JSON `context`; tool dipanggil oleh sistem."
+                ),
+            },
+        ]
+        tier = 0  # sekali eskalasi tetap di model besar
+
+        def _complete(ctx_json: str) -> bool:
+            data = _parse_context(ctx_json)
+            return isinstance(data, dict) and all(k in data for k in placeholders)
+
+        for attempt in range(2):
+
+            async def _turn(model: str):
+                with tracer.span(
+                    "llm.turn", call_site="docgen", turn=attempt + 1, state="fill", model=model
+                ) as sp:
+                    resp = await client.llm.chat.completions.create(
+                        model=model, messages=messages  # type: ignore[arg-type]
+                    )
+                usage_ledger.record(
+                    "docgen", resp, model=model, latency=sp.duration, state="fill"
+                )
+                return resp
+
+            def _accept(resp) -> bool:
+                # Context placeholder tidak lengkap dari model cepat → eskalasi
+                return _complete(resp.choices[0].message.content or "")
 
-        # ----------------------------
-        # Tool-calls processing
-        # ----------------------------
-        tc_results: List[Tuple[str, str, str]] = []
-        exec_tasks = []
-        tc_extra_args: List[Tuple[str, Dict[str, Any]]] = []
-        for tc in assistant_msg.tool_calls:
-            args = json.loads(tc.function.arguments or "{}")
-            if tc.function.name == "read_project_markdown":
-                args.setdefault("project_name", project_name)
-            elif tc.function.name == "generate_proposal_docx" and override_template:
-                args.setdefault("override_template", override_template)
-            exec_tasks.append(_call_tool(tc.function.name, args))
-            tc_extra_args.append((tc.function.name, args))
-
-        tool_raw_results = await asyncio.gather(*exec_tasks)
-
-        for tc, raw, (fname, _) in zip(
-            assistant_msg.tool_calls, tool_raw_results, tc_extra_args
-        ):
-            content_str = raw if isinstance(raw, str) else json.dumps(raw)
+            resp, tier = await model_cascade.run(
+                "docgen", client.model, _turn, _accept, start_tier=tier
+            )
+            ctx_raw = resp.choices[0].message.content or ""
+            if _complete(ctx_raw):
+                return ctx_raw
+
+            ctx = _parse_context(ctx_raw)
+            missing = [ph for ph in placeholders if not isinstance(ctx, dict) or ph not in ctx]
+            messages.append({"role": "assistant", "content": ctx_raw})
             messages.append(
                 {
-                    "role": "tool",
-                    "tool_call_id": tc.id,
-                    "name": fname,
-                    "content": content_str,
+                    "role": "user",
+                    "content": (
+                        f"Beberapa placeholder masih kosong: {missing}. "
+                        "Mohon lengkapi JSON context sepenuhnya."
+                    ),
                 }
             )
-            tc_results.append((fname, content_str, tc.id))
-
-        # ----------------------------
-        # Post‑process each tool result
-        # ----------------------------
-        for fname, content_str, _ in tc_results:
-            try:
-                payload = json.loads(content_str)
-            except json.JSONDecodeError:
-                # Fallback untuk string path (generate_proposal_docx)
-                payload = (
-                    {"status": "success", "path": content_str}
-                    if fname == "generate_proposal_docx"
-                    else {"status": "raw", "data": content_str}
-                )
+        raise StepError("Placeholder masih belum lengkap setelah 2× percobaan.")
 
-            # read_project_markdown -------------------------------------
-            if fname == "read_project_markdown" and state is _State.INITIAL:
-                if payload.get("status") != "success":
-                    retries[fname] = retries.get(fname, 0) + 1
-                    if retries[fname] <= 1:
-                        state = _State.INITIAL
-                        break
-                    return payload.get("error", "Dokumen proyek tidak ditemukan.")
-                messages.append({"role": "user", "content": payload.get("text", "")})
-                state = _State.RAW_READY
-
-            # get_template_placeholders ---------------------------------
-            elif fname == "get_template_placeholders" and state is _State.RAW_READY:
-                placeholders.clear()
-                if isinstance(payload, list):
-                    placeholders.extend(payload)
-                elif isinstance(payload.get("placeholders"), list):
-                    placeholders.extend(payload["placeholders"])
-                messages.append(
-                    {
-                        "role": "user",
-                        "content": f"Daftar placeholder: {placeholders}",
-                    }
-                )
-                state = _State.PLACEHOLDERS_OBTAINED
-
-            # generate_proposal_docx ------------------------------------
-            elif fname == "generate_proposal_docx":
-                if payload.get("status") != "success":
-                    retries[fname] = retries.get(fname, 0) + 1
-                    if retries[fname] <= 1:
-                        state = _State.CONTEXT_SENT
-                        break
-                    return payload.get("error", "Gagal membuat proposal.")
-                doc_path = payload.get("path")
-                state = _State.DOC_SAVED
-
-        continue
-
-    return doc_path or "Workflow berhenti: mencapai batas maksimum iterasi."
+    async def _render(fill: str) -> str:
+        args: Dict[str, Any] = {"context": _parse_context(fill)}
+        if override_template:
+            args["override_template"] = override_template
+        result = await _call_tool("generate_proposal_docx", args)
+        if result.data is None and not result.is_error and result.text.strip():
+            # tool mengembalikan path sebagai string biasa
+            return result.text.strip()
+        path = result.get("path")
+        if result.status != "success" or not isinstance(path, str) or not path:
+            raise StepError(result.error or "Gagal membuat proposal.")
+        return path
+
+    tool_timeout = settings.pipeline_tool_timeout_sec
+    pipeline = Pipeline(
+        "docgen",
+        [
+            Step("placeholders", _placeholders, timeout=tool_timeout, retries=1),
+            # dengan ringkasan segar, markdown mentah hanya pelengkap
+            Step("raw", _raw, timeout=tool_timeout, retries=1, optional=cached is not None),
+            Step("context", _context, inputs=("placeholders", "raw")),
+            Step(
+                "fill",
+                _fill,
+                inputs=("context", "placeholders"),
+                timeout=settings.pipeline_llm_timeout_sec * 2,
+            ),
+            # generate_proposal_docx tidak idempotent: tanpa retry, timeout longgar
+            # (ulang setelah timeout bisa membuat .docx ganda)
+            Step(
+                "render",
+                _render,
+                inputs=("fill",),
+                timeout=settings.pipeline_llm_timeout_sec,
+            ),
+        ],
+    )
+    try:
+        values = await pipeline.run()
+    except StepError as e:
+        log.warning(f"[{trace_id}] Pipeline docgen berhenti: {e}")
+        raise DocgenFailed(str(e)) from e
+    finally:
+        log.info(
+            f"[{trace_id}] Pipeline docgen: "
+            + ", ".join(f"{k}={v:.2f}s" for k, v in pipeline.last_timings.items())
+        )
+    return values["render"]
@@ -1,199 +1,200 @@
 # utils/pipeline_kak.py
 from __future__ import annotations
-import asyncio
-import json
-import traceback
-from typing import List, Dict, Any
+from typing import Any, Dict, Optional, Union
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.dag import Pipeline, Step, StepError
+from mcp_client.utils.logger import payload_repr
 from mcp_client.utils.prompt_loader import load_prompt
+from mcp_client.utils.slug_kak import project_stem, slugify
+from mcp_client.utils.summary_store import summary_store
+from mcp_client.utils.tool_result import ToolResult, parse_json
+from mcp_client.utils.tracing import tracer
+from mcp_client.utils.usage import usage_ledger
+
+settings = get_settings()
 
 # ---------------------------------------------------------------------------
 #  Prompt system – di‑load dari folder prompts/ atau hard‑coded sebagai fallback
 # ---------------------------------------------------------------------------
-try:
-    _SYSTEM_PROMPT = load_prompt("kak_analyzer").strip()
-except (FileNotFoundError, IOError):
-    # Fallback ke prompt bawaan jika file belum tersedia
-    _SYSTEM_PROMPT = (
-        "Anda adalah “ProjectWise”, asisten cerdas untuk tim Presales & Project Manager."
-        "Tugas Anda adalah menganalisis dokumen KAK/TOR tender dan merangkum poin-poin"
-        "penting ke dalam format JSON terstruktur. Ikuti "
-        "prosedur di bawah TANPA"
-        "menyimpang, dan gunakan SELALU bahasa Indonesia."
+_FALLBACK_PROMPT = (
+    "Anda adalah “ProjectWise”, asisten cerdas untuk tim Presales & Project Manager."
+    "Tugas Anda adalah menganalisis dokumen KAK/TOR tender dan merangkum poin-poin"
+    "penting ke dalam format JSON terstruktur. Ikuti "
+    "prosedur di bawah TANPA"
+    "menyimpang, dan gunakan SELALU bahasa Indonesia."
+)
+
+
+def _system_prompt() -> str:
+    """Prompt sistem (cached oleh load_prompt); fallback jika file belum ada."""
+    try:
+        return load_prompt("kak_analyzer").strip()
+    except (FileNotFoundError, IOError):
+        return _FALLBACK_PROMPT
+
+
+# Balasan pipeline yang menandakan ringkasan TIDAK tersimpan
+EMPTY_SUMMARY_REPLY = "Ringkasan kosong."
+
+
+class SummaryNotSaved(RuntimeError):
+    """Ringkasan berhasil dibuat tetapi ``save_summary_markdown_tool`` gagal."""
+
+    def __init__(self, kak_tor_md_name: str, summary: str):
+        super().__init__(f"Ringkasan '{kak_tor_md_name}' tidak tersimpan.")
+        self.summary = summary
+
+
+# Argumen `project` save_summary_markdown_tool: nama_pelanggan_nama_proyek
+SAVE_PROJECT_MAX_CHARS = 50
+_CUSTOMER_KEYS = (
+    "nama_pelanggan",
+    "pelanggan",
+    "nama_instansi",
+    "instansi",
+    "pemberi_kerja",
+)
+_PROJECT_KEYS = ("nama_proyek", "nama_pekerjaan", "judul_proyek", "proyek")
+
+
+def save_project_name(summary: str, kak_tor_md_name: str) -> str:
+    """Argumen ``project`` untuk ``save_summary_markdown_tool``.
+
+    Format ``nama_pelanggan_nama_proyek`` (maks. 50 karakter) dari field
+    ringkasan JSON; fallback ke nama file KAK tanpa ekstensi.
+    """
+    data = parse_json(summary)
+    parts = []
+    if isinstance(data, dict):
+        for keys in (_CUSTOMER_KEYS, _PROJECT_KEYS):
+            for key in keys:
+                value = data.get(key)
+                if isinstance(value, str) and value.strip():
+                    parts.append(value)
+                    break
+    name = slugify(" ".join(parts)) or slugify(project_stem(kak_tor_md_name)) or "proyek"
+    return name[:SAVE_PROJECT_MAX_CHARS].rstrip("_")
+
+
+def payload_success(payload: Union[ToolResult, str]) -> bool:
+    """Validasi payload ``build_summary_tender_payload`` ({instruction, context})."""
+    if isinstance(payload, str):
+        payload = ToolResult.from_text("build_summary_tender_payload", payload)
+    data = payload.data
+    return (
+        isinstance(data, dict)
+        and isinstance(data.get("instruction"), str)
+        and isinstance(data.get("context"), str)
     )
 
 
 # ---------------------------------------------------------------------------
-#  Status enum simpel
-# ---------------------------------------------------------------------------
-class _State:
-    INITIAL = "INITIAL"  # belum memanggil tool apa pun
-    PAYLOAD_SENT = "PAYLOAD_SENT"  # LLM sudah mengirim payload
-    SUMMARY_OBTAINED = "SUMMARY_OBTAINED"  # Ringkasan sudah diterima
-    SAVED = "SAVED"
-
-
-# ---------------------------------------------------------------------------
-#  Pipeline utama
+#  Pipeline utama: payload → summarize → save (DAG)
 # ---------------------------------------------------------------------------
 async def run(
     client,
     user_query: str,
     prompt_instruction_name: str,
     kak_tor_md_name: str,
-    max_turns: int = 10,
-    max_parallel_tools: int = 5,
+    trace_id: str = "-",
+    prefetched_payload: Optional[ToolResult] = None,
 ) -> str:
+    """Analisis satu KAK/TOR.
+
+    Ringkasan yang gagal disimpan → ``SummaryNotSaved`` (ringkasan ada di
+    ``.summary``).
+
+    Tool dipanggil langsung oleh pipeline; LLM hanya dipakai untuk satu
+    langkah ringkasan. ``prefetched_payload`` → hasil
+    ``build_summary_tender_payload`` yang sudah diambil pemanggil, langkah
+    payload dilewati.
+    """
     log = client.logger
-    system_prompt = {
-        "role": "system",
-        "content": _SYSTEM_PROMPT,
-    }
-    messages: List[Dict[str, Any]] = [
-        system_prompt,
-        {"role": "user", "content": user_query},
-    ]
-
-    state = _State.INITIAL
-    summary_json: str | None = None
-    original_history: List[Dict[str, Any]] = []
-    sem = asyncio.Semaphore(max_parallel_tools)
-
-    # -------------------------------------------------------#
-    #  Helper: validasi apakah payload hasil tool sukses
-    # -------------------------------------------------------#
-    def _payload_success(raw: str) -> bool:
-        try:
-            data = json.loads(raw)
-            return (
-                isinstance(data, dict)
-                and isinstance(data.get("instruction"), str)
-                and isinstance(data.get("context"), str)
+    log.info(f"[{trace_id}] Analisis KAK '{kak_tor_md_name}': {user_query}")
+
+    async def _payload() -> ToolResult:
+        args = {
+            "prompt_instruction_name": prompt_instruction_name,
+            # kontrak tool: nama file tanpa ekstensi
+            "kak_tor_md_name": project_stem(kak_tor_md_name),
+        }
+        log.info(
+            f"[{trace_id}] Memanggil tool 'build_summary_tender_payload'",
+            extra={"payload": payload_repr(args)},
+        )
+        result = await client.call_tool_result("build_summary_tender_payload", args)
+        if not payload_success(result):
+            raise StepError(
+                f"Dokumen KAK '{kak_tor_md_name}' tidak dapat dibaca: "
+                f"{result.error or result.text[:200]}"
+            )
+        return result
+
+    async def _summarize(payload: ToolResult) -> str:
+        messages = [
+            {"role": "system", "content": _system_prompt()},
+            {"role": "user", "content": payload.text},
+        ]
+        with tracer.span("llm.turn", call_site="kak", turn=1, state="summarize") as sp:
+            resp = await client.llm.chat.completions.create(
+                model=client.model, messages=messages
             )
-        except Exception:
-            return False
-
-    # -------------------------------------------------------#
-    #  Helper: eksekusi sebuah tool‑call (dipanggil paralel)
-    # -------------------------------------------------------#
-    async def _exec_tool(tc):
-        async with sem:
-            fname = tc.function.name
-            try:
-                fargs = json.loads(tc.function.arguments or "{}")
-            except Exception:
-                fargs = {}
-
-            if fname == "build_summary_tender_payload":
-                fargs.setdefault("prompt_instruction_name", prompt_instruction_name)
-                fargs.setdefault("kak_tor_md_name", kak_tor_md_name)
-
-            log.info(f"Memanggil tool '{fname}' arg={fargs}")
-            try:
-                result = await client.call_tool(fname, fargs)
-            except Exception as e:
-                log.error(f"Error tool '{fname}': {e}")
-                traceback.print_exc()
-                result = f"Error executing tool {fname}: {e}"
-
-            return {
-                "role": "tool",
-                "tool_call_id": tc.id,
-                "name": fname,
-                "content": result,
-                "fname": fname,
-                "fargs": fargs,
-            }
-
-    # -------------------------------------------------------#
-    #  Main chat loop
-    # -------------------------------------------------------#
-    for turn in range(max_turns):
-        log.info(f"— Turn {turn + 1}/{max_turns} | state={state}")
-
-        tools = await client.get_tools()
-        tool_mode = "none" if state == _State.PAYLOAD_SENT else "auto"
-        resp = await client.llm.chat.completions.create(
-            model=client.model,
-            messages=messages,
-            tools=tools,
-            tool_choice=tool_mode,
+        usage_ledger.record(
+            "kak", resp, model=client.model, latency=sp.duration, state="summarize"
         )
-        assistant_message = resp.choices[0].message
-        messages.append(assistant_message.model_dump())
-
-        # ─────────────────────────────────────────── #
-        #  1. Tidak ada tool‑call pada balasan LLM
-        # ─────────────────────────────────────────── #
-        if not assistant_message.tool_calls:
-            if state == _State.PAYLOAD_SENT:
-                summary_json = assistant_message.content or ""
-                if not summary_json.strip():
-                    return "Ringkasan kosong."
-
-                # Reset pesan: hanya system + original history + ringkasan
-                messages = (
-                    [system_prompt]
-                    + original_history
-                    + [assistant_message.model_dump()]
-                )
-                state = _State.SUMMARY_OBTAINED
-                continue
-
-            if state == _State.SAVED:
-                # Workflow selesai, kembalikan hasil
-                return summary_json or (assistant_message.content or "")
-
-            # Belum ada yang bisa diproses
-            return assistant_message.content or "Tidak ada jawaban."
-
-        # ─────────────────────────────────────────── #
-        #  2. Ada tool-call → eksekusi paralel
-        # ─────────────────────────────────────────── #
-        tasks = [_exec_tool(tc) for tc in assistant_message.tool_calls]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        reset_after_payload = False
-        for tc, res in zip(assistant_message.tool_calls, results):
-            if isinstance(res, Exception):
-                log.error(f"Tool {tc.function.name} gagal: {res}")
-                messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tc.id,
-                        "name": tc.function.name,
-                        "content": str(res),
-                        "error": True,
-                    }
-                )
-                continue
-
-            fname = res.pop("fname")  # type: ignore[arg-type]
-            fargs = res.pop("fargs")  # type: ignore[arg-type]
-            content = res["content"]  # type: ignore
-            messages.append(res)  # type: ignore
-
-            if fname == "build_summary_tender_payload":
-                if _payload_success(content):
-                    # Berhasil ambil payload
-                    original_history = [
-                        {"role": "user", "content": user_query},
-                        assistant_message.model_dump(),
-                        res,  # type: ignore
-                    ]
-                    messages = [system_prompt, {"role": "user", "content": content}]
-                    state = _State.PAYLOAD_SENT
-                    reset_after_payload = True
-                else:
-                    # Error file not found → tetap di INITIAL; LLM bisa coba lagi
-                    state = _State.INITIAL
-
-            elif fname == "save_summary_markdown_tool":
-                if summary_json is None:
-                    summary_json = fargs.get("summary", "")
-                state = _State.SAVED
-
-        if reset_after_payload:
-            continue
-
-    log.warning("Mencapai batas maksimum turn tanpa jawaban final.")
-    return summary_json or "Proses mencapai batas maksimum turn."
+        summary = resp.choices[0].message.content or ""
+        if not summary.strip():
+            raise StepError(EMPTY_SUMMARY_REPLY)
+        return summary
+
+    async def _save(summary: str, payload: ToolResult) -> ToolResult:
+        args = {"summary": summary, "project": save_project_name(summary, kak_tor_md_name)}
+        log.info(
+            f"[{trace_id}] Memanggil tool 'save_summary_markdown_tool'",
+            extra={"payload": payload_repr(args)},
+        )
+        result = await client.call_tool_result("save_summary_markdown_tool", args)
+        if not result.ok:
+            raise RuntimeError(result.error or result.text[:200])
+        # dipakai ulang docgen sebagai konteks ringkas proyek
+        await summary_store.put(kak_tor_md_name, summary, payload.get("context") or "")
+        return result
+
+    pipeline = Pipeline(
+        "kak",
+        [
+            Step("payload", _payload, timeout=settings.pipeline_tool_timeout_sec, retries=1),
+            Step(
+                "summarize",
+                _summarize,
+                inputs=("payload",),
+                output="summary",
+                timeout=settings.pipeline_llm_timeout_sec,
+            ),
+            Step(
+                "save",
+                _save,
+                inputs=("summary", "payload"),
+                timeout=settings.pipeline_tool_timeout_sec,
+                retries=1,
+                optional=True,
+            ),
+        ],
+    )
+    context: Dict[str, Any] = {}
+    if prefetched_payload is not None and payload_success(prefetched_payload):
+        context["payload"] = prefetched_payload
+    try:
+        values = await pipeline.run(context)
+    except StepError as e:
+        if str(e) == EMPTY_SUMMARY_REPLY:
+            return EMPTY_SUMMARY_REPLY
+        raise
+    log.info(
+        f"[{trace_id}] Pipeline KAK: "
+        + ", ".join(f"{k}={v:.2f}s" for k, v in pipeline.last_timings.items())
+    )
+    if values.get("save") is None:
+        raise SummaryNotSaved(kak_tor_md_name, values["summary"])
+    return values["summary"]
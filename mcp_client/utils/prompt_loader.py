@@ -1,12 +1,11 @@
-from pathlib import Path
-from mcp_client.settings import Settings
-
-cfg = Settings()  # type: ignore
+from typing import List
+from mcp_client.utils.prompt_registry import prompt_registry
 
 
 def load_prompt(name: str) -> str:
     """
     Membaca berkas prompt (.txt, UTF-8) dari folder 'prompts'.
+    Lewat ``prompt_registry``: di-cache & otomatis di-reload bila file berubah.
 
     Args:
         name: Nama file prompt—boleh:
@@ -21,26 +20,9 @@ def load_prompt(name: str) -> str:
         FileNotFoundError: Jika file tidak ditemukan.
         UnicodeDecodeError: Jika file tidak valid UTF-8.
     """
-    # ── Normalisasi nama file ──────────────────────────────────────────────
-    raw_name = Path(name).name  # buang path apa pun
-    stem = Path(raw_name).stem  # buang ekstensi apa pun
-    file_name = f"{stem}.txt"  # pakai ekstensi .txt selalu
-
-    # ── Tentukan direktori prompts ────────────────────────────────────────
-    prompt_dir = (
-        Path(cfg.prompt_base_path)
-        if getattr(cfg, "prompt_base_path", None)
-        else Path(__file__).resolve().parent.parent / "prompts"
-    )
-    prompt_path = prompt_dir / file_name
+    return prompt_registry.get(name).text
 
-    # ── Validasi ketersediaan file ────────────────────────────────────────
-    if not prompt_path.exists():
-        available = sorted(p.name for p in prompt_dir.glob("*.txt"))
-        raise FileNotFoundError(
-            f"Prompt '{file_name}' tidak ditemukan di {prompt_dir}.\n"
-            f"File yang tersedia: {available}"
-        )
 
-    # ── Baca & kembalikan isi file ────────────────────────────────────────
-    return prompt_path.read_text(encoding="utf-8")
+def preload_prompts() -> List[str]:
+    """Muat seluruh prompt .txt ke cache & hitung token; kembalikan nama yang dimuat."""
+    return prompt_registry.preload()
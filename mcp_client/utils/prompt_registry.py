@@ -0,0 +1,138 @@
+# utils/prompt_registry.py
+from __future__ import annotations
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.logger import logger
+
+settings = get_settings()
+
+
+@dataclass
+class Prompt:
+    name: str
+    text: str
+    path: Optional[Path] = None  # None → prompt statis dari kode
+    mtime_ns: int = 0
+    version: int = 1
+    _tokens: Optional[int] = None
+
+    @property
+    def tokens(self) -> int:
+        """Jumlah token (dihitung sekali per versi; tiktoken di-load lazy)."""
+        if self._tokens is None:
+            from mcp_client.utils.safe_args import count_tokens
+
+            self._tokens = count_tokens(self.text)
+        return self._tokens
+
+
+class PromptRegistry:
+    """Sumber tunggal prompt sistem: file ``.txt`` + prompt statis dari kode.
+
+    File di ``prompt_base_path`` dibaca ulang bila mtime berubah (dicek
+    paling sering tiap ``reload_interval`` detik), sehingga prompt bisa
+    diubah tanpa restart. Prompt statis (mis. prefix router) didaftarkan
+    sekali lewat ``register``. Token count dihitung saat ``preload``
+    (warm-up) dan dipakai untuk laporan prefix cache.
+    """
+
+    def __init__(
+        self,
+        base_dir: Optional[str] = None,
+        reload_interval: float = settings.prompt_reload_interval_sec,
+    ):
+        self._base_dir = base_dir
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._prompts: Dict[str, Prompt] = {}
+        self._checked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_dir(self) -> Path:
+        base = self._base_dir or settings.prompt_base_path
+        return Path(base) if base else Path(__file__).resolve().parent.parent / "prompts"
+
+    @staticmethod
+    def _stem(name: str) -> str:
+        # buang path & ekstensi apa pun: "kak_analyzer.md" → "kak_analyzer"
+        return Path(Path(name).name).stem
+
+    # ------------- akses ---------------------------------------------
+    def register(self, name: str, text: str) -> Prompt:
+        """Daftarkan prompt statis dari kode (tidak di-reload)."""
+        with self._lock:
+            prompt = self._prompts.get(name)
+            if prompt is None or prompt.text != text:
+                prompt = self._prompts[name] = Prompt(name, text)
+            return prompt
+
+    def get(self, name: str) -> Prompt:
+        stem = self._stem(name)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._prompts.get(stem)
+            if cached is not None and (
+                cached.path is None or now - self._checked.get(stem, 0.0) < self.reload_interval
+            ):
+                return cached
+
+        path = self.base_dir / f"{stem}.txt"
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            available = sorted(p.name for p in self.base_dir.glob("*.txt"))
+            raise FileNotFoundError(
+                f"Prompt '{stem}.txt' tidak ditemukan di {self.base_dir}.\n"
+                f"File yang tersedia: {available}"
+            ) from None
+
+        with self._lock:
+            self._checked[stem] = now
+            cached = self._prompts.get(stem)
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                return cached
+        text = path.read_text(encoding="utf-8")
+        with self._lock:
+            version = cached.version + 1 if cached is not None else 1
+            prompt = self._prompts[stem] = Prompt(stem, text, path, mtime_ns, version)
+            if cached is not None:
+                self.reloads += 1
+        if cached is not None:
+            logger.info(f"[prompt] '{stem}' di-reload (versi {version})")
+        return prompt
+
+    def preload(self) -> List[str]:
+        """Muat semua file prompt & hitung token seluruh prompt; kembalikan nama."""
+        names = sorted(p.stem for p in self.base_dir.glob("*.txt"))
+        for name in names:
+            self.get(name)
+        with self._lock:
+            prompts = list(self._prompts.values())
+        for prompt in prompts:
+            prompt.tokens
+        return sorted(p.name for p in prompts)
+
+    # ------------- laporan -------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            prompts = list(self._prompts.values())
+        return {
+            "reloads": self.reloads,
+            "prompts": {
+                p.name: {
+                    "source": "file" if p.path else "static",
+                    "version": p.version,
+                    "tokens": p._tokens,
+                }
+                for p in sorted(prompts, key=lambda p: p.name)
+            },
+        }
+
+
+prompt_registry = PromptRegistry()
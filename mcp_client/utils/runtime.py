@@ -0,0 +1,141 @@
+# utils/runtime.py
+from __future__ import annotations
+import asyncio
+import sys
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.logger import logger
+from mcp_client.utils.tracing import tracer
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+# ---------------------------------------------------------------------------
+#  Runner: event loop standar (tanpa patch nest_asyncio) atau uvloop
+# ---------------------------------------------------------------------------
+def _uvloop_factory() -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+    if sys.platform == "win32":
+        logger.warning("[runtime] uvloop tidak tersedia di Windows; pakai asyncio standar")
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning("[runtime] USE_UVLOOP aktif tapi uvloop belum terpasang; pakai asyncio standar")
+        return None
+    return uvloop.new_event_loop
+
+
+def run(main: Awaitable[T], use_uvloop: Optional[bool] = None, debug: Optional[bool] = None) -> T:
+    """Jalankan coroutine utama di event loop baru.
+
+    Pengganti ``asyncio.run`` untuk CLI & front-end: memakai uvloop bila
+    ``use_uvloop`` (default dari settings) dan paketnya terpasang.
+    """
+    if use_uvloop is None:
+        use_uvloop = settings.use_uvloop
+    factory = _uvloop_factory() if use_uvloop else None
+    with asyncio.Runner(debug=debug, loop_factory=factory) as runner:
+        return runner.run(main)  # type: ignore[arg-type]
+
+
+def loop_flavor(loop: Optional[asyncio.AbstractEventLoop] = None) -> str:
+    """Nama implementasi event loop yang sedang berjalan ("asyncio"/"uvloop")."""
+    loop = loop or asyncio.get_running_loop()
+    return type(loop).__module__.split(".")[0]
+
+
+# ---------------------------------------------------------------------------
+#  Monitor lag event loop
+# ---------------------------------------------------------------------------
+class LoopLagMonitor:
+    """Ukur lag event loop: selisih waktu bangun aktual vs jadwal ``sleep``.
+
+    Lag tinggi berarti ada kode sinkron yang memblok loop (parse besar,
+    I/O blocking, dsb.). Setiap sampel ≥ ``warn_ms`` dihitung sebagai stall
+    dan di-log; kuantil dihitung dari ``window`` sampel terakhir.
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.loop_lag_interval_sec,
+        warn_ms: float = settings.loop_lag_warn_ms,
+        window: int = 1_200,
+    ):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.ticks = 0
+        self.stalls = 0
+        self.max_ms = 0.0
+        self.flavor = "-"
+        self.samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        tracer.register_collector(self.render_prometheus)
+
+    def start(self) -> None:
+        """Mulai sampling di loop yang sedang berjalan (idempotent)."""
+        if self.interval <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self.flavor = loop_flavor()
+        self._task = asyncio.create_task(self._loop(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            tic = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.observe((time.perf_counter() - tic - self.interval) * 1000)
+
+    def observe(self, lag_ms: float) -> None:
+        lag_ms = max(0.0, lag_ms)
+        self.ticks += 1
+        self.samples.append(lag_ms)
+        self.max_ms = max(self.max_ms, lag_ms)
+        if lag_ms >= self.warn_ms:
+            self.stalls += 1
+            logger.warning(f"[runtime] Event loop tertahan {lag_ms:.0f} ms")
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    # ------------- laporan -------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loop": self.flavor,
+            "ticks": self.ticks,
+            "p50_ms": round(self.quantile(0.5), 2),
+            "p99_ms": round(self.quantile(0.99), 2),
+            "max_ms": round(self.max_ms, 2),
+            "stalls": self.stalls,
+        }
+
+    def render_prometheus(self) -> str:
+        name = "projectwise_event_loop_lag_ms"
+        return "\n".join(
+            [
+                f"# TYPE {name} gauge",
+                f'{name}{{quantile="0.5"}} {self.quantile(0.5):.3f}',
+                f'{name}{{quantile="0.99"}} {self.quantile(0.99):.3f}',
+                f'{name}{{quantile="1"}} {self.max_ms:.3f}',
+                "# TYPE projectwise_event_loop_stalls_total counter",
+                f"projectwise_event_loop_stalls_total {self.stalls}",
+            ]
+        )
+
+
+loop_monitor = LoopLagMonitor()
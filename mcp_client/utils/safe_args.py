@@ -1,7 +1,7 @@
-from tiktoken import encoding_for_model
-from mcp_client.settings import Settings
+from functools import lru_cache
+from mcp_client.settings import get_settings
 
-settings = Settings()  # type: ignore
+settings = get_settings()
 
 
 def _safe_args(d: dict, redact_keys=("api_key", "password", "token")) -> dict:
@@ -9,11 +9,33 @@ def _safe_args(d: dict, redact_keys=("api_key", "password", "token")) -> dict:
     return {k: ("***" if k in redact_keys else v) for k, v in d.items()}
 
 
-ENC = encoding_for_model(settings.llm_model)  # sesuaikan
 MAX_MEM_TOKENS = 150
 
 
+@lru_cache(maxsize=1)
+def _encoder():
+    """Tokenizer di-load saat pertama dipakai (import tiktoken cukup berat)."""
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(settings.llm_model)
+    except KeyError:
+        # Model belum dikenal tiktoken → pakai encoding keluarga gpt-4o
+        return tiktoken.get_encoding("o200k_base")
+
+
 def _truncate_by_tokens(text: str, max_tokens: int = MAX_MEM_TOKENS) -> str:
     """Potong string agar ≤ max_tokens."""
-    ids = ENC.encode(text)
-    return ENC.decode(ids[:max_tokens])
+    enc = _encoder()
+    ids = enc.encode(text)
+    return enc.decode(ids[:max_tokens])
+
+
+def count_tokens(text: str) -> int:
+    """Jumlah token *text* menurut tokenizer model utama."""
+    return len(_encoder().encode(text))
+
+
+def warm_tokenizer() -> None:
+    """Panaskan tokenizer agar encode pertama di jalur query tidak lambat."""
+    _truncate_by_tokens("warm-up")
@@ -1,12 +1,16 @@
+from enum import Enum
 from typing import Any, Optional, Dict, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
-class ToolStatus(str):
+class ToolStatus(str, Enum):
     SUCCESS = "success"
     FAILURE = "failure"
     EMPTY   = "empty"   # ← khusus hasil kosong
 
 class BaseToolResponse(BaseModel):
+    # field spesifik tool (text, path, placeholders, …) tetap dibawa
+    model_config = ConfigDict(extra="allow")
+
     status: ToolStatus = Field(..., description="success | failure | empty")
     error: Optional[str] = None   # wajib None kalau status ≠ failure
 
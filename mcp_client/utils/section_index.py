@@ -0,0 +1,291 @@
+# utils/section_index.py
+from __future__ import annotations
+import asyncio
+import hashlib
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.logger import logger
+from mcp_client.utils.markdown_sections import Section, split_sections
+from mcp_client.utils.slug_kak import best_match, infer_kak_md, project_stem
+from mcp_client.utils.tracing import tracer
+from mcp_client.utils.usage import usage_ledger
+
+settings = get_settings()
+
+_WORD_RE = re.compile(r"\w+")
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60  # konstanta reciprocal rank fusion (BM25 + embedding)
+EMBED_MAX_CHARS = 4_000
+# kata tanya/penghubung umum di query yang tidak membedakan section
+_QUERY_STOPWORDS = frozenset(
+    "yang dan dalam untuk dengan dari pada adalah berapa apa apakah bagaimana "
+    "siapa kapan mana ini itu tersebut proyek dokumen".split()
+)
+
+
+def terms(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if len(w) > 2]
+
+
+@dataclass
+class _IndexedSection:
+    section: Section
+    digest: str
+    tf: Counter
+    length: int
+    embedding: Optional[List[float]] = None
+
+
+@dataclass
+class _DocIndex:
+    project: str
+    version: str
+    sections: List[_IndexedSection]
+    df: Counter
+    avg_len: float
+    total_chars: int
+    checked_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class Retrieval:
+    """Hasil retrieval untuk satu query (kosong jika proyek/dokumen tak ada)."""
+
+    project: Optional[str] = None
+    sections: List[Section] = field(default_factory=list)
+    total_chars: int = 0
+
+    @property
+    def chars(self) -> int:
+        return sum(len(s.text) for s in self.sections)
+
+    def render(self) -> str:
+        body = "\n\n".join(s.text for s in self.sections)
+        return (
+            f"Cuplikan dokumen proyek '{self.project}' (section paling relevan "
+            f"dengan pertanyaan; jawab berdasarkan cuplikan ini):\n\n{body}"
+        )
+
+
+class SectionIndex:
+    """Index BM25 per proyek atas section markdown (dipecah per heading).
+
+    Dokumen diambil lewat ``read_project_markdown`` dan dicek ulang paling
+    sering tiap ``refresh_sec`` detik. Jika hash dokumen berubah, hanya
+    section yang isinya berubah yang di-tokenize (dan di-embed) ulang;
+    section lain dipakai kembali berdasarkan hash isinya. Opsional: skor
+    BM25 digabung dengan kemiripan embedding (reciprocal rank fusion).
+    """
+
+    def __init__(
+        self,
+        top_k: int = 4,
+        max_chars: int = 6_000,
+        refresh_sec: float = 300.0,
+        use_embeddings: bool = False,
+    ):
+        self.top_k = top_k
+        self.max_chars = max_chars
+        self.refresh_sec = refresh_sec
+        self.use_embeddings = use_embeddings
+        self._docs: Dict[str, _DocIndex] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._catalog: Tuple[float, List[str]] = (0.0, [])
+        self.lookups = 0
+        self.hits = 0
+        self.reindexed_sections = 0
+        self.reused_sections = 0
+        tracer.register_collector(self.render_prometheus)
+
+    # ------------- dokumen -------------------------------------------
+    async def project_for(self, client, query: str) -> Optional[str]:
+        slug = infer_kak_md(query)
+        if not slug:
+            return None
+        fetched_at, catalog = self._catalog
+        if time.monotonic() - fetched_at > self.refresh_sec:
+            catalog = (await client.call_tool_result("list_kak_files", {})).data or []
+            self._catalog = (time.monotonic(), catalog)
+        match = best_match(catalog, slug)
+        return project_stem(match) if match else None
+
+    async def refresh(self, client, project: str) -> Optional[_DocIndex]:
+        """Index dokumen proyek, dibangun ulang hanya jika dokumen berubah."""
+        lock = self._locks.setdefault(project, asyncio.Lock())
+        async with lock:
+            doc = self._docs.get(project)
+            if doc is not None and time.monotonic() - doc.checked_at <= self.refresh_sec:
+                return doc
+            result = await client.call_tool_result(
+                "read_project_markdown", {"project_name": project}
+            )
+            text = result.get("text")
+            if result.status != "success" or not isinstance(text, str):
+                return doc
+            version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+            if doc is not None and doc.version == version:
+                doc.checked_at = time.monotonic()
+                return doc
+            doc = self._docs[project] = self._build(project, version, text, doc)
+            return doc
+
+    def _build(
+        self, project: str, version: str, text: str, previous: Optional[_DocIndex]
+    ) -> _DocIndex:
+        known = {s.digest: s for s in previous.sections} if previous else {}
+        indexed: List[_IndexedSection] = []
+        reused = 0
+        for sec in split_sections(text):
+            digest = hashlib.sha1(sec.text.encode("utf-8")).hexdigest()
+            old = known.get(digest)
+            if old is not None:
+                indexed.append(_IndexedSection(sec, digest, old.tf, old.length, old.embedding))
+                reused += 1
+                continue
+            # judul dihitung dua kali → bobot heading lebih tinggi
+            tf = Counter(terms(sec.text) + terms(sec.title))
+            indexed.append(_IndexedSection(sec, digest, tf, sum(tf.values())))
+        df: Counter = Counter()
+        for sec in indexed:
+            df.update(sec.tf.keys())
+        self.reused_sections += reused
+        self.reindexed_sections += len(indexed) - reused
+        logger.info(
+            f"[section_index] {project} v{version}: {len(indexed)} section "
+            f"({len(indexed) - reused} baru, {reused} dipakai ulang)"
+        )
+        return _DocIndex(
+            project,
+            version,
+            indexed,
+            df,
+            sum(s.length for s in indexed) / len(indexed) if indexed else 0.0,
+            len(text),
+        )
+
+    # ------------- skor ----------------------------------------------
+    @staticmethod
+    def _bm25(doc: _DocIndex, query_terms: List[str]) -> List[float]:
+        n = len(doc.sections)
+        scores = []
+        for sec in doc.sections:
+            score = 0.0
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * sec.length / (doc.avg_len or 1.0))
+            for term in query_terms:
+                tf = sec.tf.get(term)
+                if not tf:
+                    continue
+                df = doc.df[term]
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+    async def _embed(self, client, texts: List[str]) -> List[List[float]]:
+        with tracer.span("section_index.embed", count=len(texts)) as sp:
+            resp = await client.llm.embeddings.create(
+                model=settings.embed_model, input=[t[:EMBED_MAX_CHARS] for t in texts]
+            )
+        usage_ledger.record(
+            "section_index.embed", resp, model=settings.embed_model, latency=sp.duration
+        )
+        vectors = []
+        for item in resp.data:
+            norm = math.sqrt(sum(x * x for x in item.embedding)) or 1.0
+            vectors.append([x / norm for x in item.embedding])
+        return vectors
+
+    async def _dense_ranks(self, client, doc: _DocIndex, query: str) -> List[float]:
+        missing = [s for s in doc.sections if s.embedding is None]
+        if missing:
+            for sec, vec in zip(missing, await self._embed(client, [s.section.text for s in missing])):
+                sec.embedding = vec
+        (qvec,) = await self._embed(client, [query])
+        return [sum(a * b for a, b in zip(qvec, s.embedding or [])) for s in doc.sections]
+
+    async def search(self, client, project: str, query: str) -> List[Section]:
+        doc = await self.refresh(client, project)
+        if doc is None or not doc.sections:
+            return []
+        # nama proyek ada di query tapi tidak membantu memilih section
+        noise = _QUERY_STOPWORDS | set(terms(project.replace("_", " ")))
+        scores = self._bm25(doc, [t for t in terms(query) if t not in noise])
+        candidates = [i for i, s in enumerate(scores) if s > 0]
+        if self.use_embeddings:
+            dense = await self._dense_ranks(client, doc, query)
+            bm25_rank = {i: r for r, i in enumerate(sorted(candidates, key=lambda i: -scores[i]))}
+            dense_rank = {i: r for r, i in enumerate(sorted(range(len(dense)), key=lambda i: -dense[i]))}
+            fused = {
+                i: 1 / (RRF_K + dense_rank[i])
+                + (1 / (RRF_K + bm25_rank[i]) if i in bm25_rank else 0.0)
+                for i in range(len(doc.sections))
+            }
+            ranked = sorted(fused, key=lambda i: -fused[i])
+        else:
+            ranked = sorted(candidates, key=lambda i: -scores[i])
+
+        picked: List[int] = []
+        used = 0
+        for i in ranked:
+            size = len(doc.sections[i].section.text)
+            if used + size > self.max_chars:
+                continue
+            picked.append(i)
+            used += size
+            if len(picked) >= self.top_k:
+                break
+        # urutan dokumen dipertahankan agar konteks tetap runtut
+        return [doc.sections[i].section for i in sorted(picked)]
+
+    async def retrieve(self, client, query: str, project: Optional[str] = None) -> Retrieval:
+        """Top-k section relevan untuk proyek yang disebut di query; gagal → kosong."""
+        self.lookups += 1
+        try:
+            # read_project_markdown menolak nama berekstensi .md
+            if project:
+                project = project_stem(project)
+            else:
+                project = await self.project_for(client, query)
+            if not project:
+                return Retrieval()
+            sections = await self.search(client, project, query)
+        except Exception as e:
+            logger.warning(f"[section_index] Retrieval dilewati: {e}")
+            return Retrieval()
+        doc = self._docs.get(project)
+        if sections:
+            self.hits += 1
+        return Retrieval(project, sections, doc.total_chars if doc else 0)
+
+    # ------------- laporan -------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._docs),
+            "sections": sum(len(d.sections) for d in self._docs.values()),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "reindexed_sections": self.reindexed_sections,
+            "reused_sections": self.reused_sections,
+        }
+
+    def render_prometheus(self) -> str:
+        s = self.stats()
+        return "\n".join(
+            [
+                "# TYPE projectwise_section_index_lookups_total counter",
+                f"projectwise_section_index_lookups_total {s['lookups']}",
+                "# TYPE projectwise_section_index_hits_total counter",
+                f"projectwise_section_index_hits_total {s['hits']}",
+                "# TYPE projectwise_section_index_sections gauge",
+                f"projectwise_section_index_sections {s['sections']}",
+                "# TYPE projectwise_section_index_reindexed_total counter",
+                f"projectwise_section_index_reindexed_total {s['reindexed_sections']}",
+            ]
+        )
@@ -0,0 +1,244 @@
+# utils/session_supervisor.py
+from __future__ import annotations
+import asyncio
+import random
+import time
+from typing import Any, AsyncContextManager, Callable, Dict, Iterable, Optional, Tuple
+
+import httpx
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from mcp_client.utils.logger import logger
+from mcp_client.utils.stdio_pool import (
+    HEALTH_INTERVAL_SEC,
+    PING_TIMEOUT_SEC,
+    READY_TIMEOUT_SEC,
+    TRANSPORT_ERRORS,
+)
+from mcp_client.utils.tracing import tracer
+
+TransportFactory = Callable[[], AsyncContextManager[Tuple[Any, Any]]]
+
+
+def is_transport_error(exc: BaseException) -> bool:
+    """Error yang berarti koneksi ke server putus (bukan error dari tool)."""
+    if isinstance(exc, TRANSPORT_ERRORS + (httpx.TransportError,)):
+        return True
+    return isinstance(exc, McpError) and exc.error.code == CONNECTION_CLOSED
+
+
+class SupervisedSession:
+    """``ClientSession`` SSE/stdio yang tersambung ulang otomatis.
+
+    Transport & session dibuka di task pengawas sendiri (context anyio wajib
+    keluar di task yang sama). Saat transport putus (error transport saat
+    call, stream berakhir, atau ping gagal) sesi dibuka ulang dengan
+    backoff eksponensial ber-jitter, lalu katalog tool dimuat ulang. Panggilan
+    tool idempotent yang gagal karena transport diulang setelah sesi pulih;
+    tool lain tetap gagal karena tidak diketahui apakah sudah dieksekusi.
+    """
+
+    def __init__(
+        self,
+        open_transport: TransportFactory,
+        label: str,
+        idempotent_tools: Iterable[str] = (),
+        retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 15.0,
+        wait_timeout: float = 30.0,
+        on_reconnect: Optional[Callable[[Any], None]] = None,
+    ):
+        self.open_transport = open_transport
+        self.label = label
+        self.idempotent_tools = frozenset(idempotent_tools)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.wait_timeout = wait_timeout
+        self.on_reconnect = on_reconnect
+        self.session: Optional[ClientSession] = None
+        self.tools_result: Any = None
+        self.ready = asyncio.Event()
+        self.reconnects = 0
+        self.retried_calls = 0
+        self.failed_calls = 0
+        self.downtime_sec = 0.0
+        self.last_error: Optional[str] = None
+        self._down_since: Optional[float] = None
+        self._started: Optional[asyncio.Future] = None
+        self._restart = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        tracer.register_collector(self.render_prometheus)
+
+    # ------------- lifecycle -----------------------------------------
+    async def initialize(self) -> None:
+        """Koneksi pertama; gagal → exception (connect() tetap bisa gagal)."""
+        self._started = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(), name=f"mcp-session-{self.label}")
+        await asyncio.wait_for(asyncio.shield(self._started), timeout=READY_TIMEOUT_SEC)
+
+    async def aclose(self) -> None:
+        logger.info(f"[mcp] Statistik sesi {self.label}: {self.stats()}")
+        self._stop.set()
+        self._restart.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception as e:
+                logger.error(f"[mcp] Gagal menutup sesi {self.label}: {e}")
+            self._task = None
+
+    async def _run(self) -> None:
+        attempt = 0
+        while not self._stop.is_set():
+            try:
+                async with self.open_transport() as (read, write):
+                    async with ClientSession(read, write) as session:
+                        await session.initialize()
+                        self.tools_result = await session.list_tools()
+                        self.session = session
+                        self._mark_up()
+                        attempt = 0
+                        await self._watch(session)
+            except Exception as e:
+                self.last_error = repr(e)[:200]
+                if self._started is not None and not self._started.done():
+                    self._started.set_exception(e)
+                    return
+                if not self._stop.is_set():
+                    logger.error(f"[mcp] Sesi {self.label} terputus: {e}")
+            finally:
+                if self.session is not None:
+                    self.session = None
+                    if self._down_since is None:
+                        self._mark_down()
+
+            if self._stop.is_set():
+                break
+            self._restart.clear()
+            attempt += 1
+            # jitter 50–100%: hindari semua client reconnect bersamaan
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+            delay *= random.uniform(0.5, 1.0)
+            logger.warning(
+                f"[mcp] Reconnect {self.label} percobaan ke-{attempt} dalam {delay:.1f}s..."
+            )
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _watch(self, session: ClientSession) -> None:
+        """Tunggu sinyal stop/reconnect; ping berkala untuk deteksi koneksi mati."""
+        while not self._restart.is_set():
+            try:
+                await asyncio.wait_for(self._restart.wait(), timeout=HEALTH_INTERVAL_SEC)
+            except asyncio.TimeoutError:
+                try:
+                    await asyncio.wait_for(session.send_ping(), timeout=PING_TIMEOUT_SEC)
+                except Exception as e:
+                    logger.error(f"[mcp] Sesi {self.label} tidak merespons ping: {e}")
+                    return
+
+    def _mark_up(self) -> None:
+        if self._down_since is not None:
+            downtime = time.monotonic() - self._down_since
+            self.downtime_sec += downtime
+            self.reconnects += 1
+            self._down_since = None
+            logger.info(
+                f"[mcp] Sesi {self.label} pulih setelah {downtime:.1f}s "
+                f"(reconnect ke-{self.reconnects})"
+            )
+            if self.on_reconnect is not None:
+                try:
+                    self.on_reconnect(self.tools_result)
+                except Exception as e:
+                    logger.warning(f"[mcp] Callback reconnect gagal: {e}")
+        self.ready.set()
+        if self._started is not None and not self._started.done():
+            self._started.set_result(None)
+
+    def _mark_down(self) -> None:
+        self.ready.clear()
+        self._down_since = time.monotonic()
+
+    def request_reconnect(self, session: Optional[ClientSession]) -> None:
+        """Minta sesi dibuka ulang (sekali, walau banyak call gagal bersamaan)."""
+        if session is not None and session is self.session:
+            if self._down_since is None:
+                self._mark_down()
+            self._restart.set()
+
+    # ------------- operasi MCP ---------------------------------------
+    async def _ready_session(self) -> ClientSession:
+        if not self.ready.is_set():
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout=self.wait_timeout)
+            except asyncio.TimeoutError:
+                raise ConnectionError(
+                    f"MCP Server ({self.label}) belum tersedia setelah {self.wait_timeout:.0f}s"
+                ) from None
+        if self.session is None:
+            raise ConnectionError(f"Sesi MCP ({self.label}) sedang ditutup")
+        return self.session
+
+    async def _call(self, name: str, idempotent: bool, op: Callable[[ClientSession], Any]) -> Any:
+        attempts = 1 + (self.retries if idempotent else 0)
+        for attempt in range(1, attempts + 1):
+            session = await self._ready_session()
+            try:
+                return await op(session)
+            except Exception as e:
+                if not is_transport_error(e):
+                    raise
+                self.request_reconnect(session)
+                if attempt >= attempts:
+                    self.failed_calls += 1
+                    raise
+                self.retried_calls += 1
+                logger.warning(
+                    f"[mcp] Transport putus saat '{name}', diulang setelah reconnect "
+                    f"({attempt}/{attempts - 1})"
+                )
+
+    async def list_tools(self) -> Any:
+        return await self._call("list_tools", True, lambda s: s.list_tools())
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        args = arguments or {}
+        return await self._call(
+            name, name in self.idempotent_tools, lambda s: s.call_tool(name, args)
+        )
+
+    # ------------- laporan -------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        ongoing = time.monotonic() - self._down_since if self._down_since is not None else 0.0
+        return {
+            "connected": self.ready.is_set(),
+            "reconnects": self.reconnects,
+            "downtime_sec": round(self.downtime_sec + ongoing, 3),
+            "retried_calls": self.retried_calls,
+            "failed_calls": self.failed_calls,
+            "last_error": self.last_error,
+        }
+
+    def render_prometheus(self) -> str:
+        s = self.stats()
+        label = f'transport="{self.label}"'
+        return "\n".join(
+            [
+                "# TYPE projectwise_mcp_connected gauge",
+                f"projectwise_mcp_connected{{{label}}} {int(s['connected'])}",
+                "# TYPE projectwise_mcp_reconnects_total counter",
+                f"projectwise_mcp_reconnects_total{{{label}}} {s['reconnects']}",
+                "# TYPE projectwise_mcp_downtime_seconds_total counter",
+                f"projectwise_mcp_downtime_seconds_total{{{label}}} {s['downtime_sec']}",
+                "# TYPE projectwise_mcp_retried_calls_total counter",
+                f"projectwise_mcp_retried_calls_total{{{label}}} {s['retried_calls']}",
+            ]
+        )
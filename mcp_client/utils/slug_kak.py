@@ -23,6 +23,13 @@ def infer_kak_md(query: str) -> Optional[str]:
     return f"{slug}" if slug else None
 
 
+def project_stem(name: str) -> str:
+    """Nama proyek untuk ``read_project_markdown``: tanpa ekstensi .md/.txt."""
+    if name.lower().endswith((".md", ".txt")):
+        return name.rsplit(".", 1)[0]
+    return name
+
+
 # utils/file_matcher
 def best_match(
     filename_candidates: list[str], query_slug: str, cutoff: float = 0.5
@@ -0,0 +1,219 @@
+# utils/stdio_pool.py
+from __future__ import annotations
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from mcp_client.utils.logger import logger
+
+READY_TIMEOUT_SEC = 30
+RESTART_DELAY_SEC = 1.0
+HEALTH_INTERVAL_SEC = 15
+PING_TIMEOUT_SEC = 5
+
+# Error yang menandakan proses/transport worker sudah mati
+TRANSPORT_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    BrokenPipeError,
+    ConnectionError,
+    EOFError,
+)
+
+
+# ---------------------------------------------------------------------------
+#  Worker: satu proses MCP Server stdio + ClientSession miliknya
+# ---------------------------------------------------------------------------
+class _Worker:
+    """Satu proses server stdio yang di-restart otomatis jika crash.
+
+    Transport & session dibuka dan ditutup di dalam task milik worker
+    sendiri, karena context manager stdio_client (anyio task group) wajib
+    keluar di task yang sama dengan tempat ia dimasuki.
+    """
+
+    def __init__(self, index: int, params: StdioServerParameters, max_inflight: int):
+        self.index = index
+        self.params = params
+        self.max_inflight = max_inflight
+        self.session: Optional[ClientSession] = None
+        self.inflight = 0
+        self.calls = 0
+        self.restarts = 0
+        self.ready = asyncio.Event()
+        self._sem = asyncio.Semaphore(max_inflight)
+        self._restart = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def free_slots(self) -> int:
+        return self.max_inflight - self.inflight
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(
+            self._run(), name=f"mcp-stdio-worker-{self.index}"
+        )
+
+    def request_restart(self) -> None:
+        self.ready.clear()
+        self._restart.set()
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                async with stdio_client(self.params) as (read, write):
+                    async with ClientSession(read, write) as session:
+                        await session.initialize()
+                        self.session = session
+                        self.ready.set()
+                        logger.info(f"[pool] Worker #{self.index} siap.")
+                        await self._watch(session)
+            except Exception as e:
+                logger.error(f"[pool] Worker #{self.index} berhenti: {e}")
+            finally:
+                self.session = None
+                self.ready.clear()
+
+            if self._stop.is_set():
+                break
+            self._restart.clear()
+            self.restarts += 1
+            logger.warning(
+                f"[pool] Restart worker #{self.index} (ke-{self.restarts})..."
+            )
+            await asyncio.sleep(RESTART_DELAY_SEC)
+
+    async def _watch(self, session: ClientSession) -> None:
+        """Tunggu sinyal stop/restart; ping berkala untuk deteksi crash."""
+        while not self._restart.is_set():
+            try:
+                await asyncio.wait_for(
+                    self._restart.wait(), timeout=HEALTH_INTERVAL_SEC
+                )
+            except asyncio.TimeoutError:
+                try:
+                    await asyncio.wait_for(
+                        session.send_ping(), timeout=PING_TIMEOUT_SEC
+                    )
+                except Exception as e:
+                    logger.error(f"[pool] Worker #{self.index} tidak merespons: {e}")
+                    return
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        async with self._sem:
+            session = self.session
+            if session is None:
+                raise ConnectionError(f"Worker #{self.index} belum siap")
+            self.inflight += 1
+            self.calls += 1
+            try:
+                return await session.call_tool(name, arguments)
+            except TRANSPORT_ERRORS:
+                self.request_restart()
+                raise
+            finally:
+                self.inflight -= 1
+
+    async def stop(self) -> None:
+        self._stop.set()
+        self._restart.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception as e:
+                logger.error(f"[pool] Gagal menghentikan worker #{self.index}: {e}")
+
+
+# ---------------------------------------------------------------------------
+#  Pool: antarmuka setara ClientSession (initialize/list_tools/call_tool)
+# ---------------------------------------------------------------------------
+class StdioServerPool:
+    """Pool beberapa proses MCP Server stdio agar tool CPU-bound memakai semua core.
+
+    Dapat dipakai di tempat ``ClientSession``: ``call_tool`` disebar ke worker
+    dengan slot kosong terbanyak, dibatasi ``max_inflight`` per proses.
+    Tool pada ``pinned_tools`` ({nama_tool: index_worker}) hanya dijalankan
+    di worker dedikasinya, dan worker tersebut tidak menerima tool lain.
+    """
+
+    def __init__(
+        self,
+        params: StdioServerParameters,
+        size: int,
+        max_inflight: int = 4,
+        pinned_tools: Optional[Dict[str, int]] = None,
+    ):
+        size = max(1, size)
+        self.workers = [_Worker(i, params, max(1, max_inflight)) for i in range(size)]
+        self.pinned_tools = {
+            tool: idx % size for tool, idx in (pinned_tools or {}).items()
+        }
+        dedicated = set(self.pinned_tools.values())
+        shared = [w for w in self.workers if w.index not in dedicated]
+        # Jika semua worker dedikasi, tool lain tetap boleh memakai seluruh pool
+        self._shared = shared or self.workers
+
+    # ------------- lifecycle -----------------------------------------
+    async def initialize(self) -> None:
+        for w in self.workers:
+            w.start()
+        await asyncio.wait_for(
+            asyncio.gather(*(w.ready.wait() for w in self.workers)),
+            timeout=READY_TIMEOUT_SEC,
+        )
+        logger.info(f"[pool] {len(self.workers)} worker stdio siap.")
+
+    async def aclose(self) -> None:
+        logger.info(f"[pool] Statistik worker: {self.stats()}")
+        await asyncio.gather(*(w.stop() for w in self.workers))
+
+    # ------------- operasi MCP ---------------------------------------
+    async def list_tools(self) -> Any:
+        worker = await self._pick(self.workers)
+        return await worker.session.list_tools()  # type: ignore[union-attr]
+
+    async def call_tool(
+        self, name: str, arguments: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        if name in self.pinned_tools:
+            candidates = [self.workers[self.pinned_tools[name]]]
+        else:
+            candidates = self._shared
+        worker = await self._pick(candidates)
+        return await worker.call_tool(name, arguments or {})
+
+    async def _pick(self, candidates: List[_Worker]) -> _Worker:
+        """Pilih worker siap dengan slot kosong terbanyak; tunggu jika belum ada."""
+        ready = [w for w in candidates if w.ready.is_set()]
+        if not ready:
+            waiters = [asyncio.create_task(w.ready.wait()) for w in candidates]
+            try:
+                done, _ = await asyncio.wait(
+                    waiters,
+                    timeout=READY_TIMEOUT_SEC,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                for t in waiters:
+                    t.cancel()
+            ready = [w for w in candidates if w.ready.is_set()]
+            if not done or not ready:
+                raise ConnectionError("Tidak ada worker MCP stdio yang siap")
+        return max(ready, key=lambda w: w.free_slots)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "worker": w.index,
+                "ready": w.ready.is_set(),
+                "inflight": w.inflight,
+                "calls": w.calls,
+                "restarts": w.restarts,
+            }
+            for w in self.workers
+        ]
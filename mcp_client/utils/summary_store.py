@@ -0,0 +1,150 @@
+# utils/summary_store.py
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from mcp_client.settings import get_settings
+from mcp_client.utils.logger import logger
+from mcp_client.utils.slug_kak import slugify
+from mcp_client.utils.tool_result import parse_json
+
+settings = get_settings()
+
+
+def document_hash(text: str) -> str:
+    """Hash isi markdown KAK (konteks payload / read_project_markdown)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class KakSummary:
+    project: str
+    summary: str  # JSON ringkasan dari pipeline KAK (apa adanya)
+    saved_at: str
+    doc_hash: str = ""  # hash dokumen KAK saat diringkas ("" = entri lama)
+
+    @property
+    def data(self) -> Optional[Dict[str, Any]]:
+        data = parse_json(self.summary)
+        return data if isinstance(data, dict) else None
+
+    @property
+    def age_days(self) -> float:
+        saved = datetime.fromisoformat(self.saved_at)
+        return (datetime.now(timezone.utc) - saved).total_seconds() / 86_400
+
+
+class SummaryStore:
+    """Ringkasan KAK terakhir per proyek, untuk dipakai ulang oleh docgen.
+
+    Diisi setiap kali pipeline KAK berhasil menyimpan ringkasan (server MCP
+    tidak punya tool untuk membaca ringkasan kembali). Ringkasan yang lebih
+    tua dari ``max_age_days`` dianggap basi; 0 = fitur nonaktif. Pemakai
+    yang membaca dokumennya memvalidasi lewat ``is_current`` (hash isi).
+    """
+
+    def __init__(
+        self,
+        path: str = settings.kak_summary_store_path,
+        max_age_days: float = settings.docgen_summary_max_age_days,
+    ):
+        self.path = Path(path)
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.changed = 0
+        self._entries: Optional[Dict[str, KakSummary]] = None
+        self._lock = threading.Lock()
+        self._write_lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def key(project: str) -> str:
+        return slugify(Path(project).stem if project.endswith((".md", ".txt")) else project)
+
+    def _load(self) -> Dict[str, KakSummary]:
+        if self._entries is None:
+            try:
+                raw = json.loads(self.path.read_text(encoding="utf-8"))
+                self._entries = {k: KakSummary(**v) for k, v in raw.items()}
+            except FileNotFoundError:
+                self._entries = {}
+            except Exception as e:
+                logger.warning(f"[summary] Store {self.path} tidak terbaca, mulai dari kosong: {e}")
+                self._entries = {}
+        return self._entries
+
+    def _save(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Tulis atomik (tmp + replace)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(entries, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    # ------------- akses ---------------------------------------------
+    def get(self, project: str) -> Optional[KakSummary]:
+        """Ringkasan segar untuk proyek, atau None (tidak ada / basi / bukan JSON)."""
+        if self.max_age_days <= 0:
+            return None
+        with self._lock:
+            entry = self._load().get(self.key(project))
+            if entry is None or entry.data is None:
+                self.misses += 1
+                return None
+            if entry.age_days > self.max_age_days:
+                self.stale += 1
+                return None
+            self.hits += 1
+            return entry
+
+    def is_current(self, entry: KakSummary, document: str) -> bool:
+        """False jika dokumen KAK berubah sejak diringkas (atau hash tidak ada)."""
+        if entry.doc_hash == document_hash(document):
+            return True
+        with self._lock:
+            self.changed += 1
+        return False
+
+    async def put(self, project: str, summary: str, document: str = "") -> bool:
+        """Simpan ringkasan JSON beserta hash dokumennya; non-JSON diabaikan."""
+        if self.max_age_days <= 0 or not isinstance(parse_json(summary), dict):
+            return False
+        entry = KakSummary(
+            project,
+            summary,
+            datetime.now(timezone.utc).isoformat(),
+            document_hash(document) if document else "",
+        )
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        # satu penulis sekaligus: tmp file yang sama & snapshot terbaru menang
+        async with self._write_lock:
+            with self._lock:
+                entries = self._load()
+                entries[self.key(project)] = entry
+                snapshot = {k: asdict(v) for k, v in entries.items()}
+            try:
+                await asyncio.to_thread(self._save, snapshot)
+            except Exception as e:
+                logger.warning(f"[summary] Gagal menulis {self.path}: {e}")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries or {}),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "changed": self.changed,
+            }
+
+
+summary_store = SummaryStore()
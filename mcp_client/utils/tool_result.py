@@ -0,0 +1,154 @@
+# utils/tool_result.py
+from __future__ import annotations
+import json
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from mcp_client.utils.schemas import BaseToolResponse, ToolStatus
+from mcp_client.utils.validators import validate_tool_output
+
+# ---------------------------------------------------------------------------
+#  Codec JSON: orjson jika terpasang (parse ±3-5× lebih cepat), fallback stdlib
+# ---------------------------------------------------------------------------
+try:
+    import orjson
+
+    def loads(data: str | bytes) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=str).decode("utf-8")
+
+    JSON_CODEC = "orjson"
+except ImportError:  # pragma: no cover
+
+    def loads(data: str | bytes) -> Any:
+        return json.loads(data)
+
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, default=str)
+
+    JSON_CODEC = "json"
+
+
+_FAILED = {"failure", "error"}
+_STATUSES = {s.value for s in ToolStatus}
+
+
+def parse_json(text: str) -> Any:
+    """Parse teks yang tampak seperti JSON objek/array; None jika bukan JSON."""
+    head = text.lstrip()[:1]
+    if head not in ("{", "["):
+        return None
+    try:
+        return loads(text)
+    except ValueError:
+        return None
+
+
+def _part_text(part: Any) -> str:
+    """Teks dari satu content part MCP (text / resource / image / audio)."""
+    text = getattr(part, "text", None)
+    if text is not None:
+        return text
+    resource = getattr(part, "resource", None)
+    if resource is not None:
+        return getattr(resource, "text", None) or f"[resource {getattr(resource, 'uri', '')}]"
+    return f"[{getattr(part, 'type', 'content')} {getattr(part, 'mimeType', '')}]".strip()
+
+
+def _parse_parts(texts: List[str]) -> Any:
+    """Satu dokumen JSON (boleh terpecah di beberapa part) atau list per part."""
+    if len(texts) == 1:
+        return parse_json(texts[0])
+    data = parse_json("".join(texts))
+    if data is None and texts:
+        parsed = [parse_json(t) for t in texts]
+        if all(p is not None for p in parsed):
+            data = parsed
+    return data
+
+
+def _unwrap_structured(structured: Any) -> Any:
+    """``structuredContent`` tanpa wrapper otomatis FastMCP.
+
+    FastMCP membungkus return non-dict (mis. ``-> str`` berisi teks JSON)
+    sebagai ``{"result": ...}``. Nilai string → None agar content part
+    di-parse seperti biasa; nilai lain (list, angka) dipakai langsung.
+    """
+    if isinstance(structured, dict) and len(structured) == 1 and "result" in structured:
+        inner = structured["result"]
+        return None if isinstance(inner, str) else inner
+    return structured
+
+
+@dataclass
+class ToolResult:
+    """Hasil tool MCP yang di-parse SEKALI.
+
+    ``text`` → seluruh content part digabung (dikirim apa adanya ke LLM);
+    ``data`` → JSON ter-parse (None jika bukan JSON); ``response`` →
+    ``BaseToolResponse`` bila payload memakai envelope ``status``.
+    """
+
+    name: str
+    text: str
+    data: Any = None
+    is_error: bool = False
+    response: Optional[BaseToolResponse] = field(default=None, repr=False)
+
+    @classmethod
+    def from_mcp(cls, name: str, result: Any) -> "ToolResult":
+        parts = getattr(result, "content", None) or []
+        text = "\n".join(_part_text(p) for p in parts)
+        data = _unwrap_structured(getattr(result, "structuredContent", None))
+        if data is None:
+            data = _parse_parts([p.text for p in parts if getattr(p, "text", None) is not None])
+        return cls.build(name, text, data, bool(getattr(result, "isError", False)))
+
+    @classmethod
+    def from_text(cls, name: str, text: str) -> "ToolResult":
+        return cls.build(name, text, parse_json(text))
+
+    @classmethod
+    def failure(cls, name: str, error: str) -> "ToolResult":
+        data = {"status": ToolStatus.FAILURE.value, "error": error}
+        return cls.build(name, dumps(data), data, is_error=True)
+
+    @classmethod
+    def build(cls, name: str, text: str, data: Any, is_error: bool = False) -> "ToolResult":
+        response = None
+        if isinstance(data, dict) and data.get("status") in _STATUSES:
+            try:
+                response = validate_tool_output(data, BaseToolResponse)
+            except RuntimeError:
+                response = None
+        return cls(name, text, data, is_error, response)
+
+    # ------------- akses -------------------------------------------
+    @property
+    def status(self) -> Optional[str]:
+        if self.response is not None:
+            return self.response.status.value
+        if isinstance(self.data, dict):
+            return self.data.get("status")
+        return None
+
+    @property
+    def ok(self) -> bool:
+        return not self.is_error and self.status not in _FAILED
+
+    @property
+    def error(self) -> Optional[str]:
+        if isinstance(self.data, dict):
+            return self.data.get("error")
+        return self.text if self.is_error else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """``data[key]`` untuk payload dict; default jika bukan dict."""
+        if isinstance(self.data, dict):
+            return self.data.get(key, default)
+        return default
+
+    def __str__(self) -> str:
+        return self.text
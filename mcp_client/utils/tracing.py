@@ -0,0 +1,306 @@
+# utils/tracing.py
+from __future__ import annotations
+import asyncio
+import bisect
+import hashlib
+import json
+import re
+import time
+import urllib.request
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from mcp_client.utils.logger import append_jsonl, logger, trace_id_var
+
+# Batas atas bucket histogram latensi (detik)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 180.0,
+)
+MAX_PENDING_SPANS = 10_000
+MAX_TRACKED_TRACES = 1_000
+_HEX_RE = re.compile(r"[0-9a-f]{1,32}")
+
+
+def otlp_trace_id(trace_id: str) -> str:
+    """traceId OTLP (32 hex): id hex pendek di-pad, selain itu di-hash."""
+    if _HEX_RE.fullmatch(trace_id):
+        return trace_id.rjust(32, "0")
+    return hashlib.md5(trace_id.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start_ns: int = 0
+    end_ns: int = 0
+    duration: float = 0.0
+    status: str = "ok"
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # slot terakhir = +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimasi kuantil dari bucket (batas atas bucket)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for i, c in enumerate(self.counts):
+            running += c
+            if running >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+# span aktif per task asyncio → parent untuk span berikutnya
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Tracing ringan berbasis span bersarang + histogram latensi per tahap.
+
+    ``with tracer.span("nama", attr=...)`` dapat dipakai di kode async; parent
+    diambil dari contextvar sehingga span di task anak (gather) tetap
+    bersarang di bawah span pemanggil. Span selesai diekspor sebagai OTLP
+    JSON, histogram sebagai teks Prometheus.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms: Dict[str, _Histogram] = {}
+        self._pending: Deque[Span] = deque(maxlen=MAX_PENDING_SPANS)
+        self._by_trace: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._collectors: List[Callable[[], str]] = []
+        self._export_task: Optional[asyncio.Task] = None
+
+    # ------------- span ----------------------------------------------
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        parent = _current_span.get()
+        trace_id = trace_id_var.get()
+        if trace_id == "-":
+            # span di luar process_query (warm-up, konsolidasi, dll.)
+            trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        span = Span(
+            name=name,
+            trace_id=trace_id,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            attributes=dict(attributes),
+        )
+        token = _current_span.set(span)
+        span.start_ns = time.time_ns()
+        tic = time.perf_counter()
+        try:
+            yield span
+        except asyncio.CancelledError:
+            span.status = "cancelled"
+            raise
+        except BaseException as e:
+            span.status = "error"
+            span.attributes["error"] = repr(e)[:200]
+            raise
+        finally:
+            span.duration = time.perf_counter() - tic
+            span.end_ns = span.start_ns + int(span.duration * 1e9)
+            _current_span.reset(token)
+            self._finish(span)
+
+    def annotate(self, **attributes: Any) -> None:
+        """Tambahkan atribut ke span aktif (jika ada)."""
+        span = _current_span.get()
+        if span is not None:
+            span.set(**attributes)
+
+    def _finish(self, span: Span) -> None:
+        hist = self.histograms.get(span.name)
+        if hist is None:
+            hist = self.histograms[span.name] = _Histogram(self.buckets)
+        hist.observe(span.duration)
+        self._pending.append(span)
+
+        spans = self._by_trace.get(span.trace_id)
+        if spans is None:
+            spans = self._by_trace[span.trace_id] = []
+            if len(self._by_trace) > MAX_TRACKED_TRACES:
+                self._by_trace.popitem(last=False)
+        spans.append(span)
+
+    def stage_timings(self, trace_id: str) -> Dict[str, float]:
+        """Total durasi (detik) per nama span untuk satu trace."""
+        timings: Dict[str, float] = {}
+        for span in self._by_trace.get(trace_id, []):
+            timings[span.name] = timings.get(span.name, 0.0) + span.duration
+        return timings
+
+    # ------------- metrik --------------------------------------------
+    def register_collector(self, collector: Callable[[], str]) -> None:
+        """Tambahkan sumber metrik lain (teks Prometheus) ke output render."""
+        self._collectors.append(collector)
+
+    def render_prometheus(self) -> str:
+        name = "projectwise_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Latensi per tahap process_query.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, hist in sorted(self.histograms.items()):
+            running = 0
+            for bound, count in zip(self.buckets, hist.counts):
+                running += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {running}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {hist.total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {hist.count}')
+        for collector in self._collectors:
+            try:
+                lines.append(collector().rstrip("\n"))
+            except Exception as e:
+                logger.error(f"Collector metrik gagal: {e}")
+        return "\n".join(lines) + "\n"
+
+    # ------------- ekspor OTLP ---------------------------------------
+    @staticmethod
+    def to_otlp(spans: List[Span]) -> Dict[str, Any]:
+        def _value(v: Any) -> Dict[str, Any]:
+            if isinstance(v, bool):
+                return {"boolValue": v}
+            if isinstance(v, int):
+                return {"intValue": str(v)}
+            if isinstance(v, float):
+                return {"doubleValue": v}
+            return {"stringValue": str(v)}
+
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": _value("projectwise_client")}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "projectwise.tracing"},
+                            "spans": [
+                                {
+                                    # OTLP: traceId 16 byte, spanId 8 byte (hex)
+                                    "traceId": otlp_trace_id(s.trace_id),
+                                    "spanId": s.span_id,
+                                    "parentSpanId": s.parent_id or "",
+                                    "name": s.name,
+                                    "kind": 1,
+                                    "startTimeUnixNano": str(s.start_ns),
+                                    "endTimeUnixNano": str(s.end_ns),
+                                    "attributes": [
+                                        {"key": k, "value": _value(v)}
+                                        for k, v in s.attributes.items()
+                                    ],
+                                    "status": {"code": 2 if s.status == "error" else 1},
+                                }
+                                for s in spans
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    async def flush(
+        self,
+        trace_path: Optional[str] = None,
+        metrics_path: Optional[str] = None,
+        endpoint: Optional[str] = None,
+    ) -> None:
+        """Ekspor span tertunda (OTLP JSON) & snapshot metrik Prometheus."""
+        spans = list(self._pending)
+        self._pending.clear()
+        metrics = self.render_prometheus() if metrics_path else None
+        await asyncio.to_thread(
+            self._write, spans, trace_path, metrics, metrics_path, endpoint
+        )
+
+    def _write(
+        self,
+        spans: List[Span],
+        trace_path: Optional[str],
+        metrics: Optional[str],
+        metrics_path: Optional[str],
+        endpoint: Optional[str],
+    ) -> None:
+        if spans and (trace_path or endpoint):
+            body = json.dumps(self.to_otlp(spans), ensure_ascii=False)
+            if trace_path:
+                append_jsonl(Path(trace_path), body)
+            if endpoint:
+                req = urllib.request.Request(
+                    endpoint,
+                    data=body.encode("utf-8"),
+                    headers={"Content-Type": "application/json"},
+                    method="POST",
+                )
+                try:
+                    urllib.request.urlopen(req, timeout=5).close()
+                except Exception as e:
+                    logger.error(f"Ekspor OTLP ke {endpoint} gagal: {e}")
+        if metrics is not None and metrics_path:
+            path = Path(metrics_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_text(metrics, encoding="utf-8")
+            tmp.replace(path)
+
+    def start_exporter(
+        self,
+        interval_sec: float,
+        trace_path: Optional[str] = None,
+        metrics_path: Optional[str] = None,
+        endpoint: Optional[str] = None,
+    ) -> None:
+        """Jalankan flush berkala di background (idempotent)."""
+        if self._export_task is not None and not self._export_task.done():
+            return
+
+        async def _loop():
+            while True:
+                await asyncio.sleep(interval_sec)
+                try:
+                    await self.flush(trace_path, metrics_path, endpoint)
+                except Exception as e:
+                    logger.error(f"Ekspor tracing gagal: {e}")
+
+        self._export_task = asyncio.create_task(_loop(), name="tracing-exporter")
+
+    async def stop_exporter(self) -> None:
+        if self._export_task is not None:
+            self._export_task.cancel()
+            try:
+                await self._export_task
+            except asyncio.CancelledError:
+                pass
+            self._export_task = None
+
+
+tracer = Tracer()
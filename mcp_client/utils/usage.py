@@ -0,0 +1,286 @@
+# utils/usage.py
+from __future__ import annotations
+import asyncio
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from mcp_client.utils.logger import append_jsonl, logger, trace_id_var
+from mcp_client.utils.tracing import tracer
+
+MAX_TRACKED_TRACES = 1_000
+# Bucket per user dibatasi (LRU); user yang tergusur dilebur ke OTHER_USERS
+# agar jumlah per dimensi tetap sama dengan total.
+MAX_TRACKED_USERS = 1_000
+OTHER_USERS = "(lainnya)"
+
+# Harga USD per 1 juta token: (input, cached_input, output). Dicocokkan via prefix
+# nama model terpanjang; override lewat Settings.llm_pricing.
+DEFAULT_PRICING: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "text-embedding-3-small": (0.02, 0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.13, 0.0),
+}
+
+# Atribusi pemakaian: user_id & intent aktif per task asyncio
+usage_scope: ContextVar[Dict[str, str]] = ContextVar("usage_scope", default={})
+
+
+def set_scope(**labels: str) -> None:
+    """Perbarui label atribusi (user_id, intent) untuk task saat ini."""
+    usage_scope.set({**usage_scope.get(), **labels})
+
+
+@dataclass
+class UsageTotals:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cache_hits: int = 0  # panggilan dengan cached_tokens > 0
+    total_tokens: int = 0
+    cost_usd: float = 0.0
+    latency_sec: float = 0.0
+
+    def add(self, other: "UsageTotals") -> None:
+        self.calls += other.calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.cache_hits += other.cache_hits
+        self.total_tokens += other.total_tokens
+        self.cost_usd += other.cost_usd
+        self.latency_sec += other.latency_sec
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["cost_usd"] = round(self.cost_usd, 6)
+        data["latency_sec"] = round(self.latency_sec, 3)
+        return data
+
+
+def _extract(usage: Any) -> Tuple[int, int, int]:
+    """(prompt, completion, cached) dari objek usage OpenAI (chat/embedding)."""
+    if usage is None:
+        return 0, 0, 0
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) or 0
+    return prompt, completion, cached
+
+
+class UsageLedger:
+    """Akuntansi token & biaya setiap panggilan LLM/embedding.
+
+    Diagregasi per call site, trace, intent, state pipeline, user dan model.
+    Thread-safe karena embedder/LLM internal mem0 dipanggil dari thread.
+    """
+
+    def __init__(self, pricing: Optional[Dict[str, Tuple[float, float, float]]] = None):
+        self.pricing = dict(DEFAULT_PRICING)
+        self.pricing.update(pricing or {})
+        self.total = UsageTotals()
+        self.by: Dict[str, Dict[str, UsageTotals]] = {
+            "call_site": {},
+            "intent": {},
+            "state": {},
+            "user": OrderedDict(),
+            "model": {},
+        }
+        self.by_trace: "OrderedDict[str, UsageTotals]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._snapshot_task: Optional[asyncio.Task] = None
+        tracer.register_collector(self.render_prometheus)
+
+    def set_pricing(self, pricing: Dict[str, Any]) -> None:
+        self.pricing.update({k: tuple(v) for k, v in pricing.items()})  # type: ignore[misc]
+
+    def _price(self, model: str) -> Tuple[float, float, float]:
+        match = max((p for p in self.pricing if model.startswith(p)), key=len, default=None)
+        return self.pricing[match] if match else (0.0, 0.0, 0.0)
+
+    # ------------- pencatatan ----------------------------------------
+    def record(
+        self,
+        call_site: str,
+        response: Any,
+        *,
+        model: str,
+        latency: float = 0.0,
+        state: Optional[str] = None,
+    ) -> UsageTotals:
+        """Catat ``response.usage`` satu panggilan; kembalikan totalnya."""
+        prompt, completion, cached = _extract(getattr(response, "usage", None))
+        price_in, price_cached, price_out = self._price(model)
+        item = UsageTotals(
+            calls=1,
+            prompt_tokens=prompt,
+            completion_tokens=completion,
+            cached_tokens=cached,
+            cache_hits=1 if cached else 0,
+            total_tokens=prompt + completion,
+            cost_usd=(
+                (prompt - cached) * price_in
+                + cached * price_cached
+                + completion * price_out
+            )
+            / 1_000_000,
+            latency_sec=latency,
+        )
+        scope = usage_scope.get()
+        keys = {
+            "call_site": call_site,
+            "intent": scope.get("intent", "-"),
+            "state": f"{call_site}:{state}" if state else call_site,
+            "user": scope.get("user_id", "-"),
+            "model": model,
+        }
+        trace_id = trace_id_var.get()
+        with self._lock:
+            self.total.add(item)
+            for dim, key in keys.items():
+                if dim == "user":
+                    self._user_bucket(key).add(item)
+                else:
+                    self.by[dim].setdefault(key, UsageTotals()).add(item)
+            per_trace = self.by_trace.get(trace_id)
+            if per_trace is None:
+                per_trace = self.by_trace[trace_id] = UsageTotals()
+                if len(self.by_trace) > MAX_TRACKED_TRACES:
+                    self.by_trace.popitem(last=False)
+            per_trace.add(item)
+        return item
+
+    def _user_bucket(self, user_id: str) -> UsageTotals:
+        """Bucket user (LRU); yang paling lama dilebur ke ``OTHER_USERS``.
+
+        Dipanggil di bawah ``self._lock``.
+        """
+        table: "OrderedDict[str, UsageTotals]" = self.by["user"]  # type: ignore[assignment]
+        bucket = table.get(user_id)
+        if bucket is not None:
+            table.move_to_end(user_id)
+            return bucket
+        bucket = table[user_id] = UsageTotals()
+        while len(table) > MAX_TRACKED_USERS + (OTHER_USERS in table):
+            old_id, old = table.popitem(last=False)
+            if old_id == OTHER_USERS:
+                table[OTHER_USERS] = old
+                continue
+            table.setdefault(OTHER_USERS, UsageTotals()).add(old)
+        return bucket
+
+    def wrap_sync(self, fn: Callable[..., Any], call_site: str) -> Callable[..., Any]:
+        """Bungkus fungsi ``create`` sinkron (client internal mem0) agar tercatat."""
+
+        @functools.wraps(fn)
+        def _wrapped(*args: Any, **kwargs: Any) -> Any:
+            tic = time.perf_counter()
+            resp = fn(*args, **kwargs)
+            try:
+                self.record(
+                    call_site,
+                    resp,
+                    model=str(kwargs.get("model", "-")),
+                    latency=time.perf_counter() - tic,
+                )
+            except Exception as e:
+                logger.error(f"Gagal mencatat usage {call_site}: {e}")
+            return resp
+
+        return _wrapped
+
+    # ------------- laporan -------------------------------------------
+    def trace_usage(self, trace_id: str) -> Dict[str, Any]:
+        with self._lock:
+            totals = self.by_trace.get(trace_id)
+            return totals.to_dict() if totals else UsageTotals().to_dict()
+
+    def prefix_cache_report(self) -> Dict[str, Dict[str, Any]]:
+        """Hit rate prefix cache provider per call site (dari ``cached_tokens``).
+
+        ``hit_rate`` = porsi panggilan yang mendapat cached token;
+        ``cached_ratio`` = porsi prompt token yang dilayani dari cache.
+        """
+        with self._lock:
+            sites = list(self.by["call_site"].items())
+        return {
+            site: {
+                "calls": t.calls,
+                "hit_rate": round(t.cache_hits / t.calls, 4) if t.calls else 0.0,
+                "cached_ratio": round(t.cached_tokens / t.prompt_tokens, 4)
+                if t.prompt_tokens
+                else 0.0,
+            }
+            for site, t in sorted(sites)
+            if t.prompt_tokens
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            data = {
+                "ts": datetime.now(timezone.utc).isoformat(),
+                "total": self.total.to_dict(),
+                **{
+                    f"by_{dim}": {k: v.to_dict() for k, v in table.items()}
+                    for dim, table in self.by.items()
+                },
+            }
+        data["prefix_cache"] = self.prefix_cache_report()
+        return data
+
+    def render_prometheus(self) -> str:
+        report = self.prefix_cache_report()
+        lines = ["# TYPE projectwise_prefix_cache_hit_ratio gauge"]
+        for site, r in report.items():
+            lines.append(f'projectwise_prefix_cache_hit_ratio{{call_site="{site}"}} {r["hit_rate"]}')
+        lines.append("# TYPE projectwise_prompt_cached_tokens_ratio gauge")
+        for site, r in report.items():
+            lines.append(
+                f'projectwise_prompt_cached_tokens_ratio{{call_site="{site}"}} {r["cached_ratio"]}'
+            )
+        return "\n".join(lines)
+
+    def write_snapshot(self, path: str) -> None:
+        """Tambahkan satu baris snapshot JSON ke *path* (riwayat untuk capacity
+        planning; dirotasi seperti file log)."""
+        append_jsonl(Path(path), json.dumps(self.snapshot(), ensure_ascii=False))
+
+    def start_snapshots(self, interval_sec: float, path: str) -> None:
+        """Tulis snapshot berkala di background (idempotent)."""
+        if self._snapshot_task is not None and not self._snapshot_task.done():
+            return
+
+        async def _loop():
+            while True:
+                await asyncio.sleep(interval_sec)
+                try:
+                    await asyncio.to_thread(self.write_snapshot, path)
+                except Exception as e:
+                    logger.error(f"Snapshot usage gagal: {e}")
+
+        self._snapshot_task = asyncio.create_task(_loop(), name="usage-snapshots")
+
+    async def stop_snapshots(self) -> None:
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            try:
+                await self._snapshot_task
+            except asyncio.CancelledError:
+                pass
+            self._snapshot_task = None
+
+
+usage_ledger = UsageLedger()
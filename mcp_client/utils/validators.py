@@ -1,6 +1,6 @@
-# mcp_client/validators.py
+# mcp_client/utils/validators.py
 from pydantic import ValidationError
-from schemas import BaseToolResponse
+from mcp_client.utils.schemas import BaseToolResponse
 
 def validate_tool_output(raw: dict, model) -> BaseToolResponse:
     try: